@@ -1,53 +1,55 @@
-from flask import Flask, request, jsonify, send_from_directory, session
+from flask import Flask, Response, request, jsonify, send_file, send_from_directory, session, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import base64
-from io import BytesIO
 import os
-import requests
 import uuid
-from gtts import gTTS
 import json
 import re
 import random
-import sqlite3
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from contextlib import contextmanager
 from werkzeug.security import generate_password_hash, check_password_hash
-import bcrypt
 import traceback
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from security import encrypt_data, decrypt_data
-from services.email_service import email_service
-import stripe
+from database import BASE_DIR, DB_PATH, DATABASE_URL, IS_POSTGRES, get_db, pool as db_pool, sqlite_maintenance, sync_id_sequence
+from services.audit_log import audit_log
+from services.password_hashing import hash_password, password_hasher
+from services.tts_cache import AUDIO_CACHE_CONTROL, LANG_PATTERN, audio_key, TTS_DEFAULT_LANG, TTS_DEFAULT_VOICE, TTS_MAX_CHARS, TTS_VOICES, audio_cache
+from services.schema_state import fingerprint, read_state, record_state
+from migrations import migrate
+from queries import (
+    BOOKINGS_FOR_USER, COMMUNITY_FEED, COMMUNITY_FEED_AFTER, DELETE_USER, DELETE_USER_BOOKINGS, DELETE_USER_CHECKINS,
+    DELETE_USER_COUNTER_DELTAS, INSERT_ADMIN, INSERT_BOOKING, INSERT_CHAT_MESSAGE, INSERT_COMMUNITY_POST, PLACEHOLDER,
+    SET_DOCTOR_STATUS, SET_PREMIUM_PLAN, UPDATE_ADMIN, UPSERT_DOCTOR, USER_BY_ID, USER_EMAIL, USER_EXPORT_PROFILE,
+    USER_ID_BY_EMAIL,
+)
+from services.email_outbox import EMAIL_WORKER_MODE
+from services.email_service import email_service, email_worker
+from services.user_counters import counter_flusher, record_delta, with_pending
+from services.rate_limiting import chat_limit, limiter, tts_limit
 from functools import wraps, lru_cache
 import time
 
 print("Starting application initialization...", flush=True)
 try:
     from auth import auth_bp 
-    from services.ai_service import generate_ai_response
+    from services.ai_service import generate_ai_response, provider_health, stream_ai_response
+    from services.response_cache import response_cache
     from doctor_seed import SAMPLE_DOCTORS
+    from services.doctor_directory import SEARCH_SORTS, doctor_cache, search_doctors
+    from services.text_classifier import classify
+    from services.conversation_context import load_conversation, schedule_summary_refresh
 except Exception as e:
     print(f"CRITICAL IMPORT ERROR: {e}")
     traceback.print_exc()
 
 # ========== Load Config ==========
 load_dotenv()
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.environ.get('MOODMATE_DB_PATH') or os.path.join(BASE_DIR, 'moodmate.db')
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'a-super-secret-key-you-must-change')
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['SESSION_COOKIE_SECURE'] = os.getenv('SESSION_COOKIE_SECURE', 'false').lower() == 'true'
 
-# --- Database Selection ---
-DATABASE_URL = os.environ.get('DATABASE_URL')
-IS_POSTGRES = DATABASE_URL and DATABASE_URL.startswith('postgres')
-
 # ========== CORS Setup ==========
 allowed_origins = [
     "http://localhost:3000",
@@ -55,15 +57,12 @@ allowed_origins = [
     "https://moodmate-frontend.onrender.com",
 ]
 extra_origins = [origin.strip() for origin in (os.getenv("CORS_ALLOWED_ORIGINS") or "").split(",") if origin.strip()]
-CORS(app, supports_credentials=True, origins=allowed_origins + extra_origins)
+CORS_ORIGINS = allowed_origins + extra_origins
+CORS(app, supports_credentials=True, origins=CORS_ORIGINS)
 
 # ========== Rate Limiting ==========
-limiter = Limiter(
-    key_func=get_remote_address,
-    app=app,
-    default_limits=["500 per day", "100 per hour"],
-    storage_uri="memory://",
-)
+# Counters live in RATELIMIT_STORAGE_URI (a SQLite file by default), shared by every worker.
+limiter.init_app(app)
 
 app.register_blueprint(auth_bp, url_prefix="/")
 
@@ -84,282 +83,76 @@ def loads_json(value, default):
     except Exception:
         return default
 
-def fix_sql_for_db(query):
-    if IS_POSTGRES:
-        query = query.replace("AUTOINCREMENT", "")
-        query = query.replace("INTEGER PRIMARY KEY", "SERIAL PRIMARY KEY")
-        query = query.replace("DATETIME DEFAULT CURRENT_TIMESTAMP", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
-        query = query.replace("CREATE INDEX IF NOT EXISTS", "CREATE INDEX")
-    return query
-
-@contextmanager
-def get_db():
-    if IS_POSTGRES:
-        conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-    else:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-    try:
-        yield conn
-    finally:
-        conn.close()
+def doctor_seed_row(doctor):
+    return {
+        **doctor,
+        "languages": dumps_json(doctor["languages"]), "modes": dumps_json(doctor["modes"]),
+        "qualifications": dumps_json(doctor["qualifications"]), "approaches": dumps_json(doctor["approaches"]),
+        "focus_areas": dumps_json(doctor["focus_areas"]), "availability": dumps_json(doctor["availability"]),
+    }
 
 def seed_sample_doctors(conn):
-    cursor = conn.cursor()
-    for doctor in SAMPLE_DOCTORS:
-        placeholder = "%s" if IS_POSTGRES else "?"
-        query = f"""
-            INSERT INTO doctors (
-                id, name, initials, email, password_hash, specialization, experience_years,
-                languages_json, modes_json, price_per_session, rating, reviews_count,
-                badge, bio, license_info, qualifications_json, approaches_json,
-                focus_areas_json, best_for, first_session, cancellation_policy,
-                review_summary, availability_json, photo_url, is_verified,
-                profile_source, profile_status
-            )
-            VALUES ({', '.join([placeholder]*27)})
-        """
-        if IS_POSTGRES:
-            query += """
-                ON CONFLICT(id) DO UPDATE SET
-                    name = EXCLUDED.name, email = EXCLUDED.email, bio = EXCLUDED.bio,
-                    is_verified = EXCLUDED.is_verified, profile_source = EXCLUDED.profile_source
-            """
-        else:
-            query += """
-                ON CONFLICT(id) DO UPDATE SET
-                    name = excluded.name, email = excluded.email, bio = excluded.bio,
-                    is_verified = excluded.is_verified, profile_source = excluded.profile_source
-            """
-        
-        params = (
-            doctor["id"], doctor["name"], doctor["initials"], doctor["email"],
-            doctor["password_hash"], doctor["specialization"], doctor["experience_years"],
-            dumps_json(doctor["languages"]), dumps_json(doctor["modes"]),
-            doctor["price_per_session"], doctor["rating"], doctor["reviews_count"],
-            doctor["badge"], doctor["bio"], doctor["license_info"],
-            dumps_json(doctor["qualifications"]), dumps_json(doctor["approaches"]),
-            dumps_json(doctor["focus_areas"]), doctor["best_for"], doctor["first_session"],
-            doctor["cancellation_policy"], doctor["review_summary"],
-            dumps_json(doctor["availability"]), doctor["photo_url"], 1,
-            doctor["profile_source"], "active",
-        )
-        cursor.execute(query, params)
+    UPSERT_DOCTOR.executemany(conn, [doctor_seed_row(doctor) for doctor in SAMPLE_DOCTORS])
+    sync_id_sequence(conn, "doctors")  # the seed sets its ids explicitly
+
+def admin_credentials():
+    return os.getenv("MOODMATE_ADMIN_EMAIL", "admin@moodmate.in").strip().lower(), os.getenv("MOODMATE_ADMIN_PASSWORD", "Admin123!Demo")
 
 def seed_default_admin(conn):
-    admin_email = os.getenv("MOODMATE_ADMIN_EMAIL", "admin@moodmate.in").strip().lower()
-    admin_password = os.getenv("MOODMATE_ADMIN_PASSWORD", "Admin123!Demo")
-    
-    placeholder = "%s" if IS_POSTGRES else "?"
-    cursor = conn.cursor()
-    cursor.execute(f"SELECT id FROM users WHERE email = {placeholder}", (admin_email,))
-    existing = cursor.fetchone()
-    password_hash = bcrypt.hashpw(admin_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    admin_email, admin_password = admin_credentials()
+    existing = USER_ID_BY_EMAIL.fetchone(conn, email=admin_email)
+    password_hash = hash_password(admin_password)
     
     if existing:
-        user_id = existing[0]  # Both SQLite Row and plain psycopg2 tuple support index 0
-        cursor.execute(
-            f"UPDATE users SET username = {placeholder}, password_hash = {placeholder}, role = 'admin' WHERE id = {placeholder}",
-            ("MoodMate Admin", password_hash, user_id),
-        )
+        # Both SQLite Row and RealDictRow support key access
+        UPDATE_ADMIN.execute(conn, username="MoodMate Admin", password_hash=password_hash, id=existing["id"])
     else:
-        cursor.execute(
-            f"INSERT INTO users (username, email, phone, password_hash, premium_plan, role) VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})",
-            ("MoodMate Admin", admin_email, "9000000000", password_hash, "annual", "admin"),
-        )
+        INSERT_ADMIN.execute(conn, username="MoodMate Admin", email=admin_email, phone="9000000000", password_hash=password_hash)
 
-def init_db():
-    if IS_POSTGRES:
-        conn = psycopg2.connect(DATABASE_URL)
-    else:
-        conn = sqlite3.connect(DB_PATH)
-    
-    cursor = conn.cursor()
-    
-    cursor.execute(fix_sql_for_db('''
-        CREATE TABLE IF NOT EXISTS chat_history (
-            id SERIAL PRIMARY KEY,
-            session_id TEXT NOT NULL DEFAULT 'default_session',
-            role TEXT NOT NULL,
-            content TEXT NOT NULL,
-            mood_detected TEXT,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    '''))
-    
-    cursor.execute(fix_sql_for_db('''
-        CREATE TABLE IF NOT EXISTS users (
-            id SERIAL PRIMARY KEY,
-            username TEXT NOT NULL,
-            email TEXT UNIQUE,
-            phone TEXT UNIQUE,
-            password_hash TEXT NOT NULL,
-            coins INTEGER DEFAULT 100,
-            streak INTEGER DEFAULT 0,
-            last_mood_tag TEXT,
-            premium_plan TEXT DEFAULT 'free',
-            premium_expiry DATE,
-            owned_items TEXT DEFAULT '[]',
-            current_theme TEXT DEFAULT 'default',
-            current_avatar TEXT DEFAULT 'default',
-            achievements TEXT DEFAULT '[]',
-            login_streak INTEGER DEFAULT 0,
-            last_login DATE,
-            role TEXT DEFAULT 'free'
-        )
-    '''))
-
-    cursor.execute(fix_sql_for_db('''
-        CREATE TABLE IF NOT EXISTS doctors (
-            id INTEGER PRIMARY KEY,
-            name TEXT NOT NULL,
-            initials TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            specialization TEXT NOT NULL,
-            experience_years INTEGER DEFAULT 0,
-            languages_json TEXT DEFAULT '[]',
-            modes_json TEXT DEFAULT '[]',
-            price_per_session INTEGER DEFAULT 0,
-            rating REAL DEFAULT 0,
-            reviews_count INTEGER DEFAULT 0,
-            badge TEXT DEFAULT '',
-            bio TEXT DEFAULT '',
-            license_info TEXT DEFAULT '',
-            qualifications_json TEXT DEFAULT '[]',
-            approaches_json TEXT DEFAULT '[]',
-            focus_areas_json TEXT DEFAULT '[]',
-            best_for TEXT DEFAULT '',
-            first_session TEXT DEFAULT '',
-            cancellation_policy TEXT DEFAULT '',
-            review_summary TEXT DEFAULT '',
-            availability_json TEXT DEFAULT '[]',
-            photo_url TEXT DEFAULT '',
-            is_verified INTEGER DEFAULT 0,
-            profile_source TEXT DEFAULT 'sample',
-            profile_status TEXT DEFAULT 'active',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    '''))
-
-    cursor.execute(fix_sql_for_db('''
-        CREATE TABLE IF NOT EXISTS therapeutic_notes (
-            id SERIAL PRIMARY KEY,
-            user_id INTEGER,
-            doctor_id INTEGER,
-            content TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    '''))
-
-    cursor.execute(fix_sql_for_db('''
-        CREATE TABLE IF NOT EXISTS therapy_bookings (
-            id SERIAL PRIMARY KEY,
-            user_id INTEGER,
-            doctor_id INTEGER NOT NULL,
-            doctor_name TEXT NOT NULL,
-            patient_name TEXT NOT NULL,
-            patient_age TEXT,
-            patient_gender TEXT,
-            patient_phone TEXT NOT NULL,
-            concern TEXT NOT NULL,
-            slot TEXT NOT NULL,
-            session_mode TEXT,
-            session_price INTEGER DEFAULT 0,
-            status TEXT DEFAULT 'new',
-            doctor_notes TEXT DEFAULT '',
-            token_id TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    '''))
-
-    cursor.execute(fix_sql_for_db('''
-        CREATE TABLE IF NOT EXISTS daily_checkins (
-            id SERIAL PRIMARY KEY,
-            user_id INTEGER NOT NULL,
-            date DATE DEFAULT CURRENT_DATE,
-            mood_tag TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    '''))
-
-    cursor.execute(fix_sql_for_db('''
-        CREATE TABLE IF NOT EXISTS community_posts (
-            id SERIAL PRIMARY KEY,
-            author_user_id INTEGER,
-            mood_tag TEXT NOT NULL,
-            content TEXT NOT NULL,
-            visibility_status TEXT DEFAULT 'visible',
-            moderation_note TEXT DEFAULT '',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    '''))
-
-    cursor.execute(fix_sql_for_db('''
-        CREATE TABLE IF NOT EXISTS community_reactions (
-            id SERIAL PRIMARY KEY,
-            post_id INTEGER NOT NULL,
-            reaction_type TEXT NOT NULL,
-            count INTEGER DEFAULT 0
-        )
-    '''))
-
-    cursor.execute(fix_sql_for_db('''
-        CREATE TABLE IF NOT EXISTS community_reports (
-            id SERIAL PRIMARY KEY,
-            post_id INTEGER NOT NULL,
-            reporter_user_id INTEGER NOT NULL,
-            reason TEXT NOT NULL,
-            details TEXT DEFAULT '',
-            status TEXT DEFAULT 'open',
-            resolution_note TEXT DEFAULT '',
-            reviewed_by_user_id INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    '''))
-
-    cursor.execute(fix_sql_for_db('''
-        CREATE TABLE IF NOT EXISTS audit_logs (
-            id SERIAL PRIMARY KEY,
-            actor_type TEXT NOT NULL,
-            actor_id INTEGER,
-            action TEXT NOT NULL,
-            entity_type TEXT,
-            entity_id INTEGER,
-            status TEXT DEFAULT 'success',
-            details_json TEXT DEFAULT '{}',
-            ip_address TEXT,
-            user_agent TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    '''))
-
-    cursor.execute(fix_sql_for_db('''
-        CREATE TABLE IF NOT EXISTS analytics (
-            id SERIAL PRIMARY KEY,
-            metric_name TEXT NOT NULL,
-            metric_value REAL NOT NULL,
-            date DATE DEFAULT CURRENT_DATE,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    '''))
-
-    # --- Performance Indexes ---
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_doctors_rating ON doctors(rating DESC);")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_bookings_user ON therapy_bookings(user_id);")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_chat_session ON chat_history(session_id);")
-
-    seed_sample_doctors(conn)
-    seed_default_admin(conn)
+# Off in deployments that seed from a release step with `python seed_db.py`.
+SEED_ON_BOOT = os.getenv("MOODMATE_SEED_ON_BOOT", "true").lower() == "true"
+
+def seed_fingerprints():
+    return {
+        "seed:doctors": fingerprint(SAMPLE_DOCTORS),
+        # Keyed so the table never holds a plain digest of the admin password.
+        "seed:admin": fingerprint(admin_credentials(), key=app.config["SECRET_KEY"]),
+    }
+
+def seed_database(conn, applied=None, force=False):
+    """Run the seed sets whose fingerprint changed since they were last applied; returns their names."""
+    applied = read_state(conn) if applied is None else applied
+    ran = []
+    for name, value in seed_fingerprints().items():
+        if not force and applied.get(name) == value:
+            continue
+        if name == "seed:doctors":
+            seed_sample_doctors(conn)
+            doctor_cache.invalidate(conn)
+        else:
+            seed_default_admin(conn)
+        record_state(conn, name, value)
+        ran.append(name)
     conn.commit()
-    conn.close()
-    safe_print(f"Database initialized on {'PostgreSQL' if IS_POSTGRES else 'SQLite'}")
+    return ran
 
-init_db()
+def init_db():
+    """Boot-time check: pending migrations, then only the seed sets whose fingerprint changed."""
+    with get_db() as conn:
+        ran = migrate(conn)
+        if SEED_ON_BOOT:
+            ran += seed_database(conn)
+    safe_print(f"Database ready on {'PostgreSQL' if IS_POSTGRES else 'SQLite'} ({'applied ' + ', '.join(ran) if ran else 'up to date'})")
+
+# Under `python app.py` a rebuilt hash pool's forkserver re-imports this file as
+# __mp_main__; that copy only needs the definitions, not a second boot.
+if __name__ != "__mp_main__":
+    password_hasher.start()  # fork the hash workers before any background thread exists
+    init_db()
+    if EMAIL_WORKER_MODE == "thread":
+        email_worker.start()  # deliver anything left queued by a previous run
+    counter_flusher.start()  # also folds in deltas a previous run committed but never flushed
+    sqlite_maintenance.start()  # no-op on PostgreSQL
 
 # ========== Auth & Decoration ==========
 def get_logged_in_user_id():
@@ -372,10 +165,7 @@ def get_logged_in_user_row():
     user_id = get_logged_in_user_id()
     if not user_id: return None
     with get_db() as conn:
-        cursor = conn.cursor()
-        placeholder = "%s" if IS_POSTGRES else "?"
-        cursor.execute(f"SELECT * FROM users WHERE id = {placeholder}", (user_id,))
-        return cursor.fetchone()
+        return USER_BY_ID.fetchone(conn, id=user_id)
 
 def login_required(f):
     @wraps(f)
@@ -397,26 +187,11 @@ def admin_required(f):
 def log_audit_event(action, status="success", actor_type="system", actor_id=None, entity_type=None, entity_id=None, details=None):
     try: meta = {"ip_address": request.headers.get("X-Forwarded-For", request.remote_addr), "user_agent": request.headers.get("User-Agent", "")[:255]}
     except RuntimeError: meta = {"ip_address": None, "user_agent": ""}
-    placeholder = "%s" if IS_POSTGRES else "?"
-    query = f"INSERT INTO audit_logs (actor_type, actor_id, action, entity_type, entity_id, status, details_json, ip_address, user_agent) VALUES ({', '.join([placeholder]*9)})"
-    try:
-        with get_db() as conn:
-            conn.cursor().execute(query, (actor_type, actor_id, action, entity_type, entity_id, status, dumps_json(details or {}), meta["ip_address"], meta["user_agent"]))
-            conn.commit()
-    except Exception as e: safe_print("Audit error:", e)
+    # Buffered and written in batches; under TESTING the row is written before returning.
+    audit_log.record((actor_type, actor_id, action, entity_type, entity_id, status, dumps_json(details or {}), meta["ip_address"], meta["user_agent"]), sync=app.testing)
 
 def detect_mood(msg):
-    if not msg: return "neutral"
-    msg_l = msg.lower()
-    keywords = {
-        "happy": ["happy", "good", "great", "awesome", "excited", "joy", "smile", "khush", "achha"],
-        "sad": ["sad", "depressed", "unhappy", "cry", "tears", "udasi", "dukhi", "lonely"],
-        "angry": ["angry", "mad", "furious", "gussa", "irritated", "hate"],
-        "anxious": ["anxious", "nervous", "worried", "stress", "tension", "chinta", "panic"],
-    }
-    for m, k in keywords.items():
-        if any(w in msg_l for w in k): return m
-    return "neutral"
+    return classify(msg).mood
 
 def serialize_booking(row):
     return {
@@ -433,28 +208,83 @@ def serialize_booking(row):
         "mode": row["session_mode"] or "Video",
         "coins": row["session_price"] or 0,
         "status": row["status"],
-        "notes": decrypt_data(row["doctor_notes"]) if row.get("doctor_notes") else "",
+        "notes": decrypt_data(row["doctor_notes"]) if row["doctor_notes"] else "",
         "created_at": str(row["created_at"]),
     }
 
 def error_response(message, status_code=400):
     return jsonify({"success": False, "message": message}), status_code
 
+@app.errorhandler(429)
+def rate_limited(exc):
+    return error_response("Too many requests. Please wait a moment and try again.", 429)
+
 # ========== Community Routes ==========
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+
+def encode_feed_cursor(created_at, post_id):
+    raw = dumps_json([str(created_at), post_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_feed_cursor(value):
+    try:
+        created_at, post_id = json.loads(base64.urlsafe_b64decode(value.encode("ascii")).decode("utf-8"))
+        return str(created_at), int(post_id)
+    except Exception:
+        return None
+
+def fetch_post_reactions(cursor, post_ids):
+    """Aggregate reactions for a whole page of posts in one grouped query."""
+    if not post_ids:
+        return {}
+    # The IN list grows with the page, so this one query cannot be declared once in queries.py.
+    cursor.execute(
+        f"SELECT post_id, reaction_type, SUM(count) AS count FROM community_reactions WHERE post_id IN ({', '.join([PLACEHOLDER]*len(post_ids))}) GROUP BY post_id, reaction_type",
+        tuple(post_ids),
+    )
+    reactions = {post_id: {} for post_id in post_ids}
+    for row in cursor.fetchall():
+        reactions[row["post_id"]][row["reaction_type"]] = row["count"]
+    return reactions
+
+def fetch_community_feed(conn, limit=FEED_PAGE_SIZE, after=None):
+    """Keyset-paginated feed ordered by (created_at, id) descending.
+
+    ``after`` is the decoded cursor of the last post on the previous page.
+    Returns the page of posts and the cursor for the next page (or None).
+    """
+    if after:
+        cursor = COMMUNITY_FEED_AFTER.execute(conn, created_at=after[0], id=after[1], limit=limit + 1)
+    else:
+        cursor = COMMUNITY_FEED.execute(conn, limit=limit + 1)
+    posts = [dict(row) for row in cursor.fetchall()]
+    has_more = len(posts) > limit
+    posts = posts[:limit]
+
+    reactions = fetch_post_reactions(cursor, [post["id"] for post in posts])
+    for post in posts:
+        post["reactions"] = reactions.get(post["id"], {})
+
+    next_cursor = encode_feed_cursor(posts[-1]["created_at"], posts[-1]["id"]) if has_more else None
+    return posts, next_cursor
+
 @app.route('/api/community/posts', methods=['GET'])
 def list_community_posts():
+    try:
+        limit = min(max(int(request.args.get('limit', FEED_PAGE_SIZE)), 1), FEED_MAX_PAGE_SIZE)
+    except ValueError:
+        return error_response("limit must be a number.")
+
+    after = None
+    if request.args.get('cursor'):
+        after = decode_feed_cursor(request.args['cursor'])
+        if not after:
+            return error_response("Invalid feed cursor.")
+
     with get_db() as conn:
-        cursor = conn.cursor()
-        rows = cursor.execute("SELECT * FROM community_posts WHERE visibility_status = 'visible' ORDER BY created_at DESC").fetchall()
-        posts = [dict(row) for row in rows]
-        
-        # Fetch reactions
-        for post in posts:
-            cursor.execute("SELECT reaction_type, count FROM community_reactions WHERE post_id = ?", (post['id'],))
-            re_rows = cursor.fetchall()
-            post['reactions'] = {r['reaction_type']: r['count'] for r in re_rows}
-            
-    return jsonify({"success": True, "posts": posts})
+        posts, next_cursor = fetch_community_feed(conn, limit, after)
+    return jsonify({"success": True, "posts": posts, "next_cursor": next_cursor})
 
 @app.route('/api/community/posts', methods=['POST'])
 @login_required
@@ -466,8 +296,7 @@ def create_community_post():
     
     # 2. AI MODERATION LAYER
     # Simple keyword-based toxicity for demo, would use LLM in real prod
-    toxic_keywords = ["hate", "kill", "idiot", "stupid"]
-    is_toxic = any(k in content.lower() for k in toxic_keywords)
+    is_toxic = classify(content).toxic
     
     visibility = "visible"
     mod_note = ""
@@ -476,12 +305,7 @@ def create_community_post():
         mod_note = "Auto-hidden by AI moderation for community safety."
         
     with get_db() as conn:
-        cursor = conn.cursor()
-        placeholder = "%s" if IS_POSTGRES else "?"
-        cursor.execute(
-            f"INSERT INTO community_posts (author_user_id, mood_tag, content, visibility_status, moderation_note) VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder}, {placeholder})",
-            (user_id, mood_tag, content, visibility, mod_note)
-        )
+        INSERT_COMMUNITY_POST.execute(conn, user_id=user_id, mood_tag=mood_tag, content=content, visibility=visibility, moderation_note=mod_note)
         conn.commit()
         
     if is_toxic:
@@ -489,28 +313,55 @@ def create_community_post():
         
     return jsonify({"success": True, "message": "Post shared!"})
 
-# ========== Caching ==========
-_DOCTOR_CACHE = {"data": None, "expiry": 0}
-CACHE_TTL = 300 # 5 minutes
-
-def get_cached_doctors():
-    global _DOCTOR_CACHE
-    if _DOCTOR_CACHE["data"] and time.time() < _DOCTOR_CACHE["expiry"]:
-        return _DOCTOR_CACHE["data"]
-    
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM doctors WHERE profile_status = 'active' ORDER BY rating DESC")
-        rows = cursor.fetchall()
-        doctors = [dict(r) for r in rows]
-        _DOCTOR_CACHE = {"data": doctors, "expiry": time.time() + CACHE_TTL}
-        return doctors
-
 # ========== API Routes ==========
 @app.route('/api/doctors', methods=['GET'])
 def list_doctors():
-    doctors = get_cached_doctors()
-    return jsonify({"success": True, "doctors": doctors})
+    entry = doctor_cache.get()
+    response = app.response_class(entry.body, mimetype="application/json")
+    response.set_etag(entry.etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+DOCTOR_SEARCH_PAGE_SIZE = 20
+DOCTOR_SEARCH_MAX_PAGE_SIZE = 100
+
+def query_list(name):
+    """Accept both ?language=Hindi&language=English and ?language=Hindi,English."""
+    return [value.strip() for raw in request.args.getlist(name) for value in raw.split(",") if value.strip()]
+
+@app.route('/api/doctors/search', methods=['GET'])
+def search_doctor_directory():
+    args = request.args
+    sort = args.get('sort', 'rating')
+    if sort not in SEARCH_SORTS:
+        return error_response(f"sort must be one of: {', '.join(SEARCH_SORTS)}.")
+    try:
+        min_price = int(args['min_price']) if args.get('min_price') else None
+        max_price = int(args['max_price']) if args.get('max_price') else None
+        min_rating = float(args['min_rating']) if args.get('min_rating') else None
+        page = max(int(args.get('page', 1)), 1)
+        limit = min(max(int(args.get('limit', DOCTOR_SEARCH_PAGE_SIZE)), 1), DOCTOR_SEARCH_MAX_PAGE_SIZE)
+    except ValueError:
+        return error_response("Price, rating, page and limit filters must be numbers.")
+
+    total, matches = search_doctors(
+        languages=query_list('language'),
+        modes=query_list('mode'),
+        focus_areas=query_list('focus_area'),
+        min_price=min_price,
+        max_price=max_price,
+        min_rating=min_rating,
+        sort=sort,
+        offset=(page - 1) * limit,
+        limit=limit,
+    )
+    return jsonify({
+        "success": True,
+        "doctors": [record.to_dict() for record in matches],
+        "total": total,
+        "page": page,
+        "limit": limit,
+    })
 
 @app.route('/api/therapy/bookings', methods=['GET', 'POST'])
 @login_required
@@ -519,91 +370,226 @@ def therapy_bookings():
     if request.method == 'POST':
         data = request.json
         with get_db() as conn:
-            cursor = conn.cursor()
-            placeholder = "%s" if IS_POSTGRES else "?"
-            cursor.execute(f"INSERT INTO therapy_bookings (user_id, doctor_id, doctor_name, patient_name, patient_phone, concern, slot, session_mode, session_price, status) VALUES ({', '.join([placeholder]*10)})",
-                           (user_id, data['doctor_id'], data['doctor_name'], data['name'], data['phone'], data['reason'], data['time'], data.get('mode', 'Video'), 0, 'new'))
+            INSERT_BOOKING.execute(conn, user_id=user_id, doctor_id=data['doctor_id'], doctor_name=data['doctor_name'],
+                                   patient_name=data['name'], patient_phone=data['phone'], concern=data['reason'],
+                                   slot=data['time'], session_mode=data.get('mode', 'Video'))
             
-            # Fetch user email for confirmation
-            cursor.execute(f"SELECT email FROM users WHERE id = {placeholder}", (user_id,))
-            user_row = cursor.fetchone()
+            # Queue the confirmation in the same transaction; the outbox worker delivers it
+            user_row = USER_EMAIL.fetchone(conn, id=user_id)
+            queued = bool(user_row and user_row['email'])
+            if queued:
+                email_service.queue_booking_confirmation(conn, user_row['email'], data['doctor_name'], data['time'])
             conn.commit()
+        email_worker.notify()
 
-            if user_row and user_row['email']:
-                email_service.send_booking_confirmation(
-                    user_row['email'], 
-                    data['doctor_name'], 
-                    data['time']
-                )
-
-        return jsonify({"success": True, "message": "Booked! Confirmation email sent."})
+        message = "Booked! A confirmation email is on its way." if queued else "Booked!"
+        return jsonify({"success": True, "message": message})
     
     with get_db() as conn:
-        cursor = conn.cursor()
-        placeholder = "%s" if IS_POSTGRES else "?"
-        rows = cursor.execute(f"SELECT * FROM therapy_bookings WHERE user_id = {placeholder} ORDER BY created_at DESC", (user_id,)).fetchall()
+        rows = BOOKINGS_FOR_USER.execute(conn, user_id=user_id).fetchall()
     return jsonify({"success": True, "bookings": [serialize_booking(r) for r in rows]})
 
+CRISIS_REPLY = (
+    "I'm very glad you're reaching out, but I'm an AI and not a crisis service. "
+    "Please reach out to someone who can help right now. "
+    "In India, you can call AASRA at +91-9820466726 or the KIRAN helpline at 1800-599-0019. "
+    "You are not alone."
+)
+CHAT_COINS = 5
+CHAT_ERROR_MESSAGE = "Could not reply right now. Please try again in a moment."
+
 def is_crisis_msg(msg):
-    crisis_keywords = ["suicide", "kill myself", "end it all", "end my life", "suicidal", "want to die", "marna chahta"]
-    return any(k in msg.lower() for k in crisis_keywords)
+    return classify(msg).crisis
+
+def crisis_payload():
+    return {
+        "status": "crisis",
+        "reply": CRISIS_REPLY,
+        "mood": "crisis",
+        "emergency": True
+    }
+
+def persist_chat_exchange(session_id, user_id, msg, mood, reply_text, owner_id=None):
+    """Save both messages; ``owner_id`` is the signed-in user, the only one who will get them back as context."""
+    with get_db() as conn:
+        INSERT_CHAT_MESSAGE.execute(conn, session_id=session_id, user_id=owner_id, role="user", content=encrypt_data(msg), mood=mood)
+        INSERT_CHAT_MESSAGE.execute(conn, session_id=session_id, user_id=owner_id, role="ai", content=encrypt_data(reply_text), mood=None)
+        # Committed with the messages; counter_flusher folds it into users.coins in batches.
+        record_delta(conn, user_id, "coins", CHAT_COINS)
+        conn.commit()
+    schedule_summary_refresh(session_id, owner_id)
+
+def load_chat_context(session_id, owner_id):
+    with get_db() as conn:
+        return load_conversation(conn, session_id, owner_id)
 
 @app.route('/api/chat', methods=['POST'])
+@chat_limit
 def chat():
     data = request.json
     msg = data.get('message', '')
     user_id = data.get('user_id', 1)
     session_id = data.get('session_id', 'default')
     
+    signals = classify(msg)
     # 1. HARD SAFETY OVERRIDE
-    if is_crisis_msg(msg):
+    if signals.crisis:
         log_audit_event("crisis_msg_detected", actor_type="user", actor_id=user_id, status="caution", details={"msg_hint": msg[:20]})
-        reply_text = (
-            "I'm very glad you're reaching out, but I'm an AI and not a crisis service. "
-            "Please reach out to someone who can help right now. "
-            "In India, you can call AASRA at +91-9820466726 or the KIRAN helpline at 1800-599-0019. "
-            "You are not alone."
-        )
-        return jsonify({
-            "status": "crisis",
-            "reply": reply_text,
-            "mood": "crisis",
-            "emergency": True
-        })
-
-    mood = detect_mood(msg)
-    reply_obj = generate_ai_response(msg, [])
-    reply_text = reply_obj["text"]
-    
-    with get_db() as conn:
-        cursor = conn.cursor()
-        placeholder = "%s" if IS_POSTGRES else "?"
-        cursor.execute(f"INSERT INTO chat_history (session_id, role, content, mood_detected) VALUES ({placeholder}, 'user', {placeholder}, {placeholder})", (session_id, encrypt_data(msg), mood))
-        cursor.execute(f"INSERT INTO chat_history (session_id, role, content) VALUES ({placeholder}, 'ai', {placeholder})", (session_id, encrypt_data(reply_text)))
-        cursor.execute(f"UPDATE users SET coins = coins + 5 WHERE id = {placeholder}", (user_id,))
-        conn.commit()
-        
+        return jsonify(crisis_payload())
+
+    mood = signals.mood
+    owner_id = get_logged_in_user_id()
+    try:
+        reply_obj = generate_ai_response(msg, load_chat_context(session_id, owner_id), mood=mood)
+        reply_text = reply_obj["text"]
+        persist_chat_exchange(session_id, user_id, msg, mood, reply_text, owner_id)
+    except Exception as e:
+        safe_print("Chat error:", e)
+        return error_response(CHAT_ERROR_MESSAGE, 500)
+
     return jsonify({
         "status": "success",
         "reply": reply_text,
         "mood": mood,
-        "coinsEarned": 5
+        "coinsEarned": CHAT_COINS
+    })
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/chat/stream', methods=['POST'])
+@chat_limit
+def chat_stream():
+    """Server-Sent Events variant of /api/chat.
+
+    Emits ``meta`` (detected mood), then one ``token`` event per provider chunk,
+    then ``done`` with the same payload /api/chat returns. The full reply is
+    encrypted and saved once the stream ends, even if the client disconnects.
+    """
+    data = request.json or {}
+    msg = data.get('message', '')
+    user_id = data.get('user_id', 1)
+    session_id = data.get('session_id', 'default')
+
+    signals = classify(msg)
+    if signals.crisis:
+        log_audit_event("crisis_msg_detected", actor_type="user", actor_id=user_id, status="caution", details={"msg_hint": msg[:20]})
+        events = iter([sse_event("done", crisis_payload())])
+    else:
+        events = stream_chat_events(msg, user_id, session_id, signals.mood, get_logged_in_user_id())
+
+    return Response(stream_with_context(events), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+def stream_chat_events(msg, user_id, session_id, mood, owner_id=None):
+    yield sse_event("meta", {"mood": mood})
+    parts = []
+    source = None
+    try:
+        for source, token in stream_ai_response(msg, load_chat_context(session_id, owner_id), mood=mood):
+            parts.append(token)
+            yield sse_event("token", {"text": token})
+    finally:
+        reply_text = "".join(parts)
+        if reply_text:
+            persist_chat_exchange(session_id, user_id, msg, mood, reply_text, owner_id)
+    yield sse_event("done", {
+        "status": "success",
+        "reply": reply_text,
+        "mood": mood,
+        "coinsEarned": CHAT_COINS,
+        "source": source
     })
 
+# ========== Text to Speech ==========
+def tts_options(data):
+    """(text, voice, lang) from a request body, or an error response."""
+    text = str(data.get("text") or "").strip()
+    voice = data.get("voice") or TTS_DEFAULT_VOICE
+    lang = data.get("lang") or TTS_DEFAULT_LANG
+    if not text:
+        return None, error_response("Text is required.")
+    if len(text) > TTS_MAX_CHARS:
+        return None, error_response("Text is too long to read aloud.", 413)
+    if voice not in TTS_VOICES or not LANG_PATTERN.match(str(lang)):
+        return None, error_response("Unsupported voice or language.")
+    return (text, voice, lang), None
+
+@app.route('/api/tts', methods=['POST'])
+@login_required
+@tts_limit
+def text_to_speech():
+    options, error = tts_options(request.json or {})
+    if error:
+        return error
+    try:
+        key, created = audio_cache.get_or_create(*options)
+    except Exception as e:
+        safe_print("TTS error:", e)
+        return error_response("Could not generate audio right now.", 502)
+    return jsonify({"success": True, "audioUrl": f"/api/tts/audio/{key}.mp3", "cached": not created})
+
+@app.route('/api/tts/stream', methods=['POST'])
+@login_required
+@tts_limit
+def text_to_speech_stream():
+    """Chunked ``audio/mpeg`` for a reply, sentence by sentence, so playback starts after the first one.
+
+    The assembled file lands in the audio cache, and ``X-Audio-Url`` names
+    where it can be replayed; text that is already cached is served from disk.
+    """
+    options, error = tts_options(request.json or {})
+    if error:
+        return error
+    key = audio_key(*options)
+    headers = {"X-Audio-Url": f"/api/tts/audio/{key}.mp3", "Access-Control-Expose-Headers": "X-Audio-Url"}
+    if audio_cache.lookup(key):
+        response = tts_audio(key)
+        response.headers.update(headers)
+        return response
+
+    chunks = audio_cache.stream(*options)
+    try:
+        first = next(chunks)  # surface a synthesis failure as a 502 before any audio is sent
+    except Exception as e:
+        chunks.close()
+        safe_print("TTS error:", e)
+        return error_response("Could not generate audio right now.", 502)
+
+    def body():
+        yield first
+        try:
+            yield from chunks
+        except Exception as e:
+            safe_print("TTS stream error:", e)
+
+    return Response(body(), mimetype="audio/mpeg", headers=dict(headers, **{"Cache-Control": "no-store", "X-Accel-Buffering": "no"}))
+
+@app.route('/api/tts/audio/<key>.mp3', methods=['GET'])
+def tts_audio(key):
+    path = audio_cache.lookup(key)
+    if not path:
+        return error_response("Audio not found.", 404)
+    # conditional=True answers Range and If-None-Match requests with 206 / 304.
+    response = send_file(path, mimetype="audio/mpeg", conditional=True, etag=key)
+    response.headers["Cache-Control"] = AUDIO_CACHE_CONTROL
+    return response
+
 @app.route('/api/user/export-data', methods=['GET'])
 @login_required
 def export_user_data():
     user_id = get_logged_in_user_id()
     with get_db() as conn:
-        cursor = conn.cursor()
-        placeholder = "%s" if IS_POSTGRES else "?"
-        user = cursor.execute(f"SELECT username, email, coins, streak FROM users WHERE id = {placeholder}", (user_id,)).fetchone()
-        bookings = cursor.execute(f"SELECT * FROM therapy_bookings WHERE user_id = {placeholder}", (user_id,)).fetchall()
+        user = USER_EXPORT_PROFILE.fetchone(conn, id=user_id)
+        bookings = BOOKINGS_FOR_USER.execute(conn, user_id=user_id).fetchall()
+        profile = with_pending(conn, user_id, user)
         
     return jsonify({
         "success": True,
         "data": {
-            "profile": dict(user),
+            "profile": profile,
             "bookings": [serialize_booking(b) for b in bookings],
             "exported_at": datetime.now().isoformat()
         }
@@ -614,11 +600,8 @@ def export_user_data():
 def delete_user_account():
     user_id = get_logged_in_user_id()
     with get_db() as conn:
-        cursor = conn.cursor()
-        placeholder = "%s" if IS_POSTGRES else "?"
-        cursor.execute(f"DELETE FROM therapy_bookings WHERE user_id = {placeholder}", (user_id,))
-        cursor.execute(f"DELETE FROM daily_checkins WHERE user_id = {placeholder}", (user_id,))
-        cursor.execute(f"DELETE FROM users WHERE id = {placeholder}", (user_id,))
+        for statement in (DELETE_USER_BOOKINGS, DELETE_USER_CHECKINS, DELETE_USER_COUNTER_DELTAS, DELETE_USER):
+            statement.execute(conn, user_id=user_id)
         conn.commit()
     session.clear()
     return jsonify({"success": True, "message": "Deleted."})
@@ -632,6 +615,8 @@ def buy_premium():
     # Production Bridge: Real Stripe Session vs Local Upgrade
     if os.getenv("STRIPE_API_KEY") and not os.getenv("STRIPE_API_KEY").startswith("sk_test_sim"):
         try:
+            import stripe  # only real checkouts need the SDK; it is slow to import
+            stripe.api_key = os.getenv("STRIPE_API_KEY")
             price_id = os.getenv(f"STRIPE_PRICE_{plan.upper()}")
             checkout_session = stripe.checkout.Session.create(
                 payment_method_types=['card'],
@@ -647,9 +632,7 @@ def buy_premium():
     
     # Simulation Mode
     with get_db() as conn:
-        cursor = conn.cursor()
-        placeholder = "%s" if IS_POSTGRES else "?"
-        cursor.execute(f"UPDATE users SET premium_plan = {placeholder}, role = 'premium' WHERE id = {placeholder}", (plan, user_id))
+        SET_PREMIUM_PLAN.execute(conn, plan=plan, id=user_id)
         conn.commit()
     return jsonify({"success": True, "message": "Upgraded (Simulated)"})
 
@@ -661,25 +644,36 @@ def admin_verify_doctor(doctor_id):
     is_verified = 1 if status == 'active' else 0
     
     with get_db() as conn:
-        cursor = conn.cursor()
-        placeholder = "%s" if IS_POSTGRES else "?"
-        cursor.execute(
-            f"UPDATE doctors SET is_verified = {placeholder}, profile_status = {placeholder}, updated_at = CURRENT_TIMESTAMP WHERE id = {placeholder}",
-            (is_verified, status, doctor_id)
-        )
+        SET_DOCTOR_STATUS.execute(conn, is_verified=is_verified, status=status, id=doctor_id)
+        doctor_cache.invalidate(conn)
         conn.commit()
     
     log_audit_event("doctor_verification_updated", actor_type="admin", actor_id=get_logged_in_user_id(), entity_type="doctor", entity_id=doctor_id, details={"status": status})
     return jsonify({"success": True, "message": f"Doctor status updated to {status}"})
 
+@app.route('/api/admin/metrics', methods=['GET'])
+@admin_required
+def admin_metrics():
+    return jsonify({"success": True, "metrics": {
+        "db_pool": db_pool.stats(),
+        "sqlite": None if IS_POSTGRES else sqlite_maintenance.stats(),
+        "ai_providers": provider_health(),
+        "ai_response_cache": response_cache.stats(),
+        "email": email_worker.stats(),
+        "audit_log": audit_log.stats(),
+        "password_hashing": password_hasher.stats(),
+        "tts_cache": audio_cache.stats(),
+        "user_counters": counter_flusher.stats(),
+    }})
+
 @app.route('/api/user/status', methods=['GET'])
 @login_required
 def get_user_status():
     user_id = get_logged_in_user_id()
     with get_db() as conn:
-        cursor = conn.cursor()
-        placeholder = "%s" if IS_POSTGRES else "?"
-        user = cursor.execute(f"SELECT * FROM users WHERE id = {placeholder}", (user_id,)).fetchone()
+        user = USER_BY_ID.fetchone(conn, id=user_id)
+        # Counters read through to deltas the flusher has not applied yet.
+        user = with_pending(conn, user_id, user) if user else None
     if not user: return jsonify({"streak": 0, "coins": 0})
     return jsonify({
         "streak": user["streak"] or 0,
@@ -0,0 +1,147 @@
+"""ASGI entry point.
+
+``POST /api/chat`` runs on the event loop with async provider clients, so a
+worker waiting on an LLM holds a coroutine instead of a thread. Every other
+route is served by the Flask app through a WSGI bridge thread pool.
+
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT
+"""
+import asyncio
+import json
+import os
+from http.cookies import CookieError, SimpleCookie
+
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+
+import app as flask_module
+from services.ai_async import generate_ai_response_async, warm_provider_clients
+from services.rate_limiting import hit_chat_limit, retry_after
+from services.text_classifier import classify
+
+WSGI_THREADS = int(os.getenv("MOODMATE_WSGI_THREADS", "10"))
+MAX_CHAT_BODY = 64 * 1024
+
+flask_app = WSGIMiddleware(flask_module.app, workers=WSGI_THREADS)
+
+
+async def read_body(receive, limit=MAX_CHAT_BODY):
+    """Return the request body, or ``None`` once it grows past ``limit`` bytes."""
+    body = bytearray()
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > limit:
+            return None
+        if not message.get("more_body"):
+            return bytes(body)
+
+
+def cors_headers(scope):
+    """Mirror the Flask-CORS policy for responses that never reach Flask."""
+    origin = dict(scope["headers"]).get(b"origin", b"").decode("latin-1")
+    if origin not in flask_module.CORS_ORIGINS:
+        return []
+    return [
+        (b"access-control-allow-origin", origin.encode("latin-1")),
+        (b"access-control-allow-credentials", b"true"),
+        (b"vary", b"Origin"),
+    ]
+
+
+def session_user_id(scope):
+    """The signed-in user of the Flask session cookie on this request, or ``None``."""
+    cookies = SimpleCookie()
+    try:
+        cookies.load(dict(scope["headers"]).get(b"cookie", b"").decode("latin-1"))
+    except CookieError:
+        return None
+    morsel = cookies.get(flask_module.app.config["SESSION_COOKIE_NAME"])
+    serializer = flask_module.app.session_interface.get_signing_serializer(flask_module.app)
+    if morsel is None or serializer is None:
+        return None
+    try:
+        data = serializer.loads(morsel.value, max_age=int(flask_module.app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return None
+    return data.get("user_id")
+
+
+async def send_json(scope, send, payload, status=200, headers=()):
+    body = json.dumps(payload).encode("utf-8")
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *headers]
+    await send({"type": "http.response.start", "status": status, "headers": headers + cors_headers(scope)})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def chat(scope, receive, send):
+    # Flask-Limiter never sees this route. The store can wait up to its busy timeout, so check off the loop.
+    client = (scope.get("client") or ("",))[0]
+    if not await asyncio.to_thread(hit_chat_limit, client):
+        wait = await asyncio.to_thread(retry_after, client)
+        return await send_json(
+            scope, send, {"success": False, "message": "Too many requests. Please wait a moment and try again."},
+            status=429, headers=[(b"retry-after", str(wait).encode())],
+        )
+    body = await read_body(receive)
+    if body is None:
+        return await send_json(scope, send, {"error": "Message too large"}, status=413)
+    try:
+        data = json.loads(body or b"null")
+    except ValueError:
+        return await send_json(scope, send, {"error": "Invalid JSON body"}, status=400)
+    if not isinstance(data, dict):
+        return await send_json(scope, send, {"error": "Invalid JSON body"}, status=400)
+
+    msg = data.get('message', '')
+    user_id = data.get('user_id', 1)
+    session_id = data.get('session_id', 'default')
+
+    signals = classify(msg)
+    if signals.crisis:
+        await asyncio.to_thread(
+            flask_module.log_audit_event, "crisis_msg_detected", actor_type="user", actor_id=user_id,
+            status="caution", details={"msg_hint": msg[:20]},
+        )
+        return await send_json(scope, send, flask_module.crisis_payload())
+
+    mood = signals.mood
+    owner_id = session_user_id(scope)
+    try:
+        history = await asyncio.to_thread(flask_module.load_chat_context, session_id, owner_id)
+        reply_obj = await generate_ai_response_async(msg, history, mood=mood)
+        reply_text = reply_obj["text"]
+        await asyncio.to_thread(flask_module.persist_chat_exchange, session_id, user_id, msg, mood, reply_text, owner_id)
+    except Exception as e:
+        flask_module.safe_print("Chat error:", e)
+        return await send_json(scope, send, {"success": False, "message": flask_module.CHAT_ERROR_MESSAGE}, status=500)
+
+    await send_json(scope, send, {
+        "status": "success",
+        "reply": reply_text,
+        "mood": mood,
+        "coinsEarned": flask_module.CHAT_COINS
+    })
+
+
+ASYNC_ROUTES = {
+    ("POST", "/api/chat"): chat,
+}
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "http":
+        handler = ASYNC_ROUTES.get((scope["method"], scope["path"]))
+        if handler:
+            return await handler(scope, receive, send)
+    elif scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Import the provider SDKs before the first chat, and off the loop.
+                await asyncio.to_thread(warm_provider_clients)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    await flask_app(scope, receive, send)
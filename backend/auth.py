@@ -1,64 +1,61 @@
-from contextlib import contextmanager
 from datetime import datetime, timedelta
 import json
 import os
 import random
-import sqlite3
 import traceback
 
-import bcrypt
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, current_app, jsonify, request, session
 from werkzeug.security import check_password_hash
 
+from database import IS_POSTGRES, get_db
+from queries import EMAIL_TAKEN, INSERT_USER, PHONE_TAKEN, USER_BY_LOGIN, USER_ID_BY_LOGIN, USERNAME_TAKEN
+from services.audit_log import audit_log
+from services.doctor_directory import DoctorRecord, get_doctor
+from services.password_hashing import PasswordHasherBusy, password_hasher
+from services.rate_limiting import RATELIMIT_FORGOT, RATELIMIT_LOGIN, limiter
+
 auth_bp = Blueprint("auth", __name__)
-DB_PATH = os.environ.get("MOODMATE_DB_PATH") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "moodmate.db")
+PLACEHOLDER = "%s" if IS_POSTGRES else "?"
 
 
-@contextmanager
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    try:
-        yield conn
-    finally:
-        conn.close()
+def fetch_one(conn, query, params=()):
+    cursor = conn.cursor()
+    cursor.execute(query.replace("?", PLACEHOLDER), params)
+    return cursor.fetchone()
+
+
+def execute(conn, query, params=()):
+    cursor = conn.cursor()
+    cursor.execute(query.replace("?", PLACEHOLDER), params)
+    return cursor
 
 
 def generate_otp():
     return f"{random.randint(0, 999999):06d}"
 
 
+def hasher_busy_response():
+    response = jsonify({"success": False, "message": "We're handling a lot of sign-ins right now. Please try again in a moment."})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
 def log_audit_event(action, status="success", actor_type="system", actor_id=None, entity_type=None, entity_id=None, details=None):
     try:
-        with get_db() as conn:
-            conn.execute(
-                """
-                INSERT INTO audit_logs (
-                    actor_type,
-                    actor_id,
-                    action,
-                    entity_type,
-                    entity_id,
-                    status,
-                    details_json,
-                    ip_address,
-                    user_agent
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    actor_type,
-                    actor_id,
-                    action,
-                    entity_type,
-                    entity_id,
-                    status,
-                    json.dumps(details or {}),
-                    request.headers.get("X-Forwarded-For", request.remote_addr),
-                    (request.headers.get("User-Agent") or "")[:255],
-                ),
-            )
-            conn.commit()
+        audit_log.record(
+            (
+                actor_type,
+                actor_id,
+                action,
+                entity_type,
+                entity_id,
+                status,
+                json.dumps(details or {}),
+                request.headers.get("X-Forwarded-For", request.remote_addr),
+                (request.headers.get("User-Agent") or "")[:255],
+            ),
+            sync=current_app.testing,
+        )
     except Exception:
         traceback.print_exc()
 
@@ -78,38 +75,37 @@ def signup():
 
     try:
         with get_db() as conn:
-            if conn.execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone():
+            if USERNAME_TAKEN.fetchone(conn, username=username):
                 log_audit_event("signup_rejected", status="failed", actor_type="guest", details={"reason": "duplicate_username", "username": username})
                 return jsonify({"success": False, "message": "Username already taken."}), 409
 
-            if conn.execute("SELECT 1 FROM users WHERE email = ?", (email,)).fetchone():
+            if EMAIL_TAKEN.fetchone(conn, email=email):
                 log_audit_event("signup_rejected", status="failed", actor_type="guest", details={"reason": "duplicate_email", "email": email})
                 return jsonify({"success": False, "message": "Email already registered."}), 409
 
-            if conn.execute("SELECT 1 FROM users WHERE phone = ?", (phone,)).fetchone():
+            if PHONE_TAKEN.fetchone(conn, phone=phone):
                 log_audit_event("signup_rejected", status="failed", actor_type="guest", details={"reason": "duplicate_phone"})
                 return jsonify({"success": False, "message": "Phone number already registered."}), 409
 
-            hashed_pw = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+            hashed_pw = password_hasher.hash(password)
             premium_plan = "annual" if promo_code == "BETA2026" else "free"
-            cursor = conn.execute(
-                """
-                INSERT INTO users (username, email, phone, password_hash, premium_plan)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (username, email, phone, hashed_pw, premium_plan),
+            cursor = INSERT_USER.execute(
+                conn, username=username, email=email, phone=phone, password_hash=hashed_pw, premium_plan=premium_plan,
             )
+            user_id = cursor.fetchone()["id"] if IS_POSTGRES else cursor.lastrowid
             conn.commit()
-            user_id = cursor.lastrowid
 
         log_audit_event("signup_completed", actor_type="user", actor_id=user_id, entity_type="user", entity_id=user_id)
         return jsonify({"success": True, "message": "Signup successful. Please login."}), 201
+    except PasswordHasherBusy:
+        return hasher_busy_response()
     except Exception as exc:
         traceback.print_exc()
         return jsonify({"success": False, "message": f"Server error during signup: {exc}"}), 500
 
 
 @auth_bp.route("/login", methods=["POST"])
+@limiter.limit(RATELIMIT_LOGIN)
 def login():
     try:
         data = request.json or {}
@@ -120,32 +116,27 @@ def login():
             return jsonify({"success": False, "message": "Login ID and password are required."}), 400
 
         with get_db() as conn:
-            user_row = conn.execute(
-                "SELECT * FROM users WHERE email = ? OR phone = ?",
-                (login_id, login_id),
-            ).fetchone()
+            user_row = USER_BY_LOGIN.fetchone(conn, login=login_id)
 
         if not user_row:
             log_audit_event("login_failed", status="failed", actor_type="guest", details={"login_id": login_id, "reason": "account_not_found"})
             return jsonify({"success": False, "message": "No account found. Please sign up."}), 404
 
         stored_hash = user_row["password_hash"]
-        if isinstance(stored_hash, bytes):
-            hash_bytes = stored_hash
-        elif isinstance(stored_hash, str) and stored_hash.startswith("b'"):
-            hash_bytes = stored_hash[2:-1].encode("utf-8")
-        else:
-            hash_bytes = str(stored_hash).encode("utf-8")
-
-        try:
-            password_ok = bcrypt.checkpw(password.encode("utf-8"), hash_bytes)
-        except Exception:
-            password_ok = False
-
-        if not password_ok:
+        if not password_hasher.verify(password, stored_hash):
             log_audit_event("login_failed", status="failed", actor_type="user", actor_id=user_row["id"], entity_type="user", entity_id=user_row["id"], details={"reason": "invalid_password"})
             return jsonify({"success": False, "message": "Invalid password."}), 401
 
+        if password_hasher.needs_rehash(stored_hash):
+            # Bring the hash up to the configured cost while we have the plaintext.
+            try:
+                new_hash = password_hasher.rehash(password)
+                with get_db() as conn:
+                    execute(conn, "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?", (new_hash, user_row["id"], stored_hash))
+                    conn.commit()
+            except PasswordHasherBusy:
+                pass  # keep the old hash; the next login tries again
+
         session["user_id"] = user_row["id"]
         session.pop("doctor_id", None)
 
@@ -155,6 +146,8 @@ def login():
         log_audit_event("login_completed", actor_type="user", actor_id=user_row["id"], entity_type="user", entity_id=user_row["id"])
 
         return jsonify({"success": True, "message": f"Welcome back, {user_data['username']}!", "user": user_data})
+    except PasswordHasherBusy:
+        return hasher_busy_response()
     except Exception:
         traceback.print_exc()
         return jsonify({"success": False, "message": "Server error during login."}), 500
@@ -172,6 +165,7 @@ def logout():
 
 
 @auth_bp.route("/forgot", methods=["POST"])
+@limiter.limit(RATELIMIT_FORGOT)
 def forgot_password():
     try:
         data = request.json or {}
@@ -181,10 +175,7 @@ def forgot_password():
             return jsonify({"success": False, "message": "Enter your email or phone first."}), 400
 
         with get_db() as conn:
-            user_row = conn.execute(
-                "SELECT id FROM users WHERE email = ? OR phone = ?",
-                (login_id, login_id),
-            ).fetchone()
+            user_row = USER_ID_BY_LOGIN.fetchone(conn, login=login_id)
 
             if not user_row:
                 log_audit_event("password_reset_request_failed", status="failed", actor_type="guest", details={"login_id": login_id, "reason": "account_not_found"})
@@ -193,8 +184,9 @@ def forgot_password():
             otp = generate_otp()
             expires_at = (datetime.utcnow() + timedelta(minutes=10)).isoformat()
 
-            conn.execute("DELETE FROM password_reset_otps WHERE user_id = ?", (user_row["id"],))
-            conn.execute(
+            execute(conn, "DELETE FROM password_reset_otps WHERE user_id = ?", (user_row["id"],))
+            execute(
+                conn,
                 """
                 INSERT INTO password_reset_otps (user_id, otp_code, expires_at)
                 VALUES (?, ?, ?)
@@ -227,16 +219,14 @@ def reset_password():
             return jsonify({"success": False, "message": "Email/phone, OTP, and new password are required."}), 400
 
         with get_db() as conn:
-            user_row = conn.execute(
-                "SELECT id FROM users WHERE email = ? OR phone = ?",
-                (login_id, login_id),
-            ).fetchone()
+            user_row = USER_ID_BY_LOGIN.fetchone(conn, login=login_id)
 
             if not user_row:
                 log_audit_event("password_reset_failed", status="failed", actor_type="guest", details={"login_id": login_id, "reason": "account_not_found"})
                 return jsonify({"success": False, "message": "No account found for that email or phone."}), 404
 
-            otp_row = conn.execute(
+            otp_row = fetch_one(
+                conn,
                 """
                 SELECT id, otp_code, expires_at
                 FROM password_reset_otps
@@ -245,7 +235,7 @@ def reset_password():
                 LIMIT 1
                 """,
                 (user_row["id"],),
-            ).fetchone()
+            )
 
             if not otp_row:
                 log_audit_event("password_reset_failed", status="failed", actor_type="user", actor_id=user_row["id"], entity_type="user", entity_id=user_row["id"], details={"reason": "otp_missing"})
@@ -257,18 +247,20 @@ def reset_password():
 
             expires_at = datetime.fromisoformat(otp_row["expires_at"])
             if expires_at < datetime.utcnow():
-                conn.execute("DELETE FROM password_reset_otps WHERE id = ?", (otp_row["id"],))
+                execute(conn, "DELETE FROM password_reset_otps WHERE id = ?", (otp_row["id"],))
                 conn.commit()
                 log_audit_event("password_reset_failed", status="failed", actor_type="user", actor_id=user_row["id"], entity_type="user", entity_id=user_row["id"], details={"reason": "otp_expired"})
                 return jsonify({"success": False, "message": "This OTP has expired. Please request a new one."}), 400
 
-            hashed_pw = bcrypt.hashpw(new_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-            conn.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hashed_pw, user_row["id"]))
-            conn.execute("DELETE FROM password_reset_otps WHERE user_id = ?", (user_row["id"],))
+            hashed_pw = password_hasher.hash(new_password)
+            execute(conn, "UPDATE users SET password_hash = ? WHERE id = ?", (hashed_pw, user_row["id"]))
+            execute(conn, "DELETE FROM password_reset_otps WHERE user_id = ?", (user_row["id"],))
             conn.commit()
 
         log_audit_event("password_reset_completed", actor_type="user", actor_id=user_row["id"], entity_type="user", entity_id=user_row["id"])
         return jsonify({"success": True, "message": "Password reset successful. Please login with your new password."}), 200
+    except PasswordHasherBusy:
+        return hasher_busy_response()
     except Exception:
         traceback.print_exc()
         return jsonify({"success": False, "message": "Server error during password reset."}), 500
@@ -285,14 +277,15 @@ def doctor_login():
             return jsonify({"success": False, "message": "Doctor email and password are required."}), 400
 
         with get_db() as conn:
-            doctor = conn.execute(
+            doctor = fetch_one(
+                conn,
                 """
                 SELECT *
                 FROM doctors
                 WHERE lower(email) = ? AND profile_status = 'active'
                 """,
                 (email,),
-            ).fetchone()
+            )
 
         if not doctor:
             log_audit_event("doctor_login_failed", status="failed", actor_type="guest", details={"email": email, "reason": "account_not_found"})
@@ -302,19 +295,8 @@ def doctor_login():
             log_audit_event("doctor_login_failed", status="failed", actor_type="doctor", actor_id=doctor["id"], entity_type="doctor", entity_id=doctor["id"], details={"reason": "invalid_password"})
             return jsonify({"success": False, "message": "Invalid doctor credentials."}), 401
 
-        doctor_session = {
-            "id": doctor["id"],
-            "name": doctor["name"],
-            "initials": doctor["initials"],
-            "spec": doctor["specialization"],
-            "email": doctor["email"],
-            "rating": doctor["rating"],
-            "reviews": doctor["reviews_count"],
-            "experience": f"{doctor['experience_years']} years",
-            "languages": json.loads(doctor["languages_json"] or "[]"),
-            "pricePerSession": doctor["price_per_session"],
-            "profileSource": doctor["profile_source"],
-        }
+        record = get_doctor(doctor["id"]) or DoctorRecord.from_row(doctor)
+        doctor_session = record.session_payload()
         session["doctor_id"] = doctor["id"]
         session.pop("user_id", None)
         log_audit_event("doctor_login_completed", actor_type="doctor", actor_id=doctor["id"], entity_type="doctor", entity_id=doctor["id"])
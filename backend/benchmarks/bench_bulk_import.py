@@ -0,0 +1,111 @@
+"""
+MoodMate: Bulk Import Benchmark
+===============================
+Run from the backend directory:
+    python benchmarks/bench_bulk_import.py [--rows 200000] [--chunk-size 5000]
+
+Writes a users CSV and a check-ins JSONL file, then loads each into a
+throwaway SQLite database (with the app's connection profile) three ways:
+
+* per-row:   one INSERT and one commit per row, which is what creating
+             accounts one HTTP call at a time costs the database.
+* one-txn:   one INSERT per row inside a single transaction.
+* bulk:      bulk_import.import_file, which commits one executemany per chunk.
+
+The per-row load is capped at 20,000 rows and scaled up, because it runs for
+minutes past that. Password hashing is left out. The file carries precomputed
+hashes, so only the database write is timed.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+TMP = tempfile.mkdtemp()
+os.environ["MOODMATE_DB_PATH"] = os.path.join(TMP, "bench.db")
+
+import bulk_import  # noqa: E402
+from database import connect_sqlite  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+PER_ROW_CAP = 20_000
+
+
+def write_files(rows):
+    users = os.path.join(TMP, "users.csv")
+    with open(users, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["username", "email", "phone", "password_hash"])
+        for i in range(rows):
+            writer.writerow([f"user{i}", f"user{i}@example.com", f"9{i:09d}", "$2b$12$" + "x" * 53])
+    checkins = os.path.join(TMP, "checkins.jsonl")
+    with open(checkins, "w", encoding="utf-8") as handle:
+        for i in range(rows):
+            handle.write(json.dumps({"user_id": i % 1000 + 1, "date": f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}", "mood_tag": "calm"}) + "\n")
+    return {"users": users, "checkins": checkins}
+
+
+def fresh_connection():
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(os.environ["MOODMATE_DB_PATH"] + suffix):
+            os.remove(os.environ["MOODMATE_DB_PATH"] + suffix)
+    conn = connect_sqlite()
+    migrate(conn)
+    return conn
+
+
+def load_rows(kind, path, limit=None, commit_each=False):
+    target = bulk_import.TARGETS[kind]
+    conn = fresh_connection()
+    started = time.perf_counter()
+    count = 0
+    for line, record in bulk_import.read_records(path):
+        if limit is not None and count >= limit:
+            break
+        target.insert.execute(conn, **target.row(record, line))
+        count += 1
+        if commit_each:
+            conn.commit()
+    conn.commit()
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return count, elapsed
+
+
+def load_bulk(kind, path, chunk_size):
+    conn = fresh_connection()
+    started = time.perf_counter()
+    count = bulk_import.import_file(conn, kind, path, chunk_size)
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return count, elapsed
+
+
+def main(rows, chunk_size):
+    files = write_files(rows)
+    print(f"{'table':<9} | {'method':<8} | {'rows':>9} | {'seconds':>8} | {'rows/s':>10} | {'est. for all':>12}")
+    print("-" * 72)
+    for kind, path in files.items():
+        for label, run in (
+            ("per-row", lambda: load_rows(kind, path, limit=min(rows, PER_ROW_CAP), commit_each=True)),
+            ("one-txn", lambda: load_rows(kind, path)),
+            ("bulk", lambda: load_bulk(kind, path, chunk_size)),
+        ):
+            count, elapsed = run()
+            rate = count / elapsed
+            print(f"{kind:<9} | {label:<8} | {count:>9,} | {elapsed:>8.2f} | {rate:>10,.0f} | {rows / rate:>11.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=bulk_import.IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    main(args.rows, args.chunk_size)
@@ -0,0 +1,104 @@
+"""
+MoodMate: Chat Concurrency Benchmark
+====================================
+Run from the backend directory:
+    python benchmarks/bench_chat_concurrency.py [--clients 10 100 500] [--latency 0.5]
+
+Simulates closed-loop chat clients against an LLM provider that takes
+``--latency`` seconds to answer, and compares how many chats one process
+completes per second:
+
+* sync:  the gunicorn sync worker model, where each of ``--sync-workers``
+         threads holds a request for the whole hedged provider call.
+* async: the ASGI path, where every chat is a coroutine on one event loop.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.ai_async import run_hedged_async  # noqa: E402
+from services.ai_service import run_hedged  # noqa: E402
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def run_sync(clients, workers, latency, duration):
+    def provider(user_message, context, timeout):
+        time.sleep(latency)
+        return "ok"
+
+    latencies = []
+    lock = threading.Lock()
+    end = time.monotonic() + duration
+    pool = ThreadPoolExecutor(max_workers=workers)
+
+    def handle(queued_at):
+        run_hedged([("gemini", provider)], "hi")
+        with lock:
+            latencies.append(time.monotonic() - queued_at)
+        if time.monotonic() < end:
+            pool.submit(handle, time.monotonic())
+
+    for _ in range(clients):
+        pool.submit(handle, time.monotonic())
+    time.sleep(duration)
+    pool.shutdown(wait=True, cancel_futures=True)
+    return latencies
+
+
+def run_async(clients, latency, duration):
+    async def provider(user_message, context, timeout):
+        await asyncio.sleep(latency)
+        return "ok"
+
+    async def client(end, latencies):
+        while time.monotonic() < end:
+            started = time.monotonic()
+            await run_hedged_async([("gemini", provider)], "hi")
+            latencies.append(time.monotonic() - started)
+
+    async def main():
+        latencies = []
+        end = time.monotonic() + duration
+        await asyncio.gather(*(client(end, latencies) for _ in range(clients)))
+        return latencies
+
+    return asyncio.run(main())
+
+
+def main(client_counts, workers, latency, duration):
+    print(f"provider latency {latency * 1000:.0f} ms, {duration:.0f}s per run, {workers} sync worker(s)")
+    print(f"{'clients':>8} | {'mode':<6} | {'chats':>6} | {'chats/s':>8} | {'p50 ms':>8} | {'p99 ms':>8}")
+    print("-" * 60)
+    for clients in client_counts:
+        for mode in ("sync", "async"):
+            if mode == "sync":
+                latencies = run_sync(clients, workers, latency, duration)
+            else:
+                latencies = run_async(clients, latency, duration)
+            print(
+                f"{clients:>8} | {mode:<6} | {len(latencies):>6} | {len(latencies) / duration:>8.1f} | "
+                f"{statistics.median(latencies) * 1000:>8.0f} | {percentile(latencies, 0.99) * 1000:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--sync-workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+    main(args.clients, args.sync_workers, args.latency, args.duration)
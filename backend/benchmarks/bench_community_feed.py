@@ -0,0 +1,106 @@
+"""
+MoodMate: Community Feed Benchmark
+==================================
+Run from the backend directory:
+    python benchmarks/bench_community_feed.py [--posts 10000 100000]
+
+Builds a throwaway SQLite database per size, then compares the old feed
+(every visible post + one reaction query per post) with the keyset-paginated
+feed (one page + one grouped reaction query), first page and a deep page.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+WORKDIR = tempfile.mkdtemp(prefix="moodmate-bench-")
+os.environ["MOODMATE_DB_PATH"] = os.path.join(WORKDIR, "bench.db")
+os.environ["DATABASE_URL"] = ""
+
+import app as moodmate  # noqa: E402
+
+
+def legacy_feed(conn):
+    cursor = conn.cursor()
+    rows = cursor.execute("SELECT * FROM community_posts WHERE visibility_status = 'visible' ORDER BY created_at DESC").fetchall()
+    posts = [dict(row) for row in rows]
+    for post in posts:
+        cursor.execute("SELECT reaction_type, count FROM community_reactions WHERE post_id = ?", (post["id"],))
+        post["reactions"] = {r["reaction_type"]: r["count"] for r in cursor.fetchall()}
+    return posts
+
+
+def populate(conn, total_posts, reactions_per_post):
+    conn.execute("DELETE FROM community_reactions")
+    conn.execute("DELETE FROM community_posts")
+    rng = random.Random(42)
+    moods = ["happy", "sad", "anxious", "neutral"]
+    posts = []
+    for post_id in range(1, total_posts + 1):
+        created_at = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(1_700_000_000 + post_id // 3))
+        visibility = "hidden" if post_id % 50 == 0 else "visible"
+        posts.append((post_id, post_id, rng.choice(moods), f"Benchmark post {post_id}", visibility, created_at))
+    conn.executemany(
+        "INSERT INTO community_posts (id, author_user_id, mood_tag, content, visibility_status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        posts,
+    )
+    reaction_types = ["appreciate", "hug", "relate", "strength"]
+    conn.executemany(
+        "INSERT INTO community_reactions (post_id, reaction_type, count) VALUES (?, ?, ?)",
+        (
+            (post_id, reaction_types[i % len(reaction_types)], rng.randint(1, 30))
+            for post_id in range(1, total_posts + 1)
+            for i in range(reactions_per_post)
+        ),
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def run(sizes, page_size, reactions_per_post, repeat, legacy_repeat):
+    print(f"{'posts':>8} | {'variant':<24} | {'median ms':>10} | {'max ms':>10}")
+    print("-" * 62)
+    with moodmate.get_db() as conn:
+        for size in sizes:
+            populate(conn, size, reactions_per_post)
+
+            def deep_page():
+                after = None
+                for _ in range(50):
+                    _, cursor = moodmate.fetch_community_feed(conn, page_size, after)
+                    after = moodmate.decode_feed_cursor(cursor)
+
+            results = [
+                ("legacy (all + N+1)", timed(lambda: legacy_feed(conn), legacy_repeat)),
+                (f"keyset page 1 ({page_size})", timed(lambda: moodmate.fetch_community_feed(conn, page_size), repeat)),
+                ("keyset pages 1-50", timed(deep_page, max(1, repeat // 10))),
+            ]
+            for label, (median_ms, max_ms) in results:
+                print(f"{size:>8} | {label:<24} | {median_ms:>10.2f} | {max_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--page-size", type=int, default=moodmate.FEED_PAGE_SIZE)
+    parser.add_argument("--reactions-per-post", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--legacy-repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.posts, args.page_size, args.reactions_per_post, args.repeat, args.legacy_repeat)
@@ -0,0 +1,82 @@
+"""
+MoodMate: Doctor Search Benchmark
+=================================
+Run from the backend directory:
+    python benchmarks/bench_doctor_search.py [--doctors 10 1000 5000]
+
+Builds synthetic in-memory doctor directories and times index construction
+(paid once per cache fill) and typical /api/doctors/search queries.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.doctor_directory import DoctorDirectory, DoctorRecord  # noqa: E402
+
+LANGUAGES = ["Hindi", "English", "Tamil", "Telugu", "Bengali", "Marathi", "Kannada", "Gujarati"]
+MODES = ["Video", "Voice", "Chat", "In-person"]
+FOCUS_AREAS = ["Anxiety", "Depression", "Stress", "Trauma", "Relationships", "Sleep", "Grief", "Career stress", "Burnout", "OCD"]
+
+QUERIES = {
+    "no filters": {},
+    "language": {"languages": ["Tamil"]},
+    "language + mode": {"languages": ["Hindi"], "modes": ["Video"]},
+    "focus + price range": {"focus_areas": ["Anxiety", "Sleep"], "min_price": 500, "max_price": 1500},
+    "all filters, by price": {"languages": ["English"], "modes": ["Chat"], "focus_areas": ["Trauma"], "min_rating": 4.5, "sort": "price_asc"},
+}
+
+
+def synthetic_rows(count, rng):
+    rows = []
+    for doctor_id in range(1, count + 1):
+        rows.append({
+            "id": doctor_id, "name": f"Dr. {doctor_id}", "initials": "DR", "email": f"d{doctor_id}@example.com",
+            "specialization": "Clinical Psychology", "experience_years": rng.randint(1, 30),
+            "languages_json": json.dumps(rng.sample(LANGUAGES, rng.randint(1, 3))),
+            "modes_json": json.dumps(rng.sample(MODES, rng.randint(1, 3))),
+            "price_per_session": rng.randrange(299, 3000, 50), "rating": round(rng.uniform(3.5, 5.0), 1),
+            "reviews_count": rng.randint(0, 500), "badge": "", "bio": "", "license_info": "",
+            "qualifications_json": "[]", "approaches_json": "[]",
+            "focus_areas_json": json.dumps(rng.sample(FOCUS_AREAS, rng.randint(1, 4))),
+            "best_for": "", "first_session": "", "cancellation_policy": "", "review_summary": "",
+            "availability_json": "[]", "photo_url": "", "is_verified": 1, "profile_source": "sample", "profile_status": "active",
+        })
+    rows.sort(key=lambda row: -row["rating"])  # matches the cache loader's ORDER BY rating DESC
+    return rows
+
+
+def main(sizes, repeat):
+    rng = random.Random(7)
+    print(f"{'doctors':>8} | {'query':<24} | {'hits':>6} | {'median ms':>10} | {'p99 ms':>8}")
+    print("-" * 68)
+    for size in sizes:
+        records = [DoctorRecord.from_row(row) for row in synthetic_rows(size, rng)]
+        started = time.perf_counter()
+        directory = DoctorDirectory(records)
+        build_ms = (time.perf_counter() - started) * 1000
+        print(f"{size:>8} | {'(index build)':<24} | {'':>6} | {build_ms:>10.2f} | {'':>8}")
+        for label, filters in QUERIES.items():
+            samples = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                total, hits = directory.search_page(limit=20, **filters)
+                samples.append((time.perf_counter() - started) * 1000)
+            samples.sort()
+            p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+            print(f"{size:>8} | {label:<24} | {total:>6} | {statistics.median(samples):>10.3f} | {p99:>8.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctors", type=int, nargs="+", default=[10, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.doctors, args.repeat)
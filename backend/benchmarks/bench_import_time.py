@@ -0,0 +1,83 @@
+"""
+MoodMate: Import Time Benchmark
+===============================
+Run from the backend directory:
+    python benchmarks/bench_import_time.py [--runs 3] [--top 15]
+
+Imports the app in a fresh interpreter under `python -X importtime` against a
+throwaway SQLite database and reports the time to import `app`, the worker's
+peak RSS, the slowest top-level imports, and whether any of the lazily-loaded
+SDKs were pulled in at boot. The "eager" row imports those SDKs up front, as
+the app did before they were deferred to first use.
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY_SDKS = ("google.generativeai", "groq", "stripe", "resend", "gtts")
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+CHILD = """
+import resource, sys
+import app
+{extra}
+print("RSS_KB", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def profile(db_path, extra=""):
+    env = dict(os.environ, DATABASE_URL="", MOODMATE_DB_PATH=db_path, EMAIL_WORKER="off", PASSWORD_HASH_MODE="inline")
+    code = CHILD.format(extra=extra)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(result.stderr[-2000:])
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            _, cumulative, indent, name = match.groups()
+            modules[name] = (int(cumulative), (len(indent) - 1) // 2)  # nesting depth, 0 = top level
+    rss_kb = int(next(line.split()[1] for line in result.stdout.splitlines() if line.startswith("RSS_KB")))
+    return modules, rss_kb
+
+
+def main(runs, top):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        profile(db_path)  # first boot creates the schema; measure warm boots only
+        lazy = [profile(db_path) for _ in range(runs)]
+        eager = [profile(db_path, "import " + ", ".join(LAZY_SDKS)) for _ in range(runs)]
+
+    def summarize(samples):
+        app_ms = statistics.median(modules["app"][0] / 1000 for modules, _ in samples)
+        sdk_ms = statistics.median(sum(modules.get(name, (0, 0))[0] for name in LAZY_SDKS) / 1000 for modules, _ in samples)
+        rss_mb = statistics.median(rss / 1024 for _, rss in samples)
+        return app_ms, sdk_ms, rss_mb
+
+    print(f"{'mode':<6} | {'import app':>10} | {'+ SDKs':>8} | {'total':>8} | {'peak RSS':>9}")
+    print("-" * 54)
+    for label, samples in (("lazy", lazy), ("eager", eager)):
+        app_ms, sdk_ms, rss_mb = summarize(samples)
+        print(f"{label:<6} | {app_ms:>8.0f}ms | {sdk_ms:>6.0f}ms | {app_ms + sdk_ms:>6.0f}ms | {rss_mb:>7.1f}MB")
+
+    modules = lazy[-1][0]
+    loaded = [name for name in LAZY_SDKS if name in modules]
+    print(f"\nLazy SDKs imported at boot: {', '.join(loaded) if loaded else 'none'}")
+    print("\nSlowest imports under `app` (cumulative):")
+    children = sorted(((cumulative, name) for name, (cumulative, depth) in modules.items() if depth == 1), reverse=True)
+    for cumulative, name in children[:top]:
+        print(f"  {cumulative / 1000:>8.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    main(args.runs, args.top)
@@ -0,0 +1,96 @@
+"""
+MoodMate: Rate Limit Storage Benchmark
+======================================
+Run from the backend directory:
+    python benchmarks/bench_rate_limit.py [--checks 20000] [--workers 4] [--limit 100]
+
+Compares the limits ``memory://`` storage the app used before with the shared
+SQLite storage in services/rate_limiting.py, under the sliding-window-counter
+strategy the app runs:
+
+* latency: one process checking ``--checks`` times against a limit that is
+  never reached, spread over 1,000 client keys.
+* sharing: ``--workers`` forked processes hammer one client key whose limit is
+  ``--limit`` per minute. The table shows how many requests got through. A
+  shared store lets through ``--limit``, and per-process counters let through
+  up to ``--workers`` times that.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+TMP = tempfile.mkdtemp()
+os.environ.setdefault("MOODMATE_DB_PATH", os.path.join(TMP, "bench.db"))
+
+from limits import parse  # noqa: E402
+from limits.storage import storage_from_string  # noqa: E402
+from limits.strategies import SlidingWindowCounterRateLimiter  # noqa: E402
+
+import services.rate_limiting  # noqa: E402,F401  (registers the moodmate+sqlite scheme)
+
+STORES = {
+    "memory": "memory://",
+    "sqlite": f"moodmate+sqlite://{os.path.join(TMP, 'ratelimit.db')}",
+}
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def latency(uri, checks):
+    limiter = SlidingWindowCounterRateLimiter(storage_from_string(uri))
+    item = parse(f"{checks * 10} per minute")
+    samples = []
+    for n in range(checks):
+        started = time.perf_counter()
+        limiter.hit(item, f"10.0.{n % 1000 // 250}.{n % 250}", "chat")
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def hammer(uri, limit, attempts, results):
+    limiter = SlidingWindowCounterRateLimiter(storage_from_string(uri))
+    item = parse(f"{limit} per minute")
+    results.put(sum(limiter.hit(item, "203.0.113.7", "login") for _ in range(attempts)))
+
+
+def shared(uri, workers, limit):
+    storage_from_string(uri).reset()
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=hammer, args=(uri, limit, limit * 2, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    allowed = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return allowed
+
+
+def main(checks, workers, limit):
+    print(f"{'store':<7} | {'p50':>7} | {'p99':>7} | {'checks/s':>9} | {'allowed of ' + str(limit):>14}")
+    print("-" * 57)
+    for label, uri in STORES.items():
+        samples = latency(uri, checks)
+        allowed = shared(uri, workers, limit)
+        print(
+            f"{label:<7} | {percentile(samples, 0.5) * 1e6:>5.0f}us | {percentile(samples, 0.99) * 1e6:>5.0f}us"
+            f" | {len(samples) / sum(samples):>9,.0f} | {allowed:>14}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+    main(args.checks, args.workers, args.limit)
@@ -0,0 +1,152 @@
+"""
+MoodMate: SQLite Concurrency Benchmark
+======================================
+Run from the backend directory:
+    python benchmarks/bench_sqlite_concurrency.py [--writers 4 10] [--readers 16] [--think-ms 2] [--duration 5]
+
+Runs writer threads that persist chat exchanges (two chat_history inserts and
+a users update per transaction, as /api/chat did) next to reader threads
+that load a user and their latest messages. Each thread pauses ``--think-ms``
+between operations for the rest of the request. Every thread has its own
+connection to a throwaway database file, like the pooled connections of
+several workers; the default writer counts stop at one worker's pool size
+(MOODMATE_DB_POOL_MAX), the most writers one process can run at once. Three connection setups are compared:
+
+* default: a plain ``sqlite3.connect`` on a rollback-journal database.
+* wal:     the same plain connection on a database that ``optimize_db.py``
+           switched to WAL. This is how the app opened moodmate.db before.
+* profile: the connection ``database.connect_sqlite`` opens, with
+           SQLITE_PRAGMAS (WAL, synchronous=NORMAL, busy_timeout, mmap,
+           cache_size, temp_store) and BEGIN IMMEDIATE for writes.
+
+The table reports throughput, tail latency and how many operations failed
+with "database is locked".
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from database import POOL_MAX_SIZE, SQLITE_PRAGMAS, apply_sqlite_pragmas  # noqa: E402
+
+USERS = 200
+SCHEMA = """
+    CREATE TABLE users (id INTEGER PRIMARY KEY, coins INTEGER DEFAULT 100);
+    CREATE TABLE chat_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT, role TEXT, content TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX idx_chat_session_id ON chat_history(session_id, id);
+"""
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else 0.0
+
+
+def connect_default(path):
+    return sqlite3.connect(path, check_same_thread=False)
+
+
+def connect_profile(path):
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=SQLITE_PRAGMAS["busy_timeout"] / 1000,
+                           isolation_level="IMMEDIATE")
+    apply_sqlite_pragmas(conn)
+    return conn
+
+
+def write_chat(conn, n):
+    user_id = n % USERS + 1
+    session = f"s{user_id}"
+    conn.execute("INSERT INTO chat_history (session_id, role, content) VALUES (?, 'user', ?)", (session, "x" * 200))
+    conn.execute("INSERT INTO chat_history (session_id, role, content) VALUES (?, 'ai', ?)", (session, "y" * 400))
+    conn.execute("UPDATE users SET coins = coins + 5 WHERE id = ?", (user_id,))
+    conn.commit()
+
+
+def read_status(conn, n):
+    user_id = n % USERS + 1
+    conn.execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+    conn.execute(
+        "SELECT role, content FROM chat_history WHERE session_id = ? ORDER BY id DESC LIMIT 10", (f"s{user_id}",)
+    ).fetchall()
+
+
+def run(connect, journal_mode, writers, readers, think, duration):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        setup = sqlite3.connect(path)
+        setup.execute(f"PRAGMA journal_mode = {journal_mode}")
+        setup.executescript(SCHEMA)
+        setup.executemany("INSERT INTO users (id) VALUES (?)", [(i,) for i in range(1, USERS + 1)])
+        setup.commit()
+        setup.close()
+
+        results = {"write": [], "read": [], "locked": 0, "errors": 0}
+        lock = threading.Lock()
+        end = time.monotonic() + duration
+
+        def worker(operation, seed):
+            conn = connect(path)
+            latencies, locked, errors, n = [], 0, 0, seed
+            while time.monotonic() < end:
+                started = time.perf_counter()
+                try:
+                    operation(conn, n)
+                    latencies.append(time.perf_counter() - started)
+                except sqlite3.OperationalError as e:
+                    conn.rollback()
+                    if "locked" in str(e):
+                        locked += 1
+                    else:
+                        errors += 1
+                n += 7
+                time.sleep(think)
+            conn.close()
+            with lock:
+                results["write" if operation is write_chat else "read"].extend(latencies)
+                results["locked"] += locked
+                results["errors"] += errors
+
+        threads = [threading.Thread(target=worker, args=(write_chat, i)) for i in range(writers)]
+        threads += [threading.Thread(target=worker, args=(read_status, i)) for i in range(readers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return results
+
+
+def main(writer_counts, readers, think, duration):
+    print(f"{'setup':<8} | {'writers':>7} | {'writes/s':>8} | {'reads/s':>8} | {'write p99':>9} | {'read p99':>8} | {'locked':>6}")
+    print("-" * 73)
+    for writers in writer_counts:
+        for label, connect, journal_mode in (
+            ("default", connect_default, "DELETE"),
+            ("wal", connect_default, "WAL"),
+            ("profile", connect_profile, "WAL"),
+        ):
+            results = run(connect, journal_mode, writers, readers, think, duration)
+            print(
+                f"{label:<8} | {writers:>7} | {len(results['write']) / duration:>8.0f} | {len(results['read']) / duration:>8.0f}"
+                f" | {percentile(results['write'], 0.99) * 1000:>7.1f}ms | {percentile(results['read'], 0.99) * 1000:>6.1f}ms"
+                f" | {results['locked'] + results['errors']:>6}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, nargs="+", default=[4, POOL_MAX_SIZE])
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--think-ms", type=float, default=2)
+    parser.add_argument("--duration", type=float, default=5)
+    args = parser.parse_args()
+    main(args.writers, args.readers, args.think_ms / 1000, args.duration)
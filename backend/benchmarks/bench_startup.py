@@ -0,0 +1,82 @@
+"""
+MoodMate: Startup Benchmark
+===========================
+Run from the backend directory:
+    python benchmarks/bench_startup.py [--runs 5]
+
+Boots the app in fresh interpreters against a throwaway SQLite database and
+reports:
+  * process start -> app imported, first boot (empty database) and warm boots
+  * init_db on a warm database: the previous behaviour (all DDL, every sample
+    doctor upserted, admin password re-hashed) vs the check for pending
+    migrations and changed seeds
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time
+import app
+from database import get_db
+from migrations import MIGRATIONS, apply_migration
+
+started = time.perf_counter()
+with get_db() as conn:
+    for migration in MIGRATIONS:
+        apply_migration(conn, migration)
+    app.seed_database(conn, force=True)
+full = time.perf_counter() - started
+
+started = time.perf_counter()
+app.init_db()
+checked = time.perf_counter() - started
+print("RESULT " + json.dumps({"full_ms": full * 1000, "check_ms": checked * 1000}))
+"""
+
+
+def boot(db_path, code="import app"):
+    env = dict(os.environ, DATABASE_URL="", MOODMATE_DB_PATH=db_path, EMAIL_WORKER="off")
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise SystemExit(result.stderr)
+    return elapsed, result.stdout
+
+
+def main(runs):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        first, _ = boot(db_path)
+        warm = [boot(db_path)[0] for _ in range(runs)]
+        samples = []
+        for _ in range(runs):
+            _, output = boot(db_path, CHILD)
+            line = next(line for line in output.splitlines() if line.startswith("RESULT "))
+            samples.append(json.loads(line[len("RESULT "):]))
+
+    full = statistics.median(sample["full_ms"] for sample in samples)
+    check = statistics.median(sample["check_ms"] for sample in samples)
+    print(f"{'scenario':<38} | {'median':>10}")
+    print("-" * 52)
+    print(f"{'process boot, empty database':<38} | {first * 1000:>8.0f}ms")
+    print(f"{'process boot, warm database':<38} | {statistics.median(warm) * 1000:>8.0f}ms")
+    print(f"{'init_db, previous (DDL + seeds + hash)':<38} | {full:>8.1f}ms")
+    print(f"{'init_db, migration + seed check':<38} | {check:>8.1f}ms")
+    print(f"init_db speedup on a warm database: {full / check:.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    main(args.runs)
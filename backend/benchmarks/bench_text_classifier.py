@@ -0,0 +1,102 @@
+"""
+MoodMate: Text Classifier Benchmark
+===================================
+Run from the backend directory:
+    python benchmarks/bench_text_classifier.py [--sizes 80 2000 20000]
+
+Compares the previous per-check keyword scans (crisis, mood, toxicity and the
+heuristic topic, each lowercasing the text and looping over its own list) with
+the single tokenize-and-intersect pass in services/text_classifier.py.
+
+Target: at least 20 MB/s for the single pass on 20 KB messages.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.text_classifier import classify  # noqa: E402
+
+TARGET_MB_PER_S = 20.0
+FILLER = (
+    "today was long and the bus was late again so I walked home through the market "
+    "my sister called about the weekend plans and we talked about college and work "
+).split()
+SIGNAL_WORDS = ["worried", "lonely", "great", "angry", "sleep", "stressed", "tired", "happy"]
+
+
+def legacy_scans(msg):
+    msg_l = msg.lower()
+    crisis = any(k in msg_l for k in ["suicide", "kill myself", "end it all", "end my life", "suicidal", "want to die", "marna chahta"])
+    mood = "neutral"
+    for m, k in {
+        "happy": ["happy", "good", "great", "awesome", "excited", "joy", "smile", "khush", "achha"],
+        "sad": ["sad", "depressed", "unhappy", "cry", "tears", "udasi", "dukhi", "lonely"],
+        "angry": ["angry", "mad", "furious", "gussa", "irritated", "hate"],
+        "anxious": ["anxious", "nervous", "worried", "stress", "tension", "chinta", "panic"],
+    }.items():
+        if any(w in msg_l for w in k):
+            mood = m
+            break
+    toxic = any(k in msg.lower() for k in ["hate", "kill", "idiot", "stupid"])
+    topic = "general"
+    for name, words in (
+        ("anxiety", ["anxious", "panic", "worry", "tense", "stress", "scared"]),
+        ("sadness", ["sad", "depressed", "lonely", "cry", "hurt", "broke"]),
+        ("sleep", ["sleep", "insomnia", "night", "tired", "wake"]),
+        ("anger", ["angry", "mad", "hate", "fight", "annoy", "piss"]),
+    ):
+        if any(k in msg.lower() for k in words):
+            topic = name
+            break
+    return crisis, mood, toxic, topic
+
+
+def single_pass(msg):
+    signals = classify(msg)
+    return signals.crisis, signals.mood, signals.toxic, signals.topic
+
+
+def make_message(size, rng):
+    words = []
+    while sum(len(word) + 1 for word in words) < size:
+        words.append(rng.choice(SIGNAL_WORDS) if rng.random() < 0.02 else rng.choice(FILLER))
+    return " ".join(words)[:size]
+
+
+def time_calls(fn, messages, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for message in messages:
+            fn(message)
+        samples.append((time.perf_counter() - started) / len(messages))
+    return statistics.median(samples)
+
+
+def main(sizes, repeat):
+    rng = random.Random(11)
+    print(f"{'chars':>7} | {'legacy us':>10} | {'single us':>10} | {'speedup':>8} | {'single MB/s':>11}")
+    print("-" * 58)
+    for size in sizes:
+        messages = [make_message(size, rng) for _ in range(50)]
+        legacy = time_calls(legacy_scans, messages, repeat)
+        single = time_calls(single_pass, messages, repeat)
+        throughput = size / single / 1e6
+        print(f"{size:>7} | {legacy * 1e6:>10.1f} | {single * 1e6:>10.1f} | {legacy / single:>7.1f}x | {throughput:>11.1f}")
+    if throughput < TARGET_MB_PER_S:
+        print(f"WARNING: below the {TARGET_MB_PER_S:.0f} MB/s target on {sizes[-1]}-char messages")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[80, 2000, 20000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.sizes, args.repeat)
@@ -0,0 +1,60 @@
+"""
+MoodMate: Streaming TTS Benchmark
+=================================
+Run from the backend directory:
+    python benchmarks/bench_tts_stream.py [--sentences 2 6 12] [--latency-ms 150] [--per-char-ms 2]
+
+Simulates a speech provider whose latency is a fixed round trip plus a cost
+per character, and compares time-to-first-audio for a whole-reply synthesis
+(what POST /api/tts does on a miss) with the sentence-by-sentence stream
+behind POST /api/tts/stream.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from services.tts_cache import AudioCache  # noqa: E402
+
+SENTENCE = "That sounds like a lot to carry, and it makes sense that you feel worn out tonight."
+
+
+def fake_provider(latency, per_char):
+    def synthesize(text, lang, voice, fp):
+        time.sleep(latency + per_char * len(text))
+        fp.write(b"\xff\xfb" + text.encode("utf-8"))
+    return synthesize
+
+
+def main(sentence_counts, latency, per_char):
+    print(f"{'sentences':>9} | {'whole file':>10} | {'stream first':>12} | {'stream total':>12}")
+    print("-" * 53)
+    for count in sentence_counts:
+        text = " ".join([SENTENCE] * count)
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = AudioCache(tmp, synthesize=fake_provider(latency, per_char))
+            started = time.perf_counter()
+            cache.get_or_create(text + " (whole)")
+            whole = time.perf_counter() - started
+
+            started = time.perf_counter()
+            first = None
+            for _ in cache.stream(text):
+                if first is None:
+                    first = time.perf_counter() - started
+            total = time.perf_counter() - started
+        print(f"{count:>9} | {whole * 1000:>8.0f}ms | {first * 1000:>10.0f}ms | {total * 1000:>10.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, nargs="+", default=[2, 6, 12])
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--per-char-ms", type=float, default=2)
+    args = parser.parse_args()
+    main(args.sentences, args.latency_ms / 1000, args.per_char_ms / 1000)
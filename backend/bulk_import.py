@@ -0,0 +1,241 @@
+"""
+Bulk-load doctors, users, chat history or daily check-ins from JSONL or CSV.
+
+Rows are read as a stream and written in chunks. On SQLite each chunk goes
+through one ``executemany``. On PostgreSQL it goes through one
+``COPY ... FROM STDIN``. Each chunk commits on its own, so a million-row file
+never sits in memory and a failure keeps the chunks that already loaded.
+The import only appends. Rows that break a UNIQUE constraint (a user's email or
+phone, a doctor's email) fail their chunk. Each doctors chunk bumps the directory
+cache generation as it commits, so every worker reloads the directory.
+
+Run from the backend directory:
+    python bulk_import.py users users.csv --password Staging123!
+    python bulk_import.py doctors doctors.jsonl
+    python bulk_import.py chat chat_history.jsonl --chunk-size 20000
+    python bulk_import.py checkins checkins.csv
+
+Column names follow the tables (see migrations.py). Doctor list fields
+(languages, modes, qualifications, approaches, focus_areas, availability) may
+be JSON arrays or already-encoded strings. Chat ``content`` is plain text and
+gets encrypted like messages sent through /api/chat; rows need a ``user_id``
+to be used as that user's conversation context. Users need either a
+``password_hash`` column or ``--password``, which is hashed once and shared by
+every row without one.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+
+# A one-off command needs neither the background mailer nor a hashing pool.
+os.environ.setdefault("EMAIL_WORKER", "off")
+os.environ.setdefault("PASSWORD_HASH_MODE", "inline")
+
+from database import IS_POSTGRES, get_db, sync_id_sequence  # noqa: E402
+from migrations import migrate  # noqa: E402
+from queries import Statement  # noqa: E402
+from security import encrypt_data  # noqa: E402
+from services.doctor_directory import doctor_cache  # noqa: E402
+from services.password_hashing import hash_password  # noqa: E402
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+# Stands in for the CURRENT_TIMESTAMP default, which an explicit NULL would override.
+_IMPORTED_AT = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _json_text(value):
+    return value if isinstance(value, str) else json.dumps(value if value is not None else [], ensure_ascii=False)
+
+
+def _integer(value):
+    return int(value) if value not in (None, "") else None
+
+
+def _number(value):
+    return float(value) if value not in (None, "") else None
+
+
+class Target:
+    """A table that can be imported: its columns, the defaults for absent fields and per-column converters."""
+
+    def __init__(self, table, columns, required, defaults=None, convert=None, source=None, cache=None):
+        self.table = table
+        self.columns = columns
+        self.required = required
+        self.defaults = defaults or {}
+        self.convert = convert or {}
+        # Input field a column is read from when it is named differently from the column.
+        self.source = source or {}
+        # VersionedCache built from this table; each chunk bumps its generation as it commits.
+        self.cache = cache
+        self.insert = Statement(
+            f"import_{table}",
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(':' + column for column in columns)})",
+        )
+
+    def row(self, record, line):
+        missing = [field for field in self.required if record.get(self.source.get(field, field)) in (None, "")]
+        if missing:
+            raise ValueError(f"{self.table} row {line}: missing {', '.join(missing)}")
+        values = {}
+        for column in self.columns:
+            value = record.get(self.source.get(column, column))
+            if value in (None, "") and column in self.defaults:
+                value = self.defaults[column]
+            convert = self.convert.get(column)
+            values[column] = convert(value) if convert else value
+        return values
+
+
+_DOCTOR_LISTS = ("languages", "modes", "qualifications", "approaches", "focus_areas", "availability")
+
+TARGETS = {
+    "users": Target(
+        "users",
+        ("username", "email", "phone", "password_hash", "coins", "streak", "premium_plan", "role"),
+        required=("username", "email", "phone"),
+        defaults={"coins": 100, "streak": 0, "premium_plan": "free", "role": "free"},
+        convert={"email": lambda value: value.strip().lower(), "coins": _integer, "streak": _integer},
+    ),
+    "doctors": Target(
+        "doctors",
+        ("name", "initials", "email", "password_hash", "specialization", "experience_years", "price_per_session",
+         "rating", "reviews_count", "badge", "bio", "license_info", "best_for", "first_session",
+         "cancellation_policy", "review_summary", "photo_url", "is_verified", "profile_source", "profile_status")
+        + tuple(f"{field}_json" for field in _DOCTOR_LISTS),
+        required=("name", "email", "password_hash", "specialization"),
+        defaults={
+            "initials": "", "experience_years": 0, "price_per_session": 0, "rating": 0, "reviews_count": 0,
+            "badge": "", "bio": "", "license_info": "", "best_for": "", "first_session": "",
+            "cancellation_policy": "", "review_summary": "", "photo_url": "", "is_verified": 0,
+            "profile_source": "import", "profile_status": "active",
+        },
+        convert={
+            "email": lambda value: value.strip().lower(), "experience_years": _integer,
+            "price_per_session": _integer, "rating": _number, "reviews_count": _integer, "is_verified": _integer,
+            **{f"{field}_json": _json_text for field in _DOCTOR_LISTS},
+        },
+        source={f"{field}_json": field for field in _DOCTOR_LISTS},
+        cache=doctor_cache,
+    ),
+    "chat": Target(
+        "chat_history",
+        ("session_id", "user_id", "role", "content", "mood_detected", "timestamp"),
+        required=("session_id", "role", "content"),
+        defaults={"timestamp": _IMPORTED_AT},
+        convert={"user_id": _integer, "content": encrypt_data},
+    ),
+    "checkins": Target(
+        "daily_checkins",
+        ("user_id", "date", "mood_tag", "created_at"),
+        required=("user_id", "date"),
+        defaults={"created_at": _IMPORTED_AT},
+        convert={"user_id": _integer},
+    ),
+}
+
+
+def read_records(path):
+    """Yield ``(line, record)`` pairs from a ``.jsonl`` or ``.csv`` file without loading it."""
+    path = Path(path)
+    with path.open(newline="", encoding="utf-8") as handle:
+        if path.suffix.lower() == ".csv":
+            for line, record in enumerate(csv.DictReader(handle), start=2):
+                yield line, record
+        else:
+            for line, text in enumerate(handle, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    record = json.loads(text)
+                except json.JSONDecodeError as exc:
+                    raise ValueError(f"{path.name} line {line}: {exc}") from None
+                yield line, record
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _copy_field(value):
+    """One field in COPY's text format: ``\\N`` for NULL, with backslash, tab and line breaks escaped."""
+    if value is None:
+        return "\\N"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def copy_rows(conn, target, rows):
+    """Send ``rows`` to PostgreSQL through one ``COPY FROM STDIN``."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_field(row[column]) for column in target.columns))
+        buffer.write("\n")
+    buffer.seek(0)
+    conn.cursor().copy_expert(f"COPY {target.table} ({', '.join(target.columns)}) FROM STDIN", buffer)
+
+
+def write_chunk(conn, target, rows):
+    if IS_POSTGRES:
+        copy_rows(conn, target, rows)
+    else:
+        target.insert.executemany(conn, rows)
+    if target.cache:
+        target.cache.invalidate(conn)
+    conn.commit()
+
+
+def import_file(conn, kind, path, chunk_size=IMPORT_CHUNK_SIZE, password=None, progress=None):
+    """Load ``path`` into the table behind ``kind``; returns the number of rows written."""
+    target = TARGETS[kind]
+    shared_hash = hash_password(password) if password else None
+
+    def rows():
+        for line, record in read_records(path):
+            if kind == "users" and not record.get("password_hash"):
+                if not shared_hash:
+                    raise ValueError(f"users row {line}: no password_hash and no --password given")
+                record = {**record, "password_hash": shared_hash}
+            yield target.row(record, line)
+
+    # Seeds and earlier loads may have written explicit ids behind the sequence's back.
+    sync_id_sequence(conn, target.table)
+    written = 0
+    for chunk in chunked(rows(), chunk_size):
+        write_chunk(conn, target, chunk)
+        written += len(chunk)
+        if progress:
+            progress(written)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=sorted(TARGETS))
+    parser.add_argument("path", help="a .jsonl or .csv file")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    parser.add_argument("--password", help="password for users rows without a password_hash (hashed once)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with get_db() as conn:
+        migrate(conn)
+        try:
+            total = import_file(
+                conn, args.kind, args.path, args.chunk_size, args.password,
+                progress=lambda written: print(f"\r{written:,} rows", end="", flush=True),
+            )
+        except ValueError as exc:
+            print(f"\nImport stopped: {exc}", file=sys.stderr)
+            sys.exit(1)
+    elapsed = time.perf_counter() - started
+    print(f"\rImported {total:,} {args.kind} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)", flush=True)
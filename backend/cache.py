@@ -0,0 +1,113 @@
+import hashlib
+import os
+import threading
+import time
+
+from database import IS_POSTGRES, get_db
+
+# How often a worker re-reads the shared generation counter before trusting its local copy.
+VERSION_CHECK_INTERVAL = float(os.getenv("MOODMATE_CACHE_CHECK_INTERVAL", "1"))
+PLACEHOLDER = "%s" if IS_POSTGRES else "?"
+
+CREATE_CACHE_VERSIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS cache_versions (
+        name TEXT PRIMARY KEY,
+        generation INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+
+def read_generation(conn, name):
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT generation FROM cache_versions WHERE name = {PLACEHOLDER}", (name,))
+    row = cursor.fetchone()
+    return row["generation"] if row else 0
+
+
+def bump_generation(conn, name):
+    """Increment the shared generation inside the caller's transaction."""
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        INSERT INTO cache_versions (name, generation) VALUES ({PLACEHOLDER}, 1)
+        ON CONFLICT(name) DO UPDATE SET generation = cache_versions.generation + 1
+        """,
+        (name,),
+    )
+
+
+class CacheEntry:
+    __slots__ = ("value", "body", "etag", "generation")
+
+    def __init__(self, value, body, generation):
+        self.value = value
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.generation = generation
+
+
+class VersionedCache:
+    """Per-process cache that every worker validates against a DB generation counter.
+
+    Writers call ``invalidate(conn)`` in the same transaction as their change, so
+    once it commits every worker reloads within ``check_interval`` seconds. The
+    cached value is stored next to its pre-serialized response body and an ETag.
+    """
+
+    def __init__(self, name, loader, serializer, ttl=300, check_interval=VERSION_CHECK_INTERVAL):
+        self.name = name
+        self._loader = loader
+        self._serializer = serializer
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entry = None
+        self._generation = None
+        self._expiry = 0.0
+        self._checked_at = 0.0
+
+    def _is_fresh(self, now):
+        if self._entry is None or now >= self._expiry:
+            return False
+        if now - self._checked_at < self.check_interval:
+            return True
+        try:
+            with get_db() as conn:
+                generation = read_generation(conn, self.name)
+        except Exception:
+            # Counter unreadable: keep serving until the TTL runs out.
+            return True
+        self._checked_at = now
+        return generation == self._generation
+
+    def get(self):
+        """Return the current :class:`CacheEntry`, reloading it if stale."""
+        now = time.monotonic()
+        entry = self._entry
+        if entry is not None and self._is_fresh(now):
+            return entry
+
+        with self._lock:
+            now = time.monotonic()
+            if self._entry is not None and entry is not self._entry and now < self._expiry:
+                return self._entry  # another thread refilled while we waited
+            with get_db() as conn:
+                generation = read_generation(conn, self.name)
+                value = self._loader(conn)
+            self._entry = CacheEntry(value, self._serializer(value), generation)
+            self._generation = generation
+            self._expiry = now + self.ttl
+            self._checked_at = now
+            return self._entry
+
+    def invalidate(self, conn=None):
+        """Bump the shared generation (in ``conn``'s transaction if given) and drop the local copy."""
+        if conn is None:
+            with get_db() as own_conn:
+                bump_generation(own_conn, self.name)
+                own_conn.commit()
+        else:
+            bump_generation(conn, self.name)
+        with self._lock:
+            self._entry = None
+            self._expiry = 0.0
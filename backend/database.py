@@ -0,0 +1,372 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.environ.get("MOODMATE_DB_PATH") or os.path.join(BASE_DIR, "moodmate.db")
+DATABASE_URL = os.environ.get("DATABASE_URL")
+IS_POSTGRES = bool(DATABASE_URL and DATABASE_URL.startswith("postgres"))
+# Auto-assigned integer key; SQLite only does that for an INTEGER PRIMARY KEY rowid alias.
+AUTO_ID = "id SERIAL PRIMARY KEY" if IS_POSTGRES else "id INTEGER PRIMARY KEY AUTOINCREMENT"
+
+POOL_MIN_SIZE = int(os.getenv("MOODMATE_DB_POOL_MIN", "1"))
+POOL_MAX_SIZE = int(os.getenv("MOODMATE_DB_POOL_MAX", "10"))
+POOL_TIMEOUT = float(os.getenv("MOODMATE_DB_POOL_TIMEOUT", "30"))
+# Idle connections older than this are pinged before being handed out (0 = always ping).
+POOL_HEALTHCHECK_INTERVAL = float(os.getenv("MOODMATE_DB_POOL_HEALTHCHECK_INTERVAL", "30"))
+
+# Applied to every SQLite connection. WAL lets readers run alongside the single
+# writer, and busy_timeout makes a second writer wait instead of failing with
+# "database is locked". synchronous=NORMAL is durable against application
+# crashes under WAL; a power loss can drop only the last few commits.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("MOODMATE_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("MOODMATE_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("MOODMATE_SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(float(os.getenv("MOODMATE_SQLITE_MMAP_MB", "256")) * 1024 * 1024),
+    "cache_size": -int(float(os.getenv("MOODMATE_SQLITE_CACHE_MB", "32")) * 1024),  # negative = KiB
+    "temp_store": "MEMORY",
+    "journal_size_limit": 64 * 1024 * 1024,  # truncate the WAL back to this after checkpoints
+}
+SQLITE_CHECKPOINT_INTERVAL = float(os.getenv("MOODMATE_SQLITE_CHECKPOINT_INTERVAL", "60"))
+SQLITE_OPTIMIZE_INTERVAL = float(os.getenv("MOODMATE_SQLITE_OPTIMIZE_INTERVAL", "3600"))
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the pool timeout."""
+
+
+def apply_sqlite_pragmas(conn, pragmas=None):
+    for name, value in (SQLITE_PRAGMAS if pragmas is None else pragmas).items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def connect_sqlite():
+    # Write transactions start with BEGIN IMMEDIATE so they queue on busy_timeout for
+    # the write lock. A deferred BEGIN that reads first fails at once with "database
+    # is locked" under WAL when another writer committed in between.
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=SQLITE_PRAGMAS["busy_timeout"] / 1000,
+                           isolation_level="IMMEDIATE")
+    conn.row_factory = sqlite3.Row
+    apply_sqlite_pragmas(conn)
+    return conn
+
+
+def sync_id_sequence(conn, table):
+    """Move ``table``'s SERIAL sequence past its largest id once rows were written with explicit ids.
+
+    Otherwise the next insert that leaves ``id`` out draws an id that is
+    already taken. SQLite's AUTOINCREMENT tracks the largest id itself.
+    """
+    if not IS_POSTGRES:
+        return
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 0) + 1 FROM {table}), false)")
+
+
+def connect_postgres():
+    import psycopg2
+    from psycopg2.extras import RealDictCursor
+    return psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
+
+
+class ConnectionPool:
+    """Thread-safe, fork-aware pool of DB-API connections.
+
+    Connections are handed out LIFO so the hottest connection is reused first,
+    rolled back when returned, and pinged on checkout once they have been idle
+    longer than ``healthcheck_interval``. After a fork the child drops every
+    inherited connection (without closing the parent's sockets) and starts over.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=30.0, healthcheck_interval=30.0):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+        self._orphans = []
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _reset(self):
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._warmed = False
+        self._pid = os.getpid()
+        self._wait_samples = deque(maxlen=1024)
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "healthcheck_failures": 0,
+            "wait_total_ms": 0.0,
+            "wait_max_ms": 0.0,
+        }
+
+    def _after_fork(self):
+        # Closing an inherited connection would tear down the parent's session,
+        # so keep the objects alive and simply stop using them.
+        self._orphans.extend(conn for conn, _ in self._idle)
+        self._reset()
+
+    def _warm(self):
+        # Reserve the slots under the lock but connect without it, so a slow
+        # server never blocks threads that only want to return a connection.
+        with self._cond:
+            if self._warmed:
+                return
+            self._warmed = True
+            wanted = max(0, self.min_size - self._size)
+            self._size += wanted
+        conns = []
+        for _ in range(wanted):
+            try:
+                conns.append(self._connect())
+            except Exception:
+                break
+        with self._cond:
+            now = time.monotonic()
+            self._idle.extend((conn, now) for conn in conns)
+            self._size -= wanted - len(conns)
+            self._stats["connections_created"] += len(conns)
+            self._cond.notify_all()
+
+    def _is_healthy(self, conn):
+        try:
+            if getattr(conn, "closed", 0):
+                return False
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def getconn(self):
+        if self._pid != os.getpid():
+            self._after_fork()
+
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        if not self._warmed:
+            self._warm()
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(f"No database connection available within {self.timeout:.1f}s")
+                self._cond.wait(remaining)
+
+        try:
+            if conn is not None and time.monotonic() - last_used >= self.healthcheck_interval:
+                if not self._is_healthy(conn):
+                    with self._cond:
+                        self._stats["healthcheck_failures"] += 1
+                        self._stats["connections_discarded"] += 1
+                    self._close_quietly(conn)
+                    conn = None
+            if conn is None:
+                conn = self._connect()
+                with self._cond:
+                    self._stats["connections_created"] += 1
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        waited_ms = (time.perf_counter() - started) * 1000
+        with self._cond:
+            self._stats["checkouts"] += 1
+            self._stats["wait_total_ms"] += waited_ms
+            self._stats["wait_max_ms"] = max(self._stats["wait_max_ms"], waited_ms)
+            self._wait_samples.append(waited_ms)
+        return conn
+
+    def putconn(self, conn, discard=False):
+        if self._pid != os.getpid():
+            # Checked out before a fork; it belongs to the parent now.
+            self._orphans.append(conn)
+            return
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+        if discard:
+            self._close_quietly(conn)
+        with self._cond:
+            if discard:
+                self._size -= 1
+                self._stats["connections_discarded"] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._close_quietly(conn)
+                self._size -= 1
+            self._warmed = False
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            samples = sorted(self._wait_samples)
+            checkouts = self._stats["checkouts"]
+            stats = dict(self._stats)
+            stats.update({
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "wait_avg_ms": stats["wait_total_ms"] / checkouts if checkouts else 0.0,
+                "wait_p50_ms": samples[len(samples) // 2] if samples else 0.0,
+                "wait_p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))] if samples else 0.0,
+            })
+        return stats
+
+
+pool = ConnectionPool(
+    connect_postgres if IS_POSTGRES else connect_sqlite,
+    min_size=POOL_MIN_SIZE,
+    max_size=POOL_MAX_SIZE,
+    timeout=POOL_TIMEOUT,
+    healthcheck_interval=POOL_HEALTHCHECK_INTERVAL,
+)
+
+
+@contextmanager
+def get_db():
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+
+class SqliteMaintenance:
+    """Background thread that checkpoints the WAL and refreshes planner statistics.
+
+    SQLite only checkpoints when a commit pushes the WAL past 1000 pages, so a
+    quiet database can keep a large WAL around and every reader has to search
+    it. A PASSIVE checkpoint every ``checkpoint_interval`` seconds never waits
+    on readers or writers. ``PRAGMA optimize`` runs every ``optimize_interval``
+    seconds and re-analyzes only tables whose statistics are stale.
+    """
+
+    def __init__(self, checkpoint_interval=SQLITE_CHECKPOINT_INTERVAL, optimize_interval=SQLITE_OPTIMIZE_INTERVAL,
+                 connect=None, clock=time.monotonic):
+        self.checkpoint_interval = checkpoint_interval
+        self.optimize_interval = optimize_interval
+        self._connect = connect or get_db
+        self._clock = clock
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._optimized_at = None
+        self.checkpoints = 0
+        self.frames_checkpointed = 0
+        self.busy_checkpoints = 0
+        self.optimizes = 0
+        self.failures = 0
+        self.last_wal_frames = 0
+
+    def checkpoint(self):
+        with self._connect() as conn:
+            busy, frames, checkpointed = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        self.checkpoints += 1
+        self.busy_checkpoints += 1 if busy else 0
+        # -1 means the database is not in WAL mode.
+        self.last_wal_frames = max(frames, 0)
+        self.frames_checkpointed += max(checkpointed, 0)
+
+    def optimize(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA analysis_limit = 400")  # bounded sampling keeps this to milliseconds
+            conn.execute("PRAGMA optimize")
+        self.optimizes += 1
+        self._optimized_at = self._clock()
+
+    def run_once(self):
+        try:
+            self.checkpoint()
+            if self._optimized_at is None or self._clock() - self._optimized_at >= self.optimize_interval:
+                self.optimize()
+        except Exception as e:
+            self.failures += 1
+            print(f"SQLite maintenance error: {e}", flush=True)
+
+    def _loop(self):
+        while not self._stop.wait(self.checkpoint_interval):
+            self.run_once()
+
+    def start(self):
+        if IS_POSTGRES:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name="sqlite-maintenance", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        try:
+            self.optimize()  # what SQLite recommends before a long-lived connection closes
+        except Exception:
+            pass
+
+    def stats(self):
+        return {
+            "pragmas": SQLITE_PRAGMAS,
+            "checkpoints": self.checkpoints,
+            "busy_checkpoints": self.busy_checkpoints,
+            "frames_checkpointed": self.frames_checkpointed,
+            "last_wal_frames": self.last_wal_frames,
+            "optimizes": self.optimizes,
+            "failures": self.failures,
+        }
+
+
+sqlite_maintenance = SqliteMaintenance()
+atexit.register(sqlite_maintenance.stop)
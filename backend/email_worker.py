@@ -0,0 +1,18 @@
+"""
+Standalone email outbox worker.
+
+Run with EMAIL_WORKER=off on the web service so only this process delivers mail:
+    python email_worker.py
+"""
+import time
+
+from services.email_service import email_worker
+
+if __name__ == "__main__":
+    print("Email outbox worker running. Ctrl+C to stop.", flush=True)
+    email_worker.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        email_worker.stop()
@@ -0,0 +1,476 @@
+"""
+Versioned schema migrations.
+
+Every migration has a version, a name and a list of steps (SQL statements,
+``Column`` additions or ``Index`` definitions). ``migrate()`` applies the ones a database has not seen
+yet, in order, and records each in ``schema_migrations`` with a checksum of its
+statements. Editing a migration that already ran changes its checksum and
+stops the boot; change the schema by appending a new migration instead.
+
+On SQLite a migration runs in one transaction. On PostgreSQL indexes are built
+with ``CREATE INDEX CONCURRENTLY`` after the migration's other statements
+commit, so a large table keeps taking writes during the build; every step
+therefore has to be safe to run twice (``IF NOT EXISTS``).
+
+Run from the backend directory:
+    python migrations.py            # apply pending migrations
+    python migrations.py --status   # list applied and pending migrations
+"""
+
+import argparse
+import hashlib
+from contextlib import contextmanager
+
+from cache import CREATE_CACHE_VERSIONS_SQL
+from database import AUTO_ID, IS_POSTGRES, get_db
+from services.conversation_context import CREATE_CHAT_SUMMARIES_SQL
+from services.email_outbox import CREATE_EMAIL_OUTBOX_SQL
+from services.schema_state import CREATE_SCHEMA_STATE_SQL
+from services.user_counters import CREATE_COUNTER_DELTAS_SQL
+
+PLACEHOLDER = "%s" if IS_POSTGRES else "?"
+# Any constant works; it only has to be the same in every worker.
+_MIGRATION_LOCK_ID = 720_022
+
+CREATE_SCHEMA_MIGRATIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        checksum TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+class MigrationError(Exception):
+    """Raised when an applied migration no longer matches its definition."""
+
+
+class Index:
+    """A ``CREATE INDEX`` step; built online (CONCURRENTLY) on PostgreSQL."""
+
+    def __init__(self, name, table, columns, unique=False):
+        self.name = name
+        self.table = table
+        self.columns = columns
+        self.unique = unique
+
+    def sql(self, concurrently=False):
+        return (
+            f"CREATE {'UNIQUE ' if self.unique else ''}INDEX {'CONCURRENTLY ' if concurrently else ''}"
+            f"IF NOT EXISTS {self.name} ON {self.table} ({self.columns})"
+        )
+
+
+class Column:
+    """An ``ALTER TABLE ... ADD COLUMN`` step that is skipped when the column already exists."""
+
+    def __init__(self, table, name, definition):
+        self.table = table
+        self.name = name
+        self.definition = definition
+
+    def sql(self):
+        return f"ALTER TABLE {self.table} ADD COLUMN {'IF NOT EXISTS ' if IS_POSTGRES else ''}{self.name} {self.definition}"
+
+    def exists(self, conn):
+        if IS_POSTGRES:
+            return False  # ADD COLUMN IF NOT EXISTS
+        return any(row["name"] == self.name for row in conn.execute(f"PRAGMA table_info({self.table})").fetchall())
+
+
+class Migration:
+    def __init__(self, version, name, steps):
+        self.version = version
+        self.name = name
+        self.steps = steps
+
+    def statements(self):
+        return [step if isinstance(step, str) else step.sql() for step in self.steps]
+
+    @property
+    def checksum(self):
+        statements = (" ".join(statement.split()) for statement in self.statements())
+        return hashlib.sha256("\n".join(statements).encode("utf-8")).hexdigest()
+
+
+MIGRATIONS = [
+    Migration(1, "baseline", [
+        f"""
+        CREATE TABLE IF NOT EXISTS chat_history (
+            {AUTO_ID},
+            session_id TEXT NOT NULL DEFAULT 'default_session',
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            mood_detected TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        CREATE_CHAT_SUMMARIES_SQL,
+        CREATE_EMAIL_OUTBOX_SQL,
+        f"""
+        CREATE TABLE IF NOT EXISTS users (
+            {AUTO_ID},
+            username TEXT NOT NULL,
+            email TEXT UNIQUE,
+            phone TEXT UNIQUE,
+            password_hash TEXT NOT NULL,
+            coins INTEGER DEFAULT 100,
+            streak INTEGER DEFAULT 0,
+            last_mood_tag TEXT,
+            premium_plan TEXT DEFAULT 'free',
+            premium_expiry DATE,
+            owned_items TEXT DEFAULT '[]',
+            current_theme TEXT DEFAULT 'default',
+            current_avatar TEXT DEFAULT 'default',
+            achievements TEXT DEFAULT '[]',
+            login_streak INTEGER DEFAULT 0,
+            last_login DATE,
+            role TEXT DEFAULT 'free'
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS doctors (
+            {AUTO_ID},
+            name TEXT NOT NULL,
+            initials TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            specialization TEXT NOT NULL,
+            experience_years INTEGER DEFAULT 0,
+            languages_json TEXT DEFAULT '[]',
+            modes_json TEXT DEFAULT '[]',
+            price_per_session INTEGER DEFAULT 0,
+            rating REAL DEFAULT 0,
+            reviews_count INTEGER DEFAULT 0,
+            badge TEXT DEFAULT '',
+            bio TEXT DEFAULT '',
+            license_info TEXT DEFAULT '',
+            qualifications_json TEXT DEFAULT '[]',
+            approaches_json TEXT DEFAULT '[]',
+            focus_areas_json TEXT DEFAULT '[]',
+            best_for TEXT DEFAULT '',
+            first_session TEXT DEFAULT '',
+            cancellation_policy TEXT DEFAULT '',
+            review_summary TEXT DEFAULT '',
+            availability_json TEXT DEFAULT '[]',
+            photo_url TEXT DEFAULT '',
+            is_verified INTEGER DEFAULT 0,
+            profile_source TEXT DEFAULT 'sample',
+            profile_status TEXT DEFAULT 'active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS therapeutic_notes (
+            {AUTO_ID},
+            user_id INTEGER,
+            doctor_id INTEGER,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS therapy_bookings (
+            {AUTO_ID},
+            user_id INTEGER,
+            doctor_id INTEGER NOT NULL,
+            doctor_name TEXT NOT NULL,
+            patient_name TEXT NOT NULL,
+            patient_age TEXT,
+            patient_gender TEXT,
+            patient_phone TEXT NOT NULL,
+            concern TEXT NOT NULL,
+            slot TEXT NOT NULL,
+            session_mode TEXT,
+            session_price INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'new',
+            doctor_notes TEXT DEFAULT '',
+            token_id TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS daily_checkins (
+            {AUTO_ID},
+            user_id INTEGER NOT NULL,
+            date DATE DEFAULT CURRENT_DATE,
+            mood_tag TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS community_posts (
+            {AUTO_ID},
+            author_user_id INTEGER,
+            mood_tag TEXT NOT NULL,
+            content TEXT NOT NULL,
+            visibility_status TEXT DEFAULT 'visible',
+            moderation_note TEXT DEFAULT '',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS community_reactions (
+            {AUTO_ID},
+            post_id INTEGER NOT NULL,
+            reaction_type TEXT NOT NULL,
+            count INTEGER DEFAULT 0
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS community_reports (
+            {AUTO_ID},
+            post_id INTEGER NOT NULL,
+            reporter_user_id INTEGER NOT NULL,
+            reason TEXT NOT NULL,
+            details TEXT DEFAULT '',
+            status TEXT DEFAULT 'open',
+            resolution_note TEXT DEFAULT '',
+            reviewed_by_user_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            {AUTO_ID},
+            actor_type TEXT NOT NULL,
+            actor_id INTEGER,
+            action TEXT NOT NULL,
+            entity_type TEXT,
+            entity_id INTEGER,
+            status TEXT DEFAULT 'success',
+            details_json TEXT DEFAULT '{{}}',
+            ip_address TEXT,
+            user_agent TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        CREATE_CACHE_VERSIONS_SQL,
+        CREATE_SCHEMA_STATE_SQL,
+        # schema_state used to carry a hand-bumped schema version; seeds still use it.
+        "DELETE FROM schema_state WHERE name = 'schema'",
+        f"""
+        CREATE TABLE IF NOT EXISTS analytics (
+            {AUTO_ID},
+            metric_name TEXT NOT NULL,
+            metric_value REAL NOT NULL,
+            date DATE DEFAULT CURRENT_DATE,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        CREATE_COUNTER_DELTAS_SQL,
+        # Databases created before these columns existed (CREATE TABLE IF NOT EXISTS kept the old shape).
+        Column("users", "premium_expiry", "DATE"),
+        Column("users", "current_avatar", "TEXT DEFAULT 'default'"),
+        Column("users", "achievements", "TEXT DEFAULT '[]'"),
+        Column("users", "login_streak", "INTEGER DEFAULT 0"),
+        Column("therapy_bookings", "token_id", "TEXT"),
+        Column("community_posts", "author_user_id", "INTEGER"),
+        Column("community_posts", "visibility_status", "TEXT DEFAULT 'visible'"),
+        Column("community_posts", "moderation_note", "TEXT DEFAULT ''"),
+        Index("idx_users_email", "users", "email"),
+        Index("idx_doctors_rating", "doctors", "rating DESC"),
+        Index("idx_bookings_user", "therapy_bookings", "user_id"),
+        # (session_id, id) serves both session lookups and "latest turns" scans; it replaces idx_chat_session.
+        Index("idx_chat_session_id", "chat_history", "session_id, id"),
+        "DROP INDEX IF EXISTS idx_chat_session",
+        Index("idx_posts_feed", "community_posts", "visibility_status, created_at DESC, id DESC"),
+        Index("idx_reactions_post", "community_reactions", "post_id"),
+        Index("idx_email_outbox_due", "email_outbox", "status, next_attempt_at"),
+        Index("idx_counter_deltas_user", "counter_deltas", "user_id"),
+    ]),
+    Migration(2, "password_reset_otps", [
+        f"""
+        CREATE TABLE IF NOT EXISTS password_reset_otps (
+            {AUTO_ID},
+            user_id INTEGER NOT NULL,
+            otp_code TEXT NOT NULL,
+            expires_at TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        Index("idx_reset_otps_user", "password_reset_otps", "user_id, created_at"),
+    ]),
+    Migration(3, "lookup_indexes", [
+        # These used to exist only where someone had run optimize_db.py.
+        Index("idx_bookings_doctor", "therapy_bookings", "doctor_id"),
+        Index("idx_checkins_user", "daily_checkins", "user_id"),
+        Index("idx_reports_post", "community_reports", "post_id"),
+        # The directory lists active doctors by rating.
+        Index("idx_doctors_directory", "doctors", "profile_status, rating DESC"),
+    ]),
+    Migration(4, "premium_catalog", [
+        f"""
+        CREATE TABLE IF NOT EXISTS premium_subscriptions (
+            {AUTO_ID},
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            plan TEXT NOT NULL,
+            subscribed_date TEXT NOT NULL,
+            expiry_date TEXT,
+            status TEXT DEFAULT 'active'
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS premium_features (
+            {AUTO_ID},
+            name TEXT UNIQUE NOT NULL,
+            description TEXT,
+            required_plan TEXT NOT NULL
+        )
+        """,
+    ]),
+    Migration(5, "chat_owner", [
+        # Conversation context is only ever loaded for the signed-in user who wrote it.
+        Column("chat_history", "user_id", "INTEGER"),
+        Column("chat_summaries", "user_id", "INTEGER"),
+        Index("idx_chat_session_owner", "chat_history", "session_id, user_id, id"),
+    ]),
+    Migration(6, "chat_summaries_owner_key", [
+        # One summary per (session, owner): a second user on the same session_id gets their own row.
+        # Rows without an owner were never read back, so they are not carried over.
+        """
+        CREATE TABLE chat_summaries_by_owner (
+            session_id TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            summary TEXT NOT NULL,
+            covered_until INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (session_id, user_id)
+        )
+        """,
+        """
+        INSERT INTO chat_summaries_by_owner (session_id, user_id, summary, covered_until, updated_at)
+        SELECT session_id, user_id, summary, covered_until, updated_at FROM chat_summaries WHERE user_id IS NOT NULL
+        """,
+        "DROP TABLE chat_summaries",
+        "ALTER TABLE chat_summaries_by_owner RENAME TO chat_summaries",
+    ]),
+]
+
+
+def read_applied(conn):
+    """``{version: checksum}`` of the migrations recorded in this database."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT version, checksum FROM schema_migrations")
+    except Exception:
+        conn.rollback()  # table not there yet (Postgres also needs the aborted transaction cleared)
+        return {}
+    return {row["version"]: row["checksum"] for row in cursor.fetchall()}
+
+
+def verify(applied, migrations):
+    for migration in migrations:
+        if migration.version in applied and applied[migration.version] != migration.checksum:
+            raise MigrationError(
+                f"Migration {migration.version} ({migration.name}) was edited after it was applied; "
+                "add a new migration instead"
+            )
+
+
+@contextmanager
+def _migration_lock(conn):
+    """Keep two PostgreSQL workers from migrating at once; SQLite serializes on BEGIN IMMEDIATE."""
+    if not IS_POSTGRES:
+        yield
+        return
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT pg_advisory_lock({_MIGRATION_LOCK_ID})")
+    try:
+        yield
+    finally:
+        conn.rollback()
+        conn.autocommit = False
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT pg_advisory_unlock({_MIGRATION_LOCK_ID})")
+        conn.commit()
+
+
+def _build_indexes_concurrently(conn, indexes):
+    conn.commit()
+    conn.autocommit = True  # CONCURRENTLY refuses to run inside a transaction
+    try:
+        cursor = conn.cursor()
+        for index in indexes:
+            # A failed concurrent build leaves an INVALID index behind that IF NOT EXISTS would keep.
+            cursor.execute(
+                "SELECT i.indisvalid AS valid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid WHERE c.relname = %s",
+                (index.name,),
+            )
+            row = cursor.fetchone()
+            if row and not row["valid"]:
+                cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}")
+            cursor.execute(index.sql(concurrently=True))
+    finally:
+        conn.autocommit = False
+
+
+def apply_migration(conn, migration):
+    cursor = conn.cursor()
+    online = []
+    for step in migration.steps:
+        if isinstance(step, Index) and IS_POSTGRES:
+            online.append(step)
+            continue
+        if isinstance(step, Column) and step.exists(conn):
+            continue
+        cursor.execute(step if isinstance(step, str) else step.sql())
+    if online:
+        _build_indexes_concurrently(conn, online)
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        INSERT INTO schema_migrations (version, name, checksum) VALUES ({PLACEHOLDER}, {PLACEHOLDER}, {PLACEHOLDER})
+        ON CONFLICT(version) DO UPDATE SET name = excluded.name, checksum = excluded.checksum, applied_at = CURRENT_TIMESTAMP
+        """,
+        (migration.version, migration.name, migration.checksum),
+    )
+    conn.commit()
+
+
+def migrate(conn, migrations=None):
+    """Apply pending migrations in version order; returns the names that ran."""
+    migrations = sorted(MIGRATIONS if migrations is None else migrations, key=lambda migration: migration.version)
+    applied = read_applied(conn)
+    verify(applied, migrations)
+    if all(migration.version in applied for migration in migrations):
+        return []
+
+    cursor = conn.cursor()
+    cursor.execute(CREATE_SCHEMA_MIGRATIONS_SQL)
+    conn.commit()
+    ran = []
+    with _migration_lock(conn):
+        for migration in migrations:
+            if not IS_POSTGRES:
+                conn.execute("BEGIN IMMEDIATE")  # DDL included, so a failed migration leaves nothing behind
+            applied = read_applied(conn)  # another worker may have got here first
+            verify(applied, [migration])
+            if migration.version in applied:
+                conn.rollback()
+                continue
+            try:
+                apply_migration(conn, migration)
+            except Exception:
+                conn.rollback()
+                raise
+            ran.append(migration.name)
+    return ran
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="list migrations without applying them")
+    args = parser.parse_args()
+    with get_db() as conn:
+        if args.status:
+            applied = read_applied(conn)
+            for migration in MIGRATIONS:
+                print(f"{migration.version:>4}  {'applied' if migration.version in applied else 'pending':<8} {migration.name}")
+        else:
+            ran = migrate(conn)
+            print(f"Applied: {', '.join(ran)}" if ran else "Schema up to date.", flush=True)
@@ -0,0 +1,165 @@
+"""
+SQL statements declared once and compiled for the active database at import.
+
+A ``Statement`` is written with ``:name`` parameters. At import it is compiled
+to the driver's placeholder style (``?`` for sqlite3, ``%s`` for psycopg2), so
+handlers stop building SQL strings per request. Statements declared with
+``prepare=True`` are server-side prepared on PostgreSQL: the first use on a
+connection sends ``PREPARE``, and later uses send only ``EXECUTE`` with the
+values, which skips parsing and planning.
+"""
+
+import os
+import re
+import threading
+import weakref
+
+from database import IS_POSTGRES
+
+PLACEHOLDER = "%s" if IS_POSTGRES else "?"
+# Turn off behind a transaction-mode pooler (PgBouncer, Supabase's port 6543): the
+# server connection changes between transactions and takes its prepared statements with it.
+PREPARE_STATEMENTS = os.getenv("MOODMATE_PG_PREPARE", "true").lower() == "true"
+
+_PARAM = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")  # :name, but not a ::cast
+_prepared = weakref.WeakKeyDictionary()  # connection -> names prepared on it
+_prepared_lock = threading.Lock()
+
+
+class Statement:
+    def __init__(self, name, sql, postgres=None, prepare=False):
+        self.name = name
+        sql = " ".join((postgres if IS_POSTGRES and postgres else sql).split())
+        self.params = _PARAM.findall(sql)  # one entry per placeholder, repeats included
+        self.sql = _PARAM.sub(PLACEHOLDER, sql)
+        self.prepared = prepare and IS_POSTGRES and PREPARE_STATEMENTS
+        if self.prepared:
+            # A repeated name becomes one $n, so EXECUTE sends each value once.
+            self._unique = list(dict.fromkeys(self.params))
+            numbered = _PARAM.sub(lambda match: f"${self._unique.index(match.group(1)) + 1}", sql)
+            self._prepare_sql = f"PREPARE {name} AS {numbered}"
+            self._execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * len(self._unique))})" if self._unique else f"EXECUTE {name}"
+
+    def bind(self, params):
+        return tuple(params[name] for name in self.params)
+
+    def execute(self, conn, **params):
+        """Run with keyword parameters; returns the cursor."""
+        cursor = conn.cursor()
+        if self.prepared:
+            with _prepared_lock:
+                names = _prepared.setdefault(conn, set())
+            if self.name not in names:
+                cursor.execute(self._prepare_sql)
+                names.add(self.name)
+            cursor.execute(self._execute_sql, tuple(params[name] for name in self._unique))
+        else:
+            cursor.execute(self.sql, self.bind(params))
+        return cursor
+
+    def fetchone(self, conn, **params):
+        return self.execute(conn, **params).fetchone()
+
+    def executemany(self, conn, rows):
+        """Run once per mapping in ``rows``; psycopg2 sends them in pages rather than one round trip each."""
+        cursor = conn.cursor()
+        values = [self.bind(row) for row in rows]
+        if IS_POSTGRES:
+            from psycopg2.extras import execute_batch
+            execute_batch(cursor, self.sql, values, page_size=500)
+        else:
+            cursor.executemany(self.sql, values)
+        return cursor
+
+
+USER_BY_ID = Statement("user_by_id", "SELECT * FROM users WHERE id = :id", prepare=True)
+USER_BY_LOGIN = Statement("user_by_login", "SELECT * FROM users WHERE email = :login OR phone = :login", prepare=True)
+USER_ID_BY_LOGIN = Statement("user_id_by_login", "SELECT id FROM users WHERE email = :login OR phone = :login", prepare=True)
+USERNAME_TAKEN = Statement("username_taken", "SELECT 1 FROM users WHERE username = :username")
+EMAIL_TAKEN = Statement("email_taken", "SELECT 1 FROM users WHERE email = :email")
+PHONE_TAKEN = Statement("phone_taken", "SELECT 1 FROM users WHERE phone = :phone")
+INSERT_USER = Statement(
+    "insert_user",
+    "INSERT INTO users (username, email, phone, password_hash, premium_plan) "
+    "VALUES (:username, :email, :phone, :password_hash, :premium_plan)",
+    postgres="INSERT INTO users (username, email, phone, password_hash, premium_plan) "
+             "VALUES (:username, :email, :phone, :password_hash, :premium_plan) RETURNING id",
+)
+INSERT_CHAT_MESSAGE = Statement(
+    "insert_chat_message",
+    "INSERT INTO chat_history (session_id, user_id, role, content, mood_detected) VALUES (:session_id, :user_id, :role, :content, :mood)",
+    prepare=True,
+)
+UPSERT_DOCTOR = Statement(
+    "upsert_doctor",
+    """
+    INSERT INTO doctors (
+        id, name, initials, email, password_hash, specialization, experience_years,
+        languages_json, modes_json, price_per_session, rating, reviews_count,
+        badge, bio, license_info, qualifications_json, approaches_json,
+        focus_areas_json, best_for, first_session, cancellation_policy,
+        review_summary, availability_json, photo_url, is_verified,
+        profile_source, profile_status
+    )
+    VALUES (
+        :id, :name, :initials, :email, :password_hash, :specialization, :experience_years,
+        :languages, :modes, :price_per_session, :rating, :reviews_count,
+        :badge, :bio, :license_info, :qualifications, :approaches,
+        :focus_areas, :best_for, :first_session, :cancellation_policy,
+        :review_summary, :availability, :photo_url, 1,
+        :profile_source, 'active'
+    )
+    ON CONFLICT(id) DO UPDATE SET
+        name = excluded.name, email = excluded.email, bio = excluded.bio,
+        is_verified = excluded.is_verified, profile_source = excluded.profile_source
+    """,
+)
+USER_ID_BY_EMAIL = Statement("user_id_by_email", "SELECT id FROM users WHERE email = :email")
+USER_EMAIL = Statement("user_email", "SELECT email FROM users WHERE id = :id")
+USER_EXPORT_PROFILE = Statement("user_export_profile", "SELECT username, email, coins, streak FROM users WHERE id = :id")
+UPDATE_ADMIN = Statement(
+    "update_admin",
+    "UPDATE users SET username = :username, password_hash = :password_hash, role = 'admin' WHERE id = :id",
+)
+INSERT_ADMIN = Statement(
+    "insert_admin",
+    "INSERT INTO users (username, email, phone, password_hash, premium_plan, role) "
+    "VALUES (:username, :email, :phone, :password_hash, 'annual', 'admin')",
+)
+SET_PREMIUM_PLAN = Statement("set_premium_plan", "UPDATE users SET premium_plan = :plan, role = 'premium' WHERE id = :id")
+DELETE_USER_BOOKINGS = Statement("delete_user_bookings", "DELETE FROM therapy_bookings WHERE user_id = :user_id")
+DELETE_USER_CHECKINS = Statement("delete_user_checkins", "DELETE FROM daily_checkins WHERE user_id = :user_id")
+DELETE_USER_COUNTER_DELTAS = Statement("delete_user_counter_deltas", "DELETE FROM counter_deltas WHERE user_id = :user_id")
+DELETE_USER = Statement("delete_user", "DELETE FROM users WHERE id = :user_id")
+
+# Every open Community page polls the first page, so both feed queries are prepared.
+COMMUNITY_FEED = Statement(
+    "community_feed",
+    "SELECT * FROM community_posts WHERE visibility_status = 'visible' ORDER BY created_at DESC, id DESC LIMIT :limit",
+    prepare=True,
+)
+COMMUNITY_FEED_AFTER = Statement(
+    "community_feed_after",
+    "SELECT * FROM community_posts WHERE visibility_status = 'visible' AND (created_at, id) < (:created_at, :id) "
+    "ORDER BY created_at DESC, id DESC LIMIT :limit",
+    prepare=True,
+)
+INSERT_COMMUNITY_POST = Statement(
+    "insert_community_post",
+    "INSERT INTO community_posts (author_user_id, mood_tag, content, visibility_status, moderation_note) "
+    "VALUES (:user_id, :mood_tag, :content, :visibility, :moderation_note)",
+)
+
+INSERT_BOOKING = Statement(
+    "insert_booking",
+    "INSERT INTO therapy_bookings (user_id, doctor_id, doctor_name, patient_name, patient_phone, concern, slot, "
+    "session_mode, session_price, status) VALUES (:user_id, :doctor_id, :doctor_name, :patient_name, :patient_phone, "
+    ":concern, :slot, :session_mode, 0, 'new')",
+)
+BOOKINGS_FOR_USER = Statement(
+    "bookings_for_user", "SELECT * FROM therapy_bookings WHERE user_id = :user_id ORDER BY created_at DESC",
+)
+SET_DOCTOR_STATUS = Statement(
+    "set_doctor_status",
+    "UPDATE doctors SET is_verified = :is_verified, profile_status = :status, updated_at = CURRENT_TIMESTAMP WHERE id = :id",
+)
@@ -0,0 +1,26 @@
+"""
+Apply the sample doctors and default admin seeds.
+
+The web process only seeds on boot when MOODMATE_SEED_ON_BOOT is on (the
+default); deployments that turn it off run this from a release step:
+    python seed_db.py            # seed sets whose fingerprint changed
+    python seed_db.py --force    # re-apply every seed set
+"""
+import argparse
+import os
+
+# A one-off command needs neither the background mailer nor a hashing pool.
+os.environ.setdefault("EMAIL_WORKER", "off")
+os.environ.setdefault("PASSWORD_HASH_MODE", "inline")
+os.environ["MOODMATE_SEED_ON_BOOT"] = "false"
+
+from app import seed_database  # noqa: E402
+from database import get_db  # noqa: E402
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="re-apply seeds even if unchanged")
+    args = parser.parse_args()
+    with get_db() as conn:
+        ran = seed_database(conn, force=args.force)
+    print(f"Seeded: {', '.join(ran)}" if ran else "Seeds already up to date.", flush=True)
@@ -0,0 +1,208 @@
+import asyncio
+import os
+import time
+import weakref
+from functools import lru_cache
+
+from services.ai_service import (
+    AI_CHAT_BUDGET,
+    AI_HEDGE_DELAY,
+    GROQ_API_KEY,
+    GROQ_MODEL,
+    OLLAMA_MODEL,
+    OLLAMA_URL,
+    PROVIDER_BREAKERS,
+    PROVIDER_TIMEOUTS,
+    build_context,
+    cached_ai_response,
+    get_gemini_model,
+    get_groq_client,
+    generate_heuristic_fallback,
+    get_provider_chain,
+    get_system_prompt,
+    safe_log,
+)
+from services.response_cache import response_cache
+
+# Async twins of the provider calls in ai_service. They hold no thread while the
+# upstream is thinking, so one event loop can keep hundreds of chats in flight.
+
+@lru_cache(maxsize=None)
+def get_async_groq_client():
+    if not GROQ_API_KEY:
+        return None
+    try:
+        from groq import AsyncGroq
+        return AsyncGroq(api_key=GROQ_API_KEY)
+    except Exception as e:
+        safe_log(f"[AI Async] Groq async client initialization failed: {e}")
+        return None
+
+
+def warm_provider_clients():
+    """Import and build the provider SDK clients now. Run it in a thread when the server starts."""
+    get_gemini_model()
+    get_groq_client()  # get_provider_chain checks the sync client to decide whether Groq is configured
+    get_async_groq_client()
+
+
+async def _provider_client(factory):
+    """``factory()`` from its cache, or from a worker thread on the first call, whose SDK import blocks."""
+    if factory.cache_info().currsize:
+        return factory()
+    return await asyncio.to_thread(factory)
+
+_http_clients = weakref.WeakKeyDictionary()  # event loop -> httpx.AsyncClient
+
+
+def _http_client():
+    """One pooled HTTP client per event loop (httpx connections are loop-bound)."""
+    import httpx
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(limits=httpx.Limits(max_connections=int(os.getenv("AI_ASYNC_MAX_CONNECTIONS", "200"))))
+        _http_clients[loop] = client
+    return client
+
+
+async def gemini_response_async(user_message: str, context: str = "", timeout: float = None) -> str:
+    gemini_model = await _provider_client(get_gemini_model)
+    if not gemini_model:
+        return ""
+    try:
+        prompt = f"{get_system_prompt()}\n\n{context}User: {user_message}\n\nMoodMate:"
+        response = await gemini_model.generate_content_async(prompt)
+        if response and response.text:
+            return response.text.strip()
+    except Exception as e:
+        safe_log(f"[Gemini] Async error: {e}")
+    return ""
+
+
+async def groq_response_async(user_message: str, context: str = "", timeout: float = None) -> str:
+    async_groq_client = await _provider_client(get_async_groq_client)
+    if not async_groq_client:
+        return ""
+    try:
+        messages = [
+            {"role": "system", "content": get_system_prompt()},
+            {"role": "user", "content": f"{context}{user_message}"}
+        ]
+        response = await async_groq_client.chat.completions.create(
+            messages=messages,
+            model=GROQ_MODEL,
+            timeout=timeout or PROVIDER_TIMEOUTS["groq"],
+        )
+        if response and response.choices:
+            return response.choices[0].message.content.strip()
+    except Exception as e:
+        safe_log(f"[Groq] Async error: {e}")
+    return ""
+
+
+async def local_response_async(prompt: str, context: str = "", timeout: float = None) -> str:
+    try:
+        payload = {
+            "model": OLLAMA_MODEL,
+            "prompt": f"{get_system_prompt()}\n\n{context}User: {prompt}\n\nMoodMate:",
+            "stream": False
+        }
+        response = await _http_client().post(OLLAMA_URL, json=payload, timeout=timeout or PROVIDER_TIMEOUTS["local"])
+        if response.status_code == 200:
+            return response.json().get("response", "").strip()
+    except Exception as e:
+        safe_log(f"[Ollama] Async error: {e}")
+    return ""
+
+
+ASYNC_PROVIDERS = {
+    "gemini": gemini_response_async,
+    "groq": groq_response_async,
+    "local": local_response_async,
+}
+
+
+async def run_hedged_async(providers, user_message: str, context: str = "", hedge_delay: float = None,
+                           budget: float = None, breakers: dict = None):
+    """Event-loop version of ``ai_service.run_hedged``; returns ``(source, text)`` or ``(None, "")``.
+
+    Same staggered-start policy, but losing and overdue calls are really
+    cancelled instead of being left to finish on a worker thread.
+    """
+    hedge_delay = AI_HEDGE_DELAY if hedge_delay is None else hedge_delay
+    started = time.monotonic()
+    deadline = started + (AI_CHAT_BUDGET if budget is None else budget)
+    in_flight = {}  # task -> (name, launched_at)
+    next_index = 0
+    next_launch = started
+
+    try:
+        while True:
+            now = time.monotonic()
+            if next_index < len(providers) and (now >= next_launch or not in_flight) and now < deadline:
+                name, provider = providers[next_index]
+                next_index += 1
+                breaker = breakers.get(name) if breakers else None
+                if breaker and not breaker.try_acquire():
+                    continue
+                provider_timeout = min(PROVIDER_TIMEOUTS.get(name, AI_CHAT_BUDGET), deadline - now)
+                task = asyncio.ensure_future(asyncio.wait_for(provider(user_message, context, provider_timeout), provider_timeout))
+                in_flight[task] = (name, now)
+                next_launch = now + hedge_delay
+                continue
+            if not in_flight or now >= deadline:
+                return None, ""
+
+            wake_at = deadline if next_index >= len(providers) else min(deadline, next_launch)
+            done, _ = await asyncio.wait(list(in_flight), timeout=max(0.0, wake_at - now), return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                name, launched_at = in_flight.pop(task)
+                try:
+                    text = task.result()
+                except asyncio.TimeoutError:
+                    safe_log(f"[AI Async] {name} missed its deadline.")
+                    text = ""
+                except Exception as e:
+                    safe_log(f"[AI Async] {name} raised: {e}")
+                    text = ""
+                if breakers and name in breakers:
+                    if text:
+                        breakers[name].record_success(time.monotonic() - launched_at)
+                    else:
+                        breakers[name].record_failure()
+                if text:
+                    safe_log(f"[AI Async] {name} answered in {time.monotonic() - started:.2f}s")
+                    return name, text
+
+            if not in_flight:
+                next_launch = time.monotonic()  # everything failed: hedge immediately
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+async def generate_ai_response_async(user_message: str, conversation_history: list = None, budget: float = None,
+                                     mood: str = None) -> dict:
+    """Async ``generate_ai_response``: same provider ranking, breakers, response cache and heuristic fallback."""
+    cached = cached_ai_response(user_message, conversation_history, mood)
+    if cached:
+        return cached
+    context = build_context(conversation_history)
+    # get_provider_chain builds the SDK clients it checks; make sure that happened off the loop.
+    for factory in (get_gemini_model, get_groq_client):
+        await _provider_client(factory)
+    providers = [(name, ASYNC_PROVIDERS[name]) for name, _ in get_provider_chain()]
+    source, text = await run_hedged_async(providers, user_message, context, budget=budget, breakers=PROVIDER_BREAKERS)
+    if text:
+        if mood:
+            response_cache.put(user_message, mood, text, source, personalized=bool(conversation_history))
+        return {"text": text, "source": source, "fallback_used": source != "gemini"}
+
+    safe_log("[AI Async] All API providers failed. Using heuristic engine.")
+    return {
+        "text": generate_heuristic_fallback(user_message),
+        "source": "heuristic",
+        "fallback_used": True
+    }
@@ -1,7 +1,17 @@
+import json
 import os
+import queue
 import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
 from dotenv import load_dotenv
 
+from services.circuit_breaker import CircuitBreaker
+from services.response_cache import response_cache
+from services.text_classifier import classify
+
 load_dotenv()
 
 
@@ -25,13 +35,40 @@ GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "phi3:latest")
 
-# Initialize Gemini
-gemini_model = None
-if GEMINI_API_KEY:
+# Hedged fan-out: start the next provider after AI_HEDGE_DELAY seconds (or as soon
+# as the current one fails) and take the first non-empty answer.
+AI_HEDGE_DELAY = float(os.getenv("AI_HEDGE_DELAY", "2.5"))
+AI_CHAT_BUDGET = float(os.getenv("AI_CHAT_BUDGET", "12"))
+PROVIDER_TIMEOUTS = {
+    "gemini": float(os.getenv("AI_TIMEOUT_GEMINI", "10")),
+    "groq": float(os.getenv("AI_TIMEOUT_GROQ", "8")),
+    "local": float(os.getenv("AI_TIMEOUT_OLLAMA", "10")),
+}
+# Health-scored routing: a provider's score is its latency EWMA plus an error-rate
+# penalty, and each step down the preference list adds AI_PREFERENCE_BIAS seconds.
+AI_PREFERENCE_BIAS = float(os.getenv("AI_PREFERENCE_BIAS", "1.0"))
+PROVIDER_BREAKERS = {
+    name: CircuitBreaker(
+        name,
+        window=float(os.getenv("AI_BREAKER_WINDOW", "60")),
+        error_threshold=float(os.getenv("AI_BREAKER_ERROR_RATE", "0.5")),
+        cooldown=float(os.getenv("AI_BREAKER_COOLDOWN", "30")),
+    )
+    for name in PROVIDER_TIMEOUTS
+}
+# Abandoned calls (e.g. a hung Gemini request) keep a worker until they return.
+_provider_executor = ThreadPoolExecutor(max_workers=int(os.getenv("AI_PROVIDER_WORKERS", "16")), thread_name_prefix="ai-provider")
+
+# Provider SDKs are imported on first use: google.generativeai and groq add about
+# a second to every worker's boot, and a deployment may configure neither.
+@lru_cache(maxsize=None)
+def get_gemini_model():
+    if not GEMINI_API_KEY:
+        return None
     try:
         import google.generativeai as genai
         genai.configure(api_key=GEMINI_API_KEY)
-        gemini_model = genai.GenerativeModel(
+        model = genai.GenerativeModel(
             model_name=GEMINI_MODEL,
             generation_config={
                 "temperature": 0.85,
@@ -40,18 +77,25 @@ if GEMINI_API_KEY:
             }
         )
         safe_log(f"[AI Service] Gemini configured with model: {GEMINI_MODEL}")
+        return model
     except Exception as e:
         safe_log(f"[AI Service] Gemini init failed: {e}")
+        return None
+
 
-# Initialize Groq as fallback
-groq_client = None
-if GROQ_API_KEY:
+@lru_cache(maxsize=None)
+def get_groq_client():
+    """Groq as fallback."""
+    if not GROQ_API_KEY:
+        return None
     try:
         from groq import Groq
-        groq_client = Groq(api_key=GROQ_API_KEY)
+        client = Groq(api_key=GROQ_API_KEY)
         safe_log("[AI Service] Groq client initialized as fallback.")
+        return client
     except Exception as e:
         safe_log(f"[AI Service] Groq initialization failed: {e}")
+        return None
 
 
 def get_system_prompt():
@@ -67,8 +111,9 @@ def get_system_prompt():
     TONE: Gentle, non-judgmental, warm. Use Hindi/Hinglish naturally if the user does."""
 
 
-def generate_gemini_response(user_message: str, context: str = "") -> str:
-    """Primary engine: Google Gemini"""
+def generate_gemini_response(user_message: str, context: str = "", timeout: float = None) -> str:
+    """Primary engine: Google Gemini (the 0.3 SDK has no per-call timeout; the hedge enforces it)"""
+    gemini_model = get_gemini_model()
     if not gemini_model:
         return ""
     try:
@@ -84,8 +129,9 @@ def generate_gemini_response(user_message: str, context: str = "") -> str:
     return ""
 
 
-def generate_groq_response(user_message: str, context: str = "") -> str:
+def generate_groq_response(user_message: str, context: str = "", timeout: float = None) -> str:
     """Fallback engine: Groq"""
+    groq_client = get_groq_client()
     if not groq_client:
         return ""
     try:
@@ -97,6 +143,7 @@ def generate_groq_response(user_message: str, context: str = "") -> str:
         response = groq_client.chat.completions.create(
             messages=messages,
             model=GROQ_MODEL,
+            timeout=timeout or PROVIDER_TIMEOUTS["groq"],
         )
         if response and response.choices:
             text = response.choices[0].message.content.strip()
@@ -107,16 +154,16 @@ def generate_groq_response(user_message: str, context: str = "") -> str:
     return ""
 
 
-def generate_local_response(prompt: str) -> str:
+def generate_local_response(prompt: str, context: str = "", timeout: float = None) -> str:
     """Last resort: Local Ollama"""
     try:
         import requests
         payload = {
             "model": OLLAMA_MODEL,
-            "prompt": f"{get_system_prompt()}\n\nUser: {prompt}\n\nMoodMate:",
+            "prompt": f"{get_system_prompt()}\n\n{context}User: {prompt}\n\nMoodMate:",
             "stream": False
         }
-        response = requests.post(OLLAMA_URL, json=payload, timeout=30)
+        response = requests.post(OLLAMA_URL, json=payload, timeout=timeout or PROVIDER_TIMEOUTS["local"])
         if response.status_code == 200:
             return response.json().get("response", "").strip()
     except Exception as e:
@@ -124,10 +171,59 @@ def generate_local_response(prompt: str) -> str:
     return ""
 
 
+def stream_gemini_response(user_message: str, context: str = "", timeout: float = None):
+    """Yield Gemini text chunks as they arrive."""
+    gemini_model = get_gemini_model()
+    if not gemini_model:
+        return
+    prompt = f"{get_system_prompt()}\n\n{context}User: {user_message}\n\nMoodMate:"
+    for chunk in gemini_model.generate_content(prompt, stream=True):
+        if chunk.text:
+            yield chunk.text
+
+
+def stream_groq_response(user_message: str, context: str = "", timeout: float = None):
+    """Yield Groq completion deltas as they arrive."""
+    groq_client = get_groq_client()
+    if not groq_client:
+        return
+    messages = [
+        {"role": "system", "content": get_system_prompt()},
+        {"role": "user", "content": f"{context}{user_message}"}
+    ]
+    stream = groq_client.chat.completions.create(
+        messages=messages,
+        model=GROQ_MODEL,
+        stream=True,
+        timeout=timeout or PROVIDER_TIMEOUTS["groq"],
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def stream_local_response(prompt: str, context: str = "", timeout: float = None):
+    """Yield Ollama tokens from its newline-delimited JSON stream."""
+    import requests
+    payload = {
+        "model": OLLAMA_MODEL,
+        "prompt": f"{get_system_prompt()}\n\n{context}User: {prompt}\n\nMoodMate:",
+        "stream": True
+    }
+    with requests.post(OLLAMA_URL, json=payload, stream=True, timeout=timeout or PROVIDER_TIMEOUTS["local"]) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event.get("response"):
+                yield event["response"]
+            if event.get("done"):
+                break
+
+
 def generate_heuristic_fallback(msg: str) -> str:
     """Non-AI Fallback: Pattern matching for mental health scenarios"""
-    msg = msg.lower()
-    
     responses = {
         "anxiety": [
             "I can tell you're feeling a bit overwhelmed right now. Take a deep breath with me... In for four, hold for four, out for four. Does that help a little?",
@@ -157,16 +253,7 @@ def generate_heuristic_fallback(msg: str) -> str:
         ]
     }
     
-    if any(k in msg for k in ["anxious", "panic", "worry", "tense", "stress", "scared"]):
-        return random.choice(responses["anxiety"])
-    if any(k in msg for k in ["sad", "depressed", "lonely", "cry", "hurt", "broke"]):
-        return random.choice(responses["sadness"])
-    if any(k in msg for k in ["sleep", "insomnia", "night", "tired", "wake"]):
-        return random.choice(responses["sleep"])
-    if any(k in msg for k in ["angry", "mad", "hate", "fight", "annoy", "piss"]):
-        return random.choice(responses["anger"])
-        
-    return random.choice(responses["general"])
+    return random.choice(responses[classify(msg).topic])
 
 
 def generate_api_response(prompt: str, context: str = "") -> str:
@@ -180,31 +267,248 @@ def generate_api_response(prompt: str, context: str = "") -> str:
     return generate_heuristic_fallback(prompt)
 
 
-def generate_ai_response(user_message: str, conversation_history: list = None) -> dict:
-    """Smart fallback chain: Gemini → Groq → Ollama → Heuristic"""
-    # Build conversation context from history
+def get_provider_chain():
+    """Configured providers ordered by health score; open circuits are left out."""
+    configured = []
+    if get_gemini_model():
+        configured.append(("gemini", generate_gemini_response))
+    if get_groq_client():
+        configured.append(("groq", generate_groq_response))
+    configured.append(("local", generate_local_response))
+
+    ranked = []
+    for rank, (name, provider) in enumerate(configured):
+        breaker = PROVIDER_BREAKERS[name]
+        if breaker.is_available():
+            ranked.append((breaker.health_score() + rank * AI_PREFERENCE_BIAS, rank, name, provider))
+    ranked.sort()
+    return [(name, provider) for _, _, name, provider in ranked]
+
+
+def provider_health():
+    return {name: breaker.snapshot() for name, breaker in PROVIDER_BREAKERS.items()}
+
+
+def run_hedged(providers, user_message: str, context: str = "", hedge_delay: float = None, budget: float = None,
+               breakers: dict = None):
+    """Race providers with staggered starts; return ``(source, text)`` or ``(None, "")``.
+
+    The first provider starts immediately. Each later one starts when the hedge
+    delay elapses or when every in-flight provider has failed or blown its own
+    deadline, whichever comes first. The first non-empty answer wins and the
+    remaining calls are cancelled (not-yet-started) or abandoned (in-flight).
+
+    With ``breakers``, every call's real outcome and latency are reported to the
+    provider's circuit breaker, and a provider whose breaker refuses (open, or a
+    half-open probe already in flight) is skipped.
+    """
+    hedge_delay = AI_HEDGE_DELAY if hedge_delay is None else hedge_delay
+    started = time.monotonic()
+    deadline = started + (AI_CHAT_BUDGET if budget is None else budget)
+    in_flight = {}  # future -> (name, provider deadline)
+    timed_out = set()
+    next_index = 0
+    next_launch = started
+
+    try:
+        while True:
+            now = time.monotonic()
+            if next_index < len(providers) and (now >= next_launch or not in_flight) and now < deadline:
+                name, provider = providers[next_index]
+                next_index += 1
+                breaker = breakers.get(name) if breakers else None
+                if breaker and not breaker.try_acquire():
+                    continue
+                provider_timeout = min(PROVIDER_TIMEOUTS.get(name, AI_CHAT_BUDGET), deadline - now)
+                future = _provider_executor.submit(provider, user_message, context, provider_timeout)
+                if breaker:
+                    future.add_done_callback(_breaker_reporter(breaker, now, timed_out))
+                in_flight[future] = (name, now + provider_timeout)
+                next_launch = now + hedge_delay
+                continue
+            if not in_flight or now >= deadline:
+                return None, ""
+
+            wake_at = min([deadline] + [provider_deadline for _, provider_deadline in in_flight.values()])
+            if next_index < len(providers):
+                wake_at = min(wake_at, next_launch)
+            done, _ = wait(list(in_flight), timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name, _ = in_flight.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    safe_log(f"[AI Service] {name} raised: {e}")
+                    text = ""
+                if text:
+                    safe_log(f"[AI Service] {name} answered in {time.monotonic() - started:.2f}s")
+                    return name, text
+
+            now = time.monotonic()
+            for future, (name, provider_deadline) in list(in_flight.items()):
+                if now >= provider_deadline:
+                    safe_log(f"[AI Service] {name} missed its deadline; abandoning.")
+                    timed_out.add(future)
+                    if breakers and name in breakers:
+                        breakers[name].record_failure()
+                    future.cancel()
+                    del in_flight[future]
+            if not in_flight:
+                next_launch = now  # everything failed: hedge immediately
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def _breaker_reporter(breaker, launched_at, timed_out):
+    def report(future):
+        if future.cancelled() or future in timed_out:
+            return  # never ran, or already counted as a timeout
+        try:
+            ok = bool(future.result())
+        except Exception:
+            ok = False
+        if ok:
+            breaker.record_success(time.monotonic() - launched_at)
+        else:
+            breaker.record_failure()
+    return report
+
+
+_STREAM_END = object()
+
+
+def _stream_with_deadline(stream_factory, timeout: float):
+    """Run a blocking token generator on the provider pool and relay its tokens.
+
+    ``timeout`` bounds the wait for each token (so also time-to-first-token); when
+    it expires, or the consumer goes away, the producer is told to stop and the
+    call is abandoned.
+    """
+    tokens = queue.Queue()
+    stop = threading.Event()
+
+    def pump():
+        try:
+            for token in stream_factory():
+                if stop.is_set():
+                    break
+                tokens.put(token)
+        except Exception as e:
+            tokens.put(e)
+        finally:
+            tokens.put(_STREAM_END)
+
+    _provider_executor.submit(pump)
+    try:
+        while True:
+            try:
+                item = tokens.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError(f"no token within {timeout:.1f}s")
+            if item is _STREAM_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+STREAM_PROVIDERS = {
+    "gemini": stream_gemini_response,
+    "groq": stream_groq_response,
+    "local": stream_local_response,
+}
+
+
+def stream_ai_response(user_message: str, conversation_history: list = None, mood: str = None):
+    """Yield ``(source, token)`` pairs from the healthiest provider that starts streaming.
+
+    Providers are tried in health order. One that fails before its first token is
+    skipped for the next; once tokens have reached the client there is no
+    switching, so a mid-stream failure just ends the reply. The heuristic reply is
+    the final fallback. A response-cache hit is yielded as a single token.
+    """
+    personalized = bool(conversation_history)
+    cached = response_cache.get(user_message, mood, personalized) if mood else None
+    if cached:
+        yield cached.source, cached.text
+        return
+    context = build_context(conversation_history)
+    for name, _ in get_provider_chain():
+        breaker = PROVIDER_BREAKERS[name]
+        if not breaker.try_acquire():
+            continue
+        started = time.monotonic()
+        produced = False
+        parts = []
+        try:
+            stream = _stream_with_deadline(
+                lambda provider=STREAM_PROVIDERS[name]: provider(user_message, context, PROVIDER_TIMEOUTS[name]),
+                PROVIDER_TIMEOUTS[name],
+            )
+            for token in stream:
+                produced = True
+                parts.append(token)
+                yield name, token
+        except Exception as e:
+            safe_log(f"[AI Service] {name} stream failed: {e}")
+            breaker.record_failure()
+            if produced:
+                return
+            continue
+        if produced:
+            breaker.record_success(time.monotonic() - started)
+            if mood:
+                response_cache.put(user_message, mood, "".join(parts), name, personalized)
+            return
+        breaker.record_failure()
+
+    safe_log("[AI Service] No provider streamed a reply. Using heuristic engine.")
+    yield "heuristic", generate_heuristic_fallback(user_message)
+
+
+def build_context(conversation_history: list = None) -> str:
+    """Prompt prefix from history that services.conversation_context already fit to the token budget."""
     context = ""
-    if conversation_history:
-        for msg in conversation_history[-3:]:
-            role = "User" if msg['role'] == "user" else "MoodMate"
-            context += f"{role}: {msg['content']}\n"
+    for msg in conversation_history or []:
+        if msg['role'] == "summary":
+            context += f"Earlier in this conversation: {msg['content']}\n"
+            continue
+        role = "User" if msg['role'] == "user" else "MoodMate"
+        context += f"{role}: {msg['content']}\n"
+    return context
 
-    # 1. Try Gemini (Primary)
-    text = generate_gemini_response(user_message, context)
-    if text:
-        return {"text": text, "source": "gemini", "fallback_used": False}
 
-    # 2. Try Groq (Fallback)
-    text = generate_groq_response(user_message, context)
-    if text:
-        return {"text": text, "source": "groq", "fallback_used": True}
+def cached_ai_response(user_message: str, conversation_history: list = None, mood: str = None):
+    """Response-cache lookup shared by the sync and async chat paths; ``None`` on a miss or bypass."""
+    if not mood:
+        return None
+    cached = response_cache.get(user_message, mood, personalized=bool(conversation_history))
+    if cached is None:
+        return None
+    return {"text": cached.text, "source": cached.source, "fallback_used": cached.source != "gemini", "cached": True}
+
+
+def generate_ai_response(user_message: str, conversation_history: list = None, budget: float = None, mood: str = None) -> dict:
+    """Hedged chain: Gemini → Groq → Ollama raced with staggered starts, then Heuristic.
 
-    # 3. Try Local Ollama (Last resort)
-    text = generate_local_response(user_message)
+    Passing the detected ``mood`` opts the call into the response cache.
+    """
+    cached = cached_ai_response(user_message, conversation_history, mood)
+    if cached:
+        return cached
+    context = build_context(conversation_history)
+    providers = get_provider_chain()
+    source, text = run_hedged(providers, user_message, context, budget=budget, breakers=PROVIDER_BREAKERS)
     if text:
-        return {"text": text, "source": "local", "fallback_used": True}
+        if mood:
+            response_cache.put(user_message, mood, text, source, personalized=bool(conversation_history))
+        return {"text": text, "source": source, "fallback_used": source != "gemini"}
 
-    # 4. Smart Heuristic fallback (Ensures the app is "Live" without keys)
+    # Smart Heuristic fallback (Ensures the app is "Live" without keys)
     safe_log("[AI Service] All API providers failed. Using heuristic engine.")
     return {
         "text": generate_heuristic_fallback(user_message),
@@ -0,0 +1,154 @@
+import atexit
+import os
+import threading
+import time
+from collections import deque
+
+from database import IS_POSTGRES, get_db
+from queries import Statement
+
+AUDIT_FLUSH_SIZE = int(os.getenv("AUDIT_FLUSH_SIZE", "200"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+# Past this many buffered events the caller flushes inline (back-pressure); if the
+# database is down even then, the oldest events beyond the cap are dropped and counted.
+AUDIT_MAX_PENDING = int(os.getenv("AUDIT_MAX_PENDING", "10000"))
+
+AUDIT_COLUMNS = ("actor_type", "actor_id", "action", "entity_type", "entity_id", "status", "details_json", "ip_address", "user_agent")
+_INSERT_PREFIX = f"INSERT INTO audit_logs ({', '.join(AUDIT_COLUMNS)}) VALUES "
+INSERT_AUDIT_ROW = Statement("insert_audit_row", _INSERT_PREFIX + f"({', '.join(':' + column for column in AUDIT_COLUMNS)})")
+
+
+def write_audit_rows(conn, rows):
+    """Insert ``rows`` in one statement on Postgres (multi-row VALUES) or one executemany on SQLite."""
+    cursor = conn.cursor()
+    if IS_POSTGRES:
+        from psycopg2.extras import execute_values
+        execute_values(cursor, _INSERT_PREFIX + "%s", rows, page_size=len(rows))
+    else:
+        cursor.executemany(INSERT_AUDIT_ROW.sql, rows)
+    conn.commit()
+
+
+class AuditLogWriter:
+    """Buffers audit rows in memory and writes them in batches from a background thread.
+
+    ``record`` is an append under a lock. The flusher writes when ``flush_size``
+    rows are waiting or ``flush_interval`` seconds have passed, and ``close``
+    (registered with ``atexit``) drains whatever is left on shutdown.
+    """
+
+    def __init__(self, write=write_audit_rows, flush_size=AUDIT_FLUSH_SIZE, flush_interval=AUDIT_FLUSH_INTERVAL,
+                 max_pending=AUDIT_MAX_PENDING):
+        self._write = write
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # one writer at a time keeps batches in order
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self.recorded = 0
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failures = 0
+        self.inline_flushes = 0
+        self.last_flush_ms = 0.0
+
+    def record(self, row, sync=False):
+        """Queue one audit row; with ``sync`` it is written before returning."""
+        with self._cond:
+            self._pending.append(row)
+            self.recorded += 1
+            backlog = len(self._pending)
+            if backlog >= self.flush_size:
+                self._cond.notify()
+        if sync or self._closed:
+            self.flush()
+            return
+        self._ensure_thread()
+        if backlog >= self.max_pending:
+            self.inline_flushes += 1
+            if not self.flush():
+                self._shed()
+
+    def _shed(self):
+        with self._cond:
+            while len(self._pending) > self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+
+    def flush(self):
+        """Write everything buffered so far; returns False if the write failed (rows are kept)."""
+        with self._flush_lock:
+            with self._cond:
+                if not self._pending:
+                    return True
+                batch = list(self._pending)
+                self._pending.clear()
+            started = time.perf_counter()
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                self.failures += 1
+                print(f"Audit flush error: {e}", flush=True)
+                with self._cond:
+                    self._pending.extendleft(reversed(batch))
+                return False
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            self.written += len(batch)
+            self.batches += 1
+            return True
+
+    def _write_batch(self, batch):
+        with get_db() as conn:
+            self._write(conn, batch)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.flush_size:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            if not self.flush():
+                time.sleep(self.flush_interval)  # database trouble: don't spin
+            if closed:
+                return
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()  # a forked child needs its own flusher
+            self._thread = threading.Thread(target=self._loop, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout=5):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "recorded": self.recorded,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failures": self.failures,
+            "inline_flushes": self.inline_flushes,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+
+audit_log = AuditLogWriter()
+atexit.register(audit_log.close)
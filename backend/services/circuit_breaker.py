@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import deque
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker with a latency EWMA for one upstream provider.
+
+    The circuit opens when the error rate over the last ``window`` seconds reaches
+    ``error_threshold`` (after ``min_calls`` outcomes) or after ``consecutive_failures``
+    failures in a row. Once ``cooldown`` has passed it goes half-open and admits a
+    single probe: success closes it, failure re-opens it with a doubled cooldown.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, window=60.0, min_calls=5, error_threshold=0.5, consecutive_failures=3,
+                 cooldown=30.0, max_cooldown=300.0, ewma_alpha=0.3, clock=time.monotonic):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.consecutive_failures = consecutive_failures
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.ewma_alpha = ewma_alpha
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (timestamp, ok)
+        self._failure_streak = 0
+        self._state = self.CLOSED
+        self._cooldown = cooldown
+        self._opened_at = 0.0
+        self._probe_started = None
+        self.latency_ewma = None
+        self.opened_count = 0
+
+    def _trim(self, now):
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def _error_rate(self):
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for _, ok in self._outcomes if not ok) / len(self._outcomes)
+
+    def _current_state(self, now):
+        if self._state == self.OPEN and now - self._opened_at >= self._cooldown:
+            self._state = self.HALF_OPEN
+            self._probe_started = None
+        return self._state
+
+    def _open(self, now):
+        if self._state == self.HALF_OPEN:
+            self._cooldown = min(self._cooldown * 2, self.max_cooldown)
+        self._state = self.OPEN
+        self._opened_at = now
+        self._probe_started = None
+        self.opened_count += 1
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(self._clock())
+
+    def is_available(self):
+        """Cheap, non-claiming check used when ranking providers."""
+        return self.state != self.OPEN
+
+    def try_acquire(self):
+        """Claim permission to call the provider; in half-open only one probe gets through."""
+        with self._lock:
+            now = self._clock()
+            state = self._current_state(now)
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN:
+                # A probe that never reported back (hung call) stops blocking after one cooldown.
+                if self._probe_started is None or now - self._probe_started >= self._cooldown:
+                    self._probe_started = now
+                    return True
+            return False
+
+    def record_success(self, latency):
+        with self._lock:
+            now = self._clock()
+            self._trim(now)
+            self._outcomes.append((now, True))
+            self._failure_streak = 0
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma += self.ewma_alpha * (latency - self.latency_ewma)
+            if self._current_state(now) == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._cooldown = self.base_cooldown
+                self._outcomes.clear()
+                self._outcomes.append((now, True))
+
+    def record_failure(self):
+        with self._lock:
+            now = self._clock()
+            self._trim(now)
+            self._outcomes.append((now, False))
+            self._failure_streak += 1
+            state = self._current_state(now)
+            if state == self.HALF_OPEN:
+                self._open(now)
+            elif state == self.CLOSED and (
+                self._failure_streak >= self.consecutive_failures
+                or (len(self._outcomes) >= self.min_calls and self._error_rate() >= self.error_threshold)
+            ):
+                self._open(now)
+
+    def health_score(self, default_latency=1.0, error_penalty=5.0):
+        """Expected cost in seconds: latency EWMA plus a penalty per unit of error rate."""
+        with self._lock:
+            self._trim(self._clock())
+            latency = default_latency if self.latency_ewma is None else self.latency_ewma
+            return latency + self._error_rate() * error_penalty
+
+    def snapshot(self):
+        with self._lock:
+            now = self._clock()
+            self._trim(now)
+            return {
+                "state": self._current_state(now),
+                "error_rate": round(self._error_rate(), 3),
+                "calls_in_window": len(self._outcomes),
+                "failure_streak": self._failure_streak,
+                "latency_ewma_ms": None if self.latency_ewma is None else round(self.latency_ewma * 1000, 1),
+                "cooldown_s": self._cooldown,
+                "opened_count": self.opened_count,
+            }
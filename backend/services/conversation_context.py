@@ -0,0 +1,198 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from database import IS_POSTGRES, get_db
+from queries import Statement
+from security import decrypt_data, encrypt_data
+from services.ai_service import PROVIDER_BREAKERS, get_provider_chain, run_hedged, safe_log
+
+PLACEHOLDER = "%s" if IS_POSTGRES else "?"
+
+# Prompt budget for conversation context (summary + recent turns), in estimated tokens.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("AI_CONTEXT_TOKEN_BUDGET", "600"))
+# Fold older turns into the rolling summary once this many complete turns are unsummarized
+# beyond the ones kept verbatim.
+SUMMARY_EVERY_TURNS = int(os.getenv("AI_SUMMARY_EVERY_TURNS", "6"))
+KEEP_RECENT_TURNS = int(os.getenv("AI_CONTEXT_RECENT_TURNS", "4"))
+SUMMARY_TOKEN_LIMIT = int(os.getenv("AI_SUMMARY_TOKEN_LIMIT", "150"))
+# Rows fetched per request; decryption stops as soon as the budget is spent.
+RECENT_ROW_LIMIT = 2 * (KEEP_RECENT_TURNS + SUMMARY_EVERY_TURNS)
+
+# The API falls back to these when the client sends no session id, so they are
+# shared between users and must never feed history into a prompt. Session ids
+# are also guessable, so every read below is scoped to the signed-in owner too.
+SHARED_SESSION_IDS = {"default", "default_session", ""}
+
+# The baseline table; migration 6 (chat_summaries_owner_key) re-keys it on (session_id, user_id).
+CREATE_CHAT_SUMMARIES_SQL = """
+    CREATE TABLE IF NOT EXISTS chat_summaries (
+        session_id TEXT PRIMARY KEY,
+        summary TEXT NOT NULL,
+        covered_until INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+SUMMARY_FOR_SESSION = Statement(
+    "summary_for_session",
+    "SELECT summary, covered_until FROM chat_summaries WHERE session_id = :session_id AND user_id = :user_id",
+    prepare=True,
+)
+RECENT_MESSAGES = Statement(
+    "recent_chat_messages",
+    """
+    SELECT id, role, content FROM chat_history
+    WHERE session_id = :session_id AND user_id = :user_id AND id > :after
+    ORDER BY id DESC LIMIT :limit
+    """,
+    prepare=True,
+)
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token); cheap enough to run per message."""
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text, tokens, keep="end"):
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    return "..." + text[-(limit - 3):] if keep == "end" else text[:limit - 3] + "..."
+
+
+def _read_summary(conn, session_id, user_id):
+    row = SUMMARY_FOR_SESSION.fetchone(conn, session_id=session_id, user_id=user_id)
+    if not row:
+        return "", 0
+    return decrypt_data(row["summary"]), row["covered_until"]
+
+
+def load_conversation(conn, session_id, user_id, budget=CONTEXT_TOKEN_BUDGET):
+    """History for the prompt: ``[{"role": "summary", ...}?, {"role": "user"|"ai", ...}, ...]``.
+
+    Only messages ``user_id`` sent in ``session_id`` count; without a signed-in
+    user there is no history. Newest messages are decrypted first and added
+    until ``budget`` tokens (including the summary) are spent; everything older
+    is represented only by the rolling summary.
+    """
+    if user_id is None or session_id in SHARED_SESSION_IDS:
+        return []
+    summary, covered_until = _read_summary(conn, session_id, user_id)
+    cursor = RECENT_MESSAGES.execute(conn, session_id=session_id, user_id=user_id, after=covered_until, limit=RECENT_ROW_LIMIT)
+    remaining = budget - estimate_tokens(summary)
+    recent = []
+    for row in cursor.fetchall():
+        content = decrypt_data(row["content"])
+        cost = estimate_tokens(content) + 2
+        if cost > remaining:
+            break
+        remaining -= cost
+        recent.append({"role": row["role"], "content": content})
+    recent.reverse()
+    if summary:
+        recent.insert(0, {"role": "summary", "content": summary})
+    return recent
+
+
+def extractive_summary(previous, turns):
+    """Provider-free fallback: keep the gist of what the user said, newest last."""
+    said = "; ".join(truncate_to_tokens(turn["content"], 20, keep="start") for turn in turns if turn["role"] == "user")
+    summary = f"{previous} Later the user said: {said}." if previous else f"The user said: {said}."
+    return truncate_to_tokens(summary, SUMMARY_TOKEN_LIMIT)
+
+
+def summarize_turns(previous, turns):
+    """Fold ``turns`` into ``previous`` with the AI providers, falling back to an extractive summary."""
+    transcript = "\n".join(f"{'User' if turn['role'] == 'user' else 'MoodMate'}: {turn['content']}" for turn in turns)
+    request = (
+        f"Update this running summary of a support conversation in under {SUMMARY_TOKEN_LIMIT // 2} words. "
+        "Keep the user's situation, feelings and anything they asked to remember; reply with the summary only.\n\n"
+        f"Summary so far: {previous or '(none)'}\n\nNew messages:\n{transcript}"
+    )
+    _, text = run_hedged(get_provider_chain(), request, breakers=PROVIDER_BREAKERS)
+    if not text:
+        return extractive_summary(previous, turns)
+    return truncate_to_tokens(text.strip(), SUMMARY_TOKEN_LIMIT)
+
+
+def refresh_summary(session_id, user_id, summarize=summarize_turns):
+    """Fold older turns into the session summary once enough have accumulated.
+
+    Runs after the reply has been saved, off the request's critical path. The
+    summary row is updated with a compare-and-set on ``covered_until`` so two
+    workers racing on one session cannot fold the same turns twice.
+    """
+    if user_id is None or session_id in SHARED_SESSION_IDS:
+        return False
+    with get_db() as conn:
+        cursor = conn.cursor()
+        summary, covered_until = _read_summary(conn, session_id, user_id)
+        cursor.execute(
+            f"""
+            SELECT id, role, content FROM chat_history
+            WHERE session_id = {PLACEHOLDER} AND user_id = {PLACEHOLDER} AND id > {PLACEHOLDER}
+            ORDER BY id
+            """,
+            (session_id, user_id, covered_until),
+        )
+        rows = cursor.fetchall()
+        fold_count = len(rows) - 2 * KEEP_RECENT_TURNS
+        if fold_count < 2 * SUMMARY_EVERY_TURNS:
+            return False
+        to_fold = rows[:fold_count]
+        turns = [{"role": row["role"], "content": decrypt_data(row["content"])} for row in to_fold]
+        new_until = to_fold[-1]["id"]
+
+    new_summary = summarize(summary, turns)
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        if covered_until:
+            cursor.execute(
+                f"""
+                UPDATE chat_summaries SET summary = {PLACEHOLDER}, covered_until = {PLACEHOLDER}, updated_at = CURRENT_TIMESTAMP
+                WHERE session_id = {PLACEHOLDER} AND user_id = {PLACEHOLDER} AND covered_until = {PLACEHOLDER}
+                """,
+                (encrypt_data(new_summary), new_until, session_id, user_id, covered_until),
+            )
+        else:
+            cursor.execute(
+                f"""
+                INSERT INTO chat_summaries (session_id, user_id, summary, covered_until)
+                VALUES ({PLACEHOLDER}, {PLACEHOLDER}, {PLACEHOLDER}, {PLACEHOLDER})
+                ON CONFLICT(session_id, user_id) DO NOTHING
+                """,
+                (session_id, user_id, encrypt_data(new_summary), new_until),
+            )
+        updated = cursor.rowcount == 1
+        conn.commit()
+    return updated
+
+
+_summary_executor = ThreadPoolExecutor(max_workers=int(os.getenv("AI_SUMMARY_WORKERS", "2")), thread_name_prefix="chat-summary")
+_pending_sessions = set()
+_pending_lock = threading.Lock()
+
+
+def schedule_summary_refresh(session_id, user_id):
+    """Queue ``refresh_summary`` in the background; at most one pending run per session."""
+    if user_id is None or session_id in SHARED_SESSION_IDS:
+        return
+    pending_key = (user_id, session_id)
+    with _pending_lock:
+        if pending_key in _pending_sessions:
+            return
+        _pending_sessions.add(pending_key)
+
+    def run():
+        try:
+            refresh_summary(session_id, user_id)
+        except Exception as e:
+            safe_log(f"[Context] Summary refresh failed for {session_id}: {e}")
+        finally:
+            with _pending_lock:
+                _pending_sessions.discard(pending_key)
+
+    _summary_executor.submit(run)
@@ -0,0 +1,227 @@
+import json
+from bisect import bisect_left, bisect_right
+
+from cache import VersionedCache
+
+CACHE_TTL = 300  # 5 minutes; the shared generation counter handles invalidation
+
+JSON_LIST_COLUMNS = {
+    "languages": "languages_json",
+    "modes": "modes_json",
+    "qualifications": "qualifications_json",
+    "approaches": "approaches_json",
+    "focus_areas": "focus_areas_json",
+    "availability": "availability_json",
+}
+
+
+def decode_list(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    try:
+        decoded = json.loads(value) if value else []
+    except (TypeError, ValueError):
+        return ()
+    return tuple(decoded) if isinstance(decoded, list) else ()
+
+
+class DoctorRecord:
+    """Public doctor profile with JSON columns decoded once at cache-fill time."""
+
+    __slots__ = (
+        "id", "name", "initials", "email", "specialization", "experience_years",
+        "languages", "modes", "price_per_session", "rating", "reviews_count",
+        "badge", "bio", "license_info", "qualifications", "approaches", "focus_areas",
+        "best_for", "first_session", "cancellation_policy", "review_summary",
+        "availability", "photo_url", "is_verified", "profile_source", "profile_status",
+    )
+
+    @classmethod
+    def from_row(cls, row):
+        record = cls()
+        for field in cls.__slots__:
+            if field in JSON_LIST_COLUMNS:
+                value = decode_list(row[JSON_LIST_COLUMNS[field]])
+            else:
+                value = row[field]
+            setattr(record, field, value)
+        record.is_verified = bool(record.is_verified)
+        record.experience_years = record.experience_years or 0
+        record.price_per_session = record.price_per_session or 0
+        record.rating = float(record.rating or 0)
+        record.reviews_count = record.reviews_count or 0
+        return record
+
+    def to_dict(self):
+        data = {field: getattr(self, field) for field in self.__slots__}
+        for field in JSON_LIST_COLUMNS:
+            data[field] = list(data[field])
+        return data
+
+    def session_payload(self):
+        """Shape returned to the doctor portal after a successful login."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "initials": self.initials,
+            "spec": self.specialization,
+            "email": self.email,
+            "rating": self.rating,
+            "reviews": self.reviews_count,
+            "experience": f"{self.experience_years} years",
+            "languages": list(self.languages),
+            "pricePerSession": self.price_per_session,
+            "profileSource": self.profile_source,
+        }
+
+
+SEARCH_FACETS = ("languages", "modes", "focus_areas")
+SEARCH_SORTS = {
+    "rating": lambda record: (-record.rating, -record.reviews_count),
+    "price_asc": lambda record: (record.price_per_session, -record.rating),
+    "price_desc": lambda record: (-record.price_per_session, -record.rating),
+    "experience": lambda record: (-record.experience_years, -record.rating),
+    "reviews": lambda record: (-record.reviews_count, -record.rating),
+}
+
+
+def mask_from_positions(positions, size):
+    """Build an int bitset from positions in O(size) instead of OR-ing big ints."""
+    bits = bytearray(b"0" * size)
+    for position in positions:
+        bits[size - 1 - position] = 49  # ord("1")
+    return int(bits, 2) if size else 0
+
+
+def set_positions(bits, stop=None):
+    """Positions of "1" in a least-significant-first bit string, optionally only the first ``stop``."""
+    positions = []
+    index = bits.find("1")
+    while index != -1 and (stop is None or len(positions) < stop):
+        positions.append(index)
+        index = bits.find("1", index + 1)
+    return positions
+
+
+class DoctorDirectory:
+    """Immutable snapshot of the active doctors, ordered by rating.
+
+    Bit ``i`` of every index mask refers to ``records[i]``. Facet values map to
+    bitsets, price and rating ranges resolve via bisect, and every sort order is
+    precomputed, so a search is a handful of big-int ANDs plus one page walk.
+    """
+
+    __slots__ = ("records", "by_id", "all_mask", "facets", "_prices", "_price_positions", "_neg_ratings", "_orders", "_ranks")
+
+    def __init__(self, records):
+        # Position order doubles as the "rating" sort order.
+        self.records = tuple(sorted(records, key=SEARCH_SORTS["rating"]))
+        self.by_id = {record.id: record for record in self.records}
+        size = len(self.records)
+        self.all_mask = (1 << size) - 1
+
+        self.facets = {}
+        for facet in SEARCH_FACETS:
+            positions = {}
+            for position, record in enumerate(self.records):
+                for value in getattr(record, facet):
+                    positions.setdefault(str(value).strip().lower(), []).append(position)
+            self.facets[facet] = {key: mask_from_positions(hits, size) for key, hits in positions.items()}
+
+        self._orders = {}
+        self._ranks = {}
+        for sort, key in SEARCH_SORTS.items():
+            order = sorted(range(size), key=lambda position: key(self.records[position]))
+            rank = [0] * size
+            for index, position in enumerate(order):
+                rank[position] = index
+            self._orders[sort] = order
+            self._ranks[sort] = rank
+
+        self._price_positions = self._orders["price_asc"]
+        self._prices = [self.records[position].price_per_session for position in self._price_positions]
+        self._neg_ratings = [-record.rating for record in self.records]
+
+    def _price_mask(self, min_price, max_price):
+        start = bisect_left(self._prices, min_price) if min_price is not None else 0
+        end = bisect_right(self._prices, max_price) if max_price is not None else len(self._prices)
+        return mask_from_positions(self._price_positions[start:end], len(self.records))
+
+    def _matching_mask(self, languages, modes, focus_areas, min_price, max_price, min_rating):
+        mask = self.all_mask
+        for facet, wanted in zip(SEARCH_FACETS, (languages, modes, focus_areas)):
+            if not wanted:
+                continue
+            index = self.facets[facet]
+            facet_mask = 0
+            for value in wanted:
+                facet_mask |= index.get(str(value).strip().lower(), 0)
+            mask &= facet_mask
+        if min_price is not None or max_price is not None:
+            mask &= self._price_mask(min_price, max_price)
+        if min_rating is not None:
+            # Records are rating-ordered, so "rating >= x" is a prefix of positions.
+            mask &= (1 << bisect_right(self._neg_ratings, -min_rating)) - 1
+        return mask
+
+    def search_page(self, languages=(), modes=(), focus_areas=(), min_price=None, max_price=None, min_rating=None,
+                    sort="rating", offset=0, limit=None):
+        """Return ``(total_matches, records)`` for one page of results in ``sort`` order.
+
+        Values within one facet are OR-ed (any of the chosen languages); different
+        facets and ranges are AND-ed. Facet matching is case-insensitive.
+        """
+        if sort not in SEARCH_SORTS:
+            raise ValueError(f"Unknown sort: {sort}")
+        mask = self._matching_mask(languages, modes, focus_areas, min_price, max_price, min_rating)
+        bits = bin(mask)[:1:-1]  # least significant bit first
+        total = bits.count("1")
+        end = total if limit is None else min(total, offset + limit)
+        if offset >= end:
+            return total, []
+
+        if sort == "rating":
+            positions = set_positions(bits, stop=end)
+        elif total * 8 > len(self.records):
+            # Dense result: walk the precomputed order and stop once the page is full.
+            positions = []
+            width = len(bits)
+            for position in self._orders[sort]:
+                if position < width and bits[position] == "1":
+                    positions.append(position)
+                    if len(positions) == end:
+                        break
+        else:
+            positions = set_positions(bits)
+            positions.sort(key=self._ranks[sort].__getitem__)
+        return total, [self.records[position] for position in positions[offset:end]]
+
+    def search(self, sort="rating", **filters):
+        """Return every matching record in ``sort`` order."""
+        return self.search_page(sort=sort, **filters)[1]
+
+
+def load_directory(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM doctors WHERE profile_status = 'active' ORDER BY rating DESC")
+    return DoctorDirectory(DoctorRecord.from_row(row) for row in cursor.fetchall())
+
+
+def serialize_directory(directory):
+    payload = {"success": True, "doctors": [record.to_dict() for record in directory.records]}
+    return json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+
+
+doctor_cache = VersionedCache("doctors", loader=load_directory, serializer=serialize_directory, ttl=CACHE_TTL)
+
+
+def get_cached_doctors():
+    return doctor_cache.get().value.records
+
+
+def search_doctors(**filters):
+    return doctor_cache.get().value.search_page(**filters)
+
+
+def get_doctor(doctor_id):
+    return doctor_cache.get().value.by_id.get(doctor_id)
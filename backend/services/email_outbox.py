@@ -0,0 +1,180 @@
+import os
+import random
+import threading
+import time
+
+from database import AUTO_ID, IS_POSTGRES, get_db
+
+PLACEHOLDER = "%s" if IS_POSTGRES else "?"
+
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+EMAIL_POLL_INTERVAL = float(os.getenv("EMAIL_POLL_INTERVAL", "5"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+EMAIL_BACKOFF_BASE = float(os.getenv("EMAIL_BACKOFF_BASE", "30"))
+EMAIL_BACKOFF_MAX = float(os.getenv("EMAIL_BACKOFF_MAX", "3600"))
+# A claimed row whose worker died is handed out again after this many seconds.
+EMAIL_LEASE_SECONDS = float(os.getenv("EMAIL_LEASE_SECONDS", "120"))
+# "thread" runs delivery inside every web process; "off" leaves it to `python email_worker.py`.
+EMAIL_WORKER_MODE = os.getenv("EMAIL_WORKER", "thread")
+
+PENDING, SENDING, SENT, DEAD = "pending", "sending", "sent", "dead"
+
+CREATE_EMAIL_OUTBOX_SQL = f"""
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        {AUTO_ID},
+        to_email TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        html TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at DOUBLE PRECISION NOT NULL,
+        lease_until DOUBLE PRECISION,
+        last_error TEXT,
+        provider_id TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        sent_at TIMESTAMP
+    )
+"""
+
+_CLAIM_SQL = f"""
+    UPDATE email_outbox SET status = '{SENDING}', lease_until = {PLACEHOLDER}, attempts = attempts + 1
+    WHERE id IN (
+        SELECT id FROM email_outbox
+        WHERE (status = '{PENDING}' AND next_attempt_at <= {PLACEHOLDER})
+           OR (status = '{SENDING}' AND lease_until <= {PLACEHOLDER})
+        ORDER BY next_attempt_at
+        LIMIT {PLACEHOLDER}
+        {"FOR UPDATE SKIP LOCKED" if IS_POSTGRES else ""}
+    )
+    RETURNING id, to_email, subject, html, attempts
+"""
+
+
+def enqueue_email(conn, to_email, subject, html):
+    """Add a message to the outbox inside the caller's transaction; it is sent only if that commits."""
+    cursor = conn.cursor()
+    cursor.execute(
+        f"INSERT INTO email_outbox (to_email, subject, html, next_attempt_at) VALUES ({PLACEHOLDER}, {PLACEHOLDER}, {PLACEHOLDER}, {PLACEHOLDER})",
+        (to_email, subject, html, time.time()),
+    )
+
+
+def retry_delay(attempts, base=EMAIL_BACKOFF_BASE, cap=EMAIL_BACKOFF_MAX):
+    """Exponential backoff with full jitter: up to base * 2^(attempts-1), capped."""
+    return random.uniform(0.5, 1.0) * min(cap, base * 2 ** max(0, attempts - 1))
+
+
+class EmailOutboxWorker:
+    """Delivers ``email_outbox`` rows in batches from a background thread.
+
+    Rows are claimed with a lease (``FOR UPDATE SKIP LOCKED`` on Postgres), so any
+    number of web processes or standalone workers can poll the same table. A
+    failed batch is retried with exponential backoff; after ``max_attempts`` the
+    rows are parked as ``dead`` for an operator to inspect.
+    """
+
+    def __init__(self, send_batch, batch_size=EMAIL_BATCH_SIZE, poll_interval=EMAIL_POLL_INTERVAL,
+                 max_attempts=EMAIL_MAX_ATTEMPTS, lease_seconds=EMAIL_LEASE_SECONDS, clock=time.time):
+        self.send_batch = send_batch
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._clock = clock
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.sent = 0
+        self.failed = 0
+        self.dead_lettered = 0
+
+    def claim(self, conn):
+        now = self._clock()
+        cursor = conn.cursor()
+        cursor.execute(_CLAIM_SQL, (now + self.lease_seconds, now, now, self.batch_size))
+        rows = cursor.fetchall()
+        conn.commit()
+        return rows
+
+    def _record(self, conn, rows, results):
+        cursor = conn.cursor()
+        now = self._clock()
+        for row, result in zip(rows, results):
+            if result.get("success"):
+                cursor.execute(
+                    f"UPDATE email_outbox SET status = '{SENT}', provider_id = {PLACEHOLDER}, last_error = NULL, lease_until = NULL, sent_at = CURRENT_TIMESTAMP WHERE id = {PLACEHOLDER}",
+                    (result.get("id"), row["id"]),
+                )
+                self.sent += 1
+            elif row["attempts"] >= self.max_attempts:
+                cursor.execute(
+                    f"UPDATE email_outbox SET status = '{DEAD}', last_error = {PLACEHOLDER}, lease_until = NULL WHERE id = {PLACEHOLDER}",
+                    (str(result.get("error", ""))[:500], row["id"]),
+                )
+                self.dead_lettered += 1
+            else:
+                cursor.execute(
+                    f"UPDATE email_outbox SET status = '{PENDING}', next_attempt_at = {PLACEHOLDER}, last_error = {PLACEHOLDER}, lease_until = NULL WHERE id = {PLACEHOLDER}",
+                    (now + retry_delay(row["attempts"]), str(result.get("error", ""))[:500], row["id"]),
+                )
+                self.failed += 1
+        conn.commit()
+
+    def run_once(self):
+        """Claim and deliver one batch; returns the number of rows processed."""
+        with get_db() as conn:
+            rows = self.claim(conn)
+        if not rows:
+            return 0
+        messages = [{"to": row["to_email"], "subject": row["subject"], "html": row["html"]} for row in rows]
+        try:
+            results = self.send_batch(messages)
+        except Exception as e:
+            results = [{"success": False, "error": str(e)}] * len(rows)
+        with get_db() as conn:
+            self._record(conn, rows, results)
+        return len(rows)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                print(f"❌ Email outbox error: {e}", flush=True)
+                processed = 0
+            if processed >= self.batch_size:
+                continue  # backlog: keep draining without waiting
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def start(self):
+        """Start (or restart after fork) the delivery thread for this process."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name="email-outbox", daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        """Wake the worker so a just-committed message goes out without waiting for the next poll."""
+        if EMAIL_WORKER_MODE == "thread":
+            self.start()
+        self._wake.set()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+
+    def stats(self):
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT status, COUNT(*) AS count FROM email_outbox GROUP BY status")
+            by_status = {row["status"]: row["count"] for row in cursor.fetchall()}
+        return {"sent": self.sent, "failed": self.failed, "dead_lettered": self.dead_lettered, "outbox": by_status}
+
@@ -1,16 +1,21 @@
 import os
-import resend
 from dotenv import load_dotenv
 
+from services.email_outbox import EmailOutboxWorker, enqueue_email
+
 load_dotenv()
 
 class EmailService:
     def __init__(self):
         self.api_key = os.getenv("RESEND_API_KEY")
-        if self.api_key:
-            resend.api_key = self.api_key
         self.from_email = os.getenv("MAIL_FROM", "onboarding@resend.dev")
 
+    def _client(self):
+        """The resend SDK, imported on the first real send; simulation mode never loads it."""
+        import resend
+        resend.api_key = self.api_key
+        return resend
+
     def send_email(self, to_email, subject, html_content):
         if not self.api_key:
             print(f"⚠️ [SIMULATION] Email to {to_email}: {subject}")
@@ -23,13 +28,32 @@ class EmailService:
                 "subject": subject,
                 "html": html_content,
             }
-            email = resend.Emails.send(params)
+            email = self._client().Emails.send(params)
             return {"success": True, "id": email.get("id")}
         except Exception as e:
             print(f"❌ Resend Error: {e}")
             return {"success": False, "error": str(e)}
 
-    def send_welcome_email(self, user_email, username):
+    def send_batch(self, messages):
+        """Send up to 100 ``{"to", "subject", "html"}`` messages in one Resend call; one result per message."""
+        if not self.api_key:
+            return [self.send_email(m["to"], m["subject"], m["html"]) for m in messages]
+        params = [{"from": self.from_email, **message} for message in messages]
+        try:
+            response = self._client().Batch.send(params)
+        except Exception as e:
+            print(f"❌ Resend Batch Error: {e}")
+            return [{"success": False, "error": str(e)}] * len(messages)
+        sent = response.get("data", []) if isinstance(response, dict) else response
+        if len(sent) != len(messages):
+            return [{"success": False, "error": f"Unexpected batch response: {response}"}] * len(messages)
+        return [{"success": True, "id": item.get("id")} for item in sent]
+
+    def queue_email(self, conn, to_email, subject, html):
+        """Durably queue a message in the caller's transaction; call ``email_worker.notify()`` after commit."""
+        enqueue_email(conn, to_email, subject, html)
+
+    def welcome_email(self, username):
         subject = "Welcome to MoodMate 🌿"
         html = f"""
         <div style="font-family: sans-serif; color: #4B4F40; max-width: 600px; margin: auto;">
@@ -40,9 +64,12 @@ class EmailService:
             <p style="font-size: 12px; color: #888;">If you didn't create an account, please ignore this email.</p>
         </div>
         """
-        return self.send_email(user_email, subject, html)
+        return subject, html
 
-    def send_booking_confirmation(self, user_email, doctor_name, slot):
+    def send_welcome_email(self, user_email, username):
+        return self.send_email(user_email, *self.welcome_email(username))
+
+    def booking_confirmation(self, doctor_name, slot):
         subject = "Therapy Session Confirmed - MoodMate"
         html = f"""
         <div style="font-family: sans-serif; color: #4B4F40; max-width: 600px; margin: auto;">
@@ -56,7 +83,15 @@ class EmailService:
             <p>The MoodMate Team</p>
         </div>
         """
-        return self.send_email(user_email, subject, html)
+        return subject, html
+
+    def send_booking_confirmation(self, user_email, doctor_name, slot):
+        return self.send_email(user_email, *self.booking_confirmation(doctor_name, slot))
+
+    def queue_booking_confirmation(self, conn, user_email, doctor_name, slot):
+        self.queue_email(conn, user_email, *self.booking_confirmation(doctor_name, slot))
 
 # Global instance
 email_service = EmailService()
+# Resend's batch endpoint accepts at most 100 messages per call.
+email_worker = EmailOutboxWorker(email_service.send_batch, batch_size=min(100, int(os.getenv("EMAIL_BATCH_SIZE", "50"))))
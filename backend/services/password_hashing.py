@@ -0,0 +1,164 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+# bcrypt work factor for new hashes. Stored hashes with a different cost are
+# rehashed transparently the next time their owner logs in.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hash jobs allowed in flight (running + queued) before callers get a 503.
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 4)))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+# "process" hashes in a worker pool; "inline" hashes on the calling thread (tests, tiny deployments).
+PASSWORD_HASH_MODE = os.getenv("PASSWORD_HASH_MODE", "process")
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hash pool is saturated; the request should be retried shortly."""
+
+
+def to_hash_bytes(stored_hash):
+    """Normalize a stored hash, including legacy rows saved as the repr of a bytes object ("b'$2b$...'")."""
+    if isinstance(stored_hash, bytes):
+        return stored_hash
+    if isinstance(stored_hash, str) and stored_hash.startswith("b'"):
+        return stored_hash[2:-1].encode("utf-8")
+    return str(stored_hash).encode("utf-8")
+
+
+def hash_password(password, rounds=BCRYPT_ROUNDS):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def check_password(password, stored_hash):
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), to_hash_bytes(stored_hash))
+    except (TypeError, ValueError):
+        return False
+
+
+def hash_cost(stored_hash):
+    """Work factor of a "$2b$12$..." hash, or None if it is not a bcrypt hash."""
+    parts = to_hash_bytes(stored_hash).split(b"$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    """Runs bcrypt in a small process pool so hashing never occupies a web thread's CPU.
+
+    At most ``max_pending`` jobs may be running or queued; beyond that ``hash``
+    and ``verify`` raise ``PasswordHasherBusy`` immediately instead of letting
+    a login burst pile up behind the pool.
+    """
+
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, max_pending=PASSWORD_HASH_MAX_PENDING, rounds=BCRYPT_ROUNDS,
+                 timeout=PASSWORD_HASH_TIMEOUT, mode=PASSWORD_HASH_MODE):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self.timeout = timeout
+        self.mode = mode
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._latency = {"hash": deque(maxlen=512), "verify": deque(maxlen=512)}
+        self._stats = {"hashes": 0, "verifies": 0, "rehashes": 0, "rejected": 0, "timeouts": 0}
+
+    def start(self):
+        """Create the worker processes now; called at boot, before the app starts its own threads.
+
+        The boot pool forks, so workers start in milliseconds and never re-import
+        the web app; the only other threads alive then are library timers that
+        hold nothing a hash worker touches. A pool built later (after a worker
+        died, or first used once requests are being served) starts from a
+        forkserver instead, since forking then could copy a lock another thread holds.
+        """
+        if self.mode == "inline":
+            return
+        pool = self._pool(boot=True)
+        pool.submit(hash_cost, "").result()  # forces every worker to be created
+
+    def _pool(self, boot=False):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=self._context(boot))
+                self._pid = os.getpid()
+            return self._executor
+
+    @staticmethod
+    def _context(boot=False):
+        if boot and hasattr(os, "fork"):
+            return multiprocessing.get_context("fork")
+        methods = multiprocessing.get_all_start_methods()
+        return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+    def _release_slot(self, future=None):
+        self._slots.release()
+
+    def _run(self, kind, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self._stats["rejected"] += 1
+            raise PasswordHasherBusy("Password hashing is at capacity")
+        started = time.perf_counter()
+        holds_slot = True
+        try:
+            if self.mode == "inline":
+                return fn(*args)
+            try:
+                future = self._pool().submit(fn, *args)
+                # A caller that gives up does not stop the job, so the job keeps the slot until it ends.
+                holds_slot = False
+                future.add_done_callback(self._release_slot)
+                return future.result(self.timeout)
+            except FutureTimeout:
+                self._stats["timeouts"] += 1
+                raise PasswordHasherBusy("Password hashing timed out") from None
+            except BrokenProcessPool:
+                self.shutdown()  # a worker died; the next call builds a fresh pool
+                raise PasswordHasherBusy("Password hashing pool restarted") from None
+        finally:
+            if holds_slot:
+                self._release_slot()
+            self._latency[kind].append((time.perf_counter() - started) * 1000)
+
+    def hash(self, password):
+        self._stats["hashes"] += 1
+        return self._run("hash", hash_password, password, self.rounds)
+
+    def verify(self, password, stored_hash):
+        self._stats["verifies"] += 1
+        return self._run("verify", check_password, password, stored_hash)
+
+    def needs_rehash(self, stored_hash):
+        """True for hashes made at another cost and for legacy rows stored as bytes or their repr."""
+        return not isinstance(stored_hash, str) or stored_hash.startswith("b'") or hash_cost(stored_hash) != self.rounds
+
+    def rehash(self, password):
+        self._stats["rehashes"] += 1
+        return self.hash(password)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self):
+        stats = dict(self._stats, mode=self.mode, rounds=self.rounds, workers=self.workers, max_pending=self.max_pending)
+        for kind, samples in self._latency.items():
+            ordered = sorted(samples)
+            stats[f"{kind}_p50_ms"] = ordered[len(ordered) // 2] if ordered else 0.0
+            stats[f"{kind}_p99_ms"] = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] if ordered else 0.0
+        return stats
+
+
+password_hasher = PasswordHasher()
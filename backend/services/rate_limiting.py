@@ -0,0 +1,192 @@
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from limits import parse_many
+from limits.storage import MemoryStorage, Storage
+from limits.storage.base import SlidingWindowCounterSupport
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+from database import DB_PATH
+
+RATELIMIT_DB_PATH = os.getenv("RATELIMIT_DB_PATH") or os.path.join(os.path.dirname(DB_PATH), "ratelimit.db")
+# Any limits URI works (memory://, redis://...); the default is shared by every worker on this host.
+RATELIMIT_STORAGE_URI = os.getenv("RATELIMIT_STORAGE_URI") or f"moodmate+sqlite://{RATELIMIT_DB_PATH}"
+RATELIMIT_DEFAULT = os.getenv("RATELIMIT_DEFAULT", "500 per day;100 per hour")
+RATELIMIT_CHAT = os.getenv("RATELIMIT_CHAT", "20 per minute;300 per day")
+RATELIMIT_LOGIN = os.getenv("RATELIMIT_LOGIN", "10 per minute;50 per hour")
+RATELIMIT_FORGOT = os.getenv("RATELIMIT_FORGOT", "3 per 15 minutes;10 per day")
+RATELIMIT_TTS = os.getenv("RATELIMIT_TTS", "10 per minute;100 per day")
+# Expired windows are swept every this many writes, per process.
+_SWEEP_EVERY = 1000
+
+
+class SQLiteRateLimitStorage(Storage, SlidingWindowCounterSupport):
+    """Rate-limit counters in a local SQLite file, shared by every worker process on the host.
+
+    Each check is a single autocommitted statement, so the database's write lock
+    makes it atomic across processes without a round trip to an external service.
+    The file holds nothing but counters: it runs with ``synchronous=OFF`` and may
+    lose the last few hits if the machine (not the process) crashes.
+    """
+
+    STORAGE_SCHEME = ["moodmate+sqlite"]
+
+    def __init__(self, uri=f"moodmate+sqlite://{RATELIMIT_DB_PATH}", wrap_exceptions=False, busy_timeout_ms=1000, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri.split("://", 1)[1] or RATELIMIT_DB_PATH
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._writes = 0
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID"
+            )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conn(self):
+        # One connection per thread, reopened after a fork so workers never share a file handle.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _wrote(self, conn, now):
+        self._writes += 1
+        if self._writes % _SWEEP_EVERY == 0:
+            conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        conn = self._conn()
+        count = conn.execute(
+            """
+            INSERT INTO rate_limits (key, count, expires_at) VALUES (:key, :amount, :now + :expiry)
+            ON CONFLICT(key) DO UPDATE SET
+                count = CASE WHEN expires_at <= :now THEN excluded.count ELSE count + excluded.count END,
+                expires_at = CASE WHEN expires_at <= :now THEN excluded.expires_at ELSE expires_at END
+            RETURNING count
+            """,
+            {"key": key, "amount": amount, "now": now, "expiry": expiry},
+        ).fetchone()[0]
+        self._wrote(conn, now)
+        return count
+
+    def get(self, key):
+        row = self._conn().execute("SELECT count FROM rate_limits WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._conn().execute("SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+        return row[0] if row else now
+
+    def check(self):
+        try:
+            self._conn().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._conn().execute("DELETE FROM rate_limits").rowcount
+
+    def clear(self, key):
+        self._conn().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    # Sliding window counter: two fixed windows per limit, the previous one weighted by
+    # how much of it still overlaps the trailing ``expiry`` seconds.
+    @staticmethod
+    def _windows(key, expiry, now):
+        window = int(now // expiry)
+        return f"{key}/{window - 1}", f"{key}/{window}", (window + 2) * expiry, 1 - (now / expiry) % 1
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        previous, current, current_expires, weight = self._windows(key, expiry, now)
+        conn = self._conn()
+        # The check and the increment are one statement, so no other worker can slip in between.
+        row = conn.execute(
+            """
+            INSERT INTO rate_limits (key, count, expires_at)
+            SELECT :current, :amount, :expires
+            WHERE CAST(COALESCE((SELECT count FROM rate_limits WHERE key = :previous AND expires_at > :now), 0) * :weight
+                       + COALESCE((SELECT count FROM rate_limits WHERE key = :current AND expires_at > :now), 0) AS INTEGER)
+                  + :amount <= :limit
+            ON CONFLICT(key) DO UPDATE SET count = count + excluded.count
+            RETURNING count
+            """,
+            {"current": current, "previous": previous, "amount": amount, "expires": current_expires,
+             "now": now, "weight": weight, "limit": limit},
+        ).fetchone()
+        self._wrote(conn, now)
+        return row is not None
+
+    def get_sliding_window(self, key, expiry):
+        now = time.time()
+        previous, current, current_expires, weight = self._windows(key, expiry, now)
+        previous_count, current_count = self.get(previous), self.get(current)
+        return previous_count, weight * expiry if previous_count else 0.0, current_count, current_expires - now
+
+    def clear_sliding_window(self, key, expiry):
+        previous, current, _, _ = self._windows(key, expiry, time.time())
+        self._conn().execute("DELETE FROM rate_limits WHERE key IN (?, ?)", (previous, current))
+
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    default_limits=[RATELIMIT_DEFAULT],
+    storage_uri=RATELIMIT_STORAGE_URI,
+    strategy="sliding-window-counter",
+    # If the store cannot be reached, count in process memory rather than failing requests.
+    in_memory_fallback_enabled=True,
+    headers_enabled=True,
+)
+
+# /api/chat and /api/chat/stream draw on one budget; the ASGI chat route shares it through the same scope.
+CHAT_SCOPE = "chat"
+chat_limit = limiter.shared_limit(RATELIMIT_CHAT, scope=CHAT_SCOPE)
+_chat_limits = parse_many(RATELIMIT_CHAT)
+# Every uncached reply is a call to Google's TTS endpoint; /api/tts and /api/tts/stream share one budget.
+tts_limit = limiter.shared_limit(RATELIMIT_TTS, scope="tts")
+# Counts the ASGI chat route in process memory while the shared store fails, as
+# in_memory_fallback_enabled does for the Flask routes.
+_chat_fallback = SlidingWindowCounterRateLimiter(MemoryStorage())
+
+
+def hit_chat_limit(client_address):
+    """``RATELIMIT_CHAT`` for the ASGI chat route, which never reaches Flask-Limiter; ``False`` once spent.
+
+    Hits the same keys as ``chat_limit`` on the Flask routes, so a client has one
+    budget however its requests are served. A locked or unreadable store never
+    fails the request: the hit is counted in memory instead.
+    """
+    if not limiter.enabled:
+        return True
+    try:
+        return all(limiter.limiter.hit(item, client_address, CHAT_SCOPE) for item in _chat_limits)
+    except limiter.limiter.storage.base_exceptions as exc:  # sqlite3.Error for the default store
+        print(f"Rate limit store unavailable, counting chat in memory: {exc}", flush=True)
+        return all(_chat_fallback.hit(item, client_address, CHAT_SCOPE) for item in _chat_limits)
+
+
+def retry_after(client_address):
+    """Seconds until every exhausted chat window for ``client_address`` has room again."""
+    try:
+        stats = [limiter.limiter.get_window_stats(item, client_address, CHAT_SCOPE) for item in _chat_limits]
+    except limiter.limiter.storage.base_exceptions:
+        stats = [_chat_fallback.get_window_stats(item, client_address, CHAT_SCOPE) for item in _chat_limits]
+    reset = max((window.reset_time for window in stats if window.remaining == 0), default=time.time())
+    return max(1, floor(reset - time.time()))
@@ -0,0 +1,209 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from services.text_classifier import classify
+
+# Opt-in: replies are generic for a given prompt only because chat() sends no
+# history today; anything personalized must bypass the cache.
+AI_RESPONSE_CACHE = os.getenv("AI_RESPONSE_CACHE", "0").lower() in ("1", "true", "yes")
+AI_RESPONSE_CACHE_SIZE = int(os.getenv("AI_RESPONSE_CACHE_SIZE", "2000"))
+AI_RESPONSE_CACHE_TTL = float(os.getenv("AI_RESPONSE_CACHE_TTL", "3600"))
+AI_RESPONSE_CACHE_THRESHOLD = float(os.getenv("AI_RESPONSE_CACHE_THRESHOLD", "0.8"))
+
+# Long messages are almost always personal detail; don't serve them a stock reply.
+MAX_CACHEABLE_CHARS = 160
+UNCACHEABLE_MOODS = {"crisis"}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CONTRACTION_RE = re.compile(r"(\w)['’](\w)")
+
+
+def normalize_message(text):
+    """Lowercase, fold contractions ("can't" -> "cant") and collapse punctuation/whitespace."""
+    text = _CONTRACTION_RE.sub(r"\1\2", (text or "").lower())
+    return " ".join(_WORD_RE.findall(text))
+
+
+def shingles(normalized, size=3):
+    """Character n-grams of the padded text; robust to typos and small rewordings."""
+    padded = f" {normalized} "
+    if len(padded) <= size:
+        return {padded}
+    return {padded[i:i + size] for i in range(len(padded) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures with ``num_perm`` universal hash functions over 64-bit shingle hashes."""
+
+    def __init__(self, num_perm=32, seed=7):
+        self.num_perm = num_perm
+        params = []
+        for index in range(num_perm):
+            # Deterministic (a, b) pairs so signatures are stable across workers.
+            digest = hashlib.blake2b(f"{seed}:{index}".encode(), digest_size=16).digest()
+            params.append((int.from_bytes(digest[:8], "little") % (_MERSENNE_PRIME - 1) + 1, int.from_bytes(digest[8:], "little") % _MERSENNE_PRIME))
+        self._params = params
+
+    def signature(self, normalized):
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles(normalized)]
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._params)
+
+    @staticmethod
+    def similarity(left, right):
+        return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+
+class CachedReply:
+    __slots__ = ("key", "mood", "text", "source", "signature", "bands", "expires_at", "hits")
+
+    def __init__(self, key, mood, text, source, signature, bands, expires_at):
+        self.key = key
+        self.mood = mood
+        self.text = text
+        self.source = source
+        self.signature = signature
+        self.bands = bands
+        self.expires_at = expires_at
+        self.hits = 0
+
+
+class ResponseCache:
+    """Near-duplicate prompt cache with per-mood buckets, LRU eviction and a TTL.
+
+    Exact matches on the normalized text are a dict hit. Otherwise MinHash
+    signatures are split into ``bands`` for locality-sensitive lookup inside the
+    prompt's mood bucket, and the best candidate is served if its estimated
+    Jaccard similarity reaches ``threshold``.
+    """
+
+    def __init__(self, max_entries=AI_RESPONSE_CACHE_SIZE, ttl=AI_RESPONSE_CACHE_TTL,
+                 threshold=AI_RESPONSE_CACHE_THRESHOLD, num_perm=32, bands=8, enabled=AI_RESPONSE_CACHE, clock=time.monotonic):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.bands = bands
+        self._rows = num_perm // bands
+        self._hasher = MinHasher(num_perm)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (mood, normalized) -> CachedReply, oldest first
+        self._buckets = {}  # mood -> {(band, band_hash): set of keys}
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+
+    def cacheable(self, message, mood, personalized=False):
+        return (
+            self.enabled
+            and not personalized
+            and mood not in UNCACHEABLE_MOODS
+            and 0 < len(message or "") <= MAX_CACHEABLE_CHARS
+            and not classify(message).crisis
+        )
+
+    def _band_keys(self, signature):
+        rows = self._rows
+        return tuple((band, hash(signature[band * rows:(band + 1) * rows])) for band in range(self.bands))
+
+    def _remove(self, entry):
+        del self._entries[entry.key]
+        bucket = self._buckets.get(entry.mood, {})
+        for band_key in entry.bands:
+            keys = bucket.get(band_key)
+            if keys is not None:
+                keys.discard(entry.key)
+                if not keys:
+                    del bucket[band_key]
+
+    def get(self, message, mood, personalized=False):
+        """Return a ``CachedReply`` for this prompt or a near-duplicate, else ``None``."""
+        if not self.cacheable(message, mood, personalized):
+            with self._lock:
+                self.bypassed += 1
+            return None
+        normalized = normalize_message(message)
+        key = (mood, normalized)
+        with self._lock:
+            now = self._clock()
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                entry.hits += 1
+                self.hits += 1
+                return entry
+        # Hash outside the lock; it is the only non-trivial work on a lookup.
+        signature = self._hasher.signature(normalized)
+        with self._lock:
+            now = self._clock()
+            bucket = self._buckets.get(mood, {})
+            candidates = set()
+            for band_key in self._band_keys(signature):
+                candidates.update(bucket.get(band_key, ()))
+            best, best_score = None, self.threshold
+            for candidate_key in candidates:
+                candidate = self._entries[candidate_key]
+                if candidate.expires_at <= now:
+                    self._remove(candidate)
+                    continue
+                score = self._hasher.similarity(signature, candidate.signature)
+                if score >= best_score:
+                    best, best_score = candidate, score
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best.key)
+            best.hits += 1
+            self.near_hits += 1
+            return best
+
+    def put(self, message, mood, text, source, personalized=False):
+        if not text or not self.cacheable(message, mood, personalized):
+            return
+        normalized = normalize_message(message)
+        key = (mood, normalized)
+        signature = self._hasher.signature(normalized)
+        bands = self._band_keys(signature)
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                self._remove(existing)
+            entry = CachedReply(key, mood, text, source, signature, bands, self._clock() + self.ttl)
+            self._entries[key] = entry
+            bucket = self._buckets.setdefault(mood, {})
+            for band_key in bands:
+                bucket.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries.values())))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.near_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache()
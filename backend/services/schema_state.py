@@ -0,0 +1,48 @@
+import hashlib
+import hmac
+import json
+
+from database import IS_POSTGRES
+
+PLACEHOLDER = "%s" if IS_POSTGRES else "?"
+
+# One row per seed set ("seed:doctors", "seed:admin") with a fingerprint of what
+# was last seeded, so a restart can skip unchanged seeds. The schema itself is
+# versioned by migrations.py, not here.
+CREATE_SCHEMA_STATE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_state (
+        name TEXT PRIMARY KEY,
+        fingerprint TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def fingerprint(value, key=None):
+    """Stable digest of JSON-serializable ``value``; keyed (HMAC) when it covers a secret."""
+    payload = json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+    if key:
+        return hmac.new(key.encode("utf-8"), payload, hashlib.sha256).hexdigest()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def read_state(conn):
+    """``{name: fingerprint}`` for every seed set recorded so far; empty on a brand-new database."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT name, fingerprint FROM schema_state")
+    except Exception:
+        conn.rollback()  # table not there yet (Postgres also needs the aborted transaction cleared)
+        return {}
+    return {row["name"]: row["fingerprint"] for row in cursor.fetchall()}
+
+
+def record_state(conn, name, value):
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        INSERT INTO schema_state (name, fingerprint) VALUES ({PLACEHOLDER}, {PLACEHOLDER})
+        ON CONFLICT(name) DO UPDATE SET fingerprint = excluded.fingerprint, applied_at = CURRENT_TIMESTAMP
+        """,
+        (name, value),
+    )
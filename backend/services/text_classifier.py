@@ -0,0 +1,127 @@
+import string
+
+# Keyword tables for the rule-based safety, mood and moderation checks. Order
+# matters for moods and topics: the first one present wins.
+CRISIS_KEYWORDS = ("suicide", "kill myself", "end it all", "end my life", "suicidal", "want to die", "marna chahta")
+MOOD_KEYWORDS = {
+    "happy": ("happy", "good", "great", "awesome", "excited", "joy", "smile", "khush", "achha"),
+    "sad": ("sad", "depressed", "unhappy", "cry", "tears", "udasi", "dukhi", "lonely"),
+    "angry": ("angry", "mad", "furious", "gussa", "irritated", "hate"),
+    "anxious": ("anxious", "nervous", "worried", "stress", "tension", "chinta", "panic"),
+}
+TOXIC_KEYWORDS = ("hate", "kill", "idiot", "stupid")
+TOPIC_KEYWORDS = {
+    "anxiety": ("anxious", "panic", "worry", "tense", "stress", "scared"),
+    "sadness": ("sad", "depressed", "lonely", "cry", "hurt", "broke"),
+    "sleep": ("sleep", "insomnia", "night", "tired", "wake"),
+    "anger": ("angry", "mad", "hate", "fight", "annoy", "piss"),
+}
+
+SUFFIXES = ("", "s", "es", "d", "ed", "ing", "er", "ers", "ly", "y", "ful", "ness", "ic", "ity", "en", "n")
+
+# ASCII-fold + lowercase + punctuation-to-space in one bytes.translate call. The
+# keywords are ASCII, so any other character can only ever act as a separator.
+_KEEP = set((string.ascii_lowercase + string.digits).encode())
+_FOLD = bytes(c if c in _KEEP else c + 32 if 65 <= c <= 90 else 32 for c in range(256))
+
+
+def word_forms(keyword):
+    """Inflections a keyword matches as a whole word: "hate" -> hates/hated/hateful/..."""
+    forms = {keyword + suffix for suffix in SUFFIXES}
+    if keyword.endswith("y"):
+        forms.update(keyword[:-1] + ending for ending in ("ies", "ied", "ier", "ily", "iness"))  # worry -> worried
+    elif keyword.endswith("e"):
+        forms.update(keyword[:-1] + ending for ending in ("ing", "ed"))  # wake -> waking
+    elif keyword.endswith("c"):
+        forms.update(keyword + ending for ending in ("ked", "king", "ky"))  # panic -> panicking
+    return forms
+
+
+def _build_tables():
+    words = {}  # word form (bytes) -> set of labels
+    phrases = []  # (words, padded phrase) for multi-word crisis phrases
+
+    def add(keyword, label):
+        if " " in keyword:
+            encoded = keyword.encode()
+            phrases.append((frozenset(encoded.split()), b" " + encoded + b" "))
+            return
+        for form in word_forms(keyword):
+            words.setdefault(form.encode(), set()).add(label)
+
+    for keyword in CRISIS_KEYWORDS:
+        add(keyword, ("crisis", None))
+    for mood, keywords in MOOD_KEYWORDS.items():
+        for keyword in keywords:
+            add(keyword, ("mood", mood))
+    for keyword in TOXIC_KEYWORDS:
+        add(keyword, ("toxic", None))
+    for topic, keywords in TOPIC_KEYWORDS.items():
+        for keyword in keywords:
+            add(keyword, ("topic", topic))
+    return {form: frozenset(labels) for form, labels in words.items()}, tuple(phrases)
+
+
+# Built once at import; classify() only does set lookups against these.
+WORD_LABELS, CRISIS_PHRASES = _build_tables()
+_KNOWN_WORDS = frozenset(WORD_LABELS)
+
+
+class TextSignals:
+    __slots__ = ("crisis", "toxic", "moods", "topics")
+
+    def __init__(self, crisis, toxic, moods, topics):
+        self.crisis = crisis
+        self.toxic = toxic
+        self.moods = moods
+        self.topics = topics
+
+    @property
+    def mood(self):
+        for mood in MOOD_KEYWORDS:
+            if mood in self.moods:
+                return mood
+        return "neutral"
+
+    @property
+    def topic(self):
+        for topic in TOPIC_KEYWORDS:
+            if topic in self.topics:
+                return topic
+        return "general"
+
+
+def classify(text):
+    """Crisis, toxicity, mood and heuristic-topic signals for ``text``.
+
+    The text is tokenized once and the token set is intersected with every
+    keyword form at C speed. Matching is on whole words (plus inflections), so
+    "happy" no longer fires inside "unhappy" nor "hate" inside "whatever".
+    Multi-word crisis phrases are confirmed on the token sequence, so they still
+    match across extra spaces or punctuation.
+    """
+    tokens = (text or "").encode("ascii", "replace").translate(_FOLD).split()
+    present = set(tokens)
+    crisis = toxic = False
+    moods = set()
+    topics = set()
+    for word in present.intersection(_KNOWN_WORDS):
+        for kind, value in WORD_LABELS[word]:
+            if kind == "crisis":
+                crisis = True
+            elif kind == "toxic":
+                toxic = True
+            elif kind == "mood":
+                moods.add(value)
+            else:
+                topics.add(value)
+    if not crisis:
+        joined = None
+        for phrase_words, phrase in CRISIS_PHRASES:
+            if phrase_words <= present:
+                if joined is None:
+                    joined = b" " + b" ".join(tokens) + b" "
+                if phrase in joined:
+                    crisis = True
+                    break
+    return TextSignals(crisis, toxic, moods, topics)
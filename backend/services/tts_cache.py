@@ -0,0 +1,282 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+
+from database import BASE_DIR
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR") or os.path.join(BASE_DIR, "static", "audio")
+TTS_CACHE_MAX_MB = float(os.getenv("TTS_CACHE_MAX_MB", "200"))
+TTS_MAX_CHARS = int(os.getenv("TTS_MAX_CHARS", "3000"))
+TTS_DEFAULT_LANG = os.getenv("TTS_LANG", "en")
+# gTTS picks the accent from the Google Translate domain; only these are ever contacted.
+TTS_VOICES = ("co.in", "com", "co.uk", "com.au", "ca", "ie", "co.za")
+TTS_DEFAULT_VOICE = os.getenv("TTS_VOICE", "co.in")
+# Audio for a key never changes, so clients and CDNs may keep it for a year.
+AUDIO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Streaming synthesis requests this many sentences ahead of the one being sent.
+TTS_STREAM_LOOKAHEAD = int(os.getenv("TTS_STREAM_LOOKAHEAD", "2"))
+
+INDEX_NAME = ".index.json"
+# Content keys, and the uuid4 hex names of files written before the cache existed.
+KEY_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+LANG_PATTERN = re.compile(r"^[a-z]{2,3}(-[A-Za-z]{2,4})?$")
+_INDEX_SAVE_INTERVAL = 30.0
+_SENTENCE_END = re.compile(r"(?<=[.!?\u0964])\s+")
+_MIN_SENTENCE_CHARS = 12
+
+_tts_executor = ThreadPoolExecutor(max_workers=int(os.getenv("TTS_WORKERS", "4")), thread_name_prefix="tts")
+
+
+def normalize_text(text):
+    """What the voice actually reads: NFKC-folded, whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", text or "").split())
+
+
+def audio_key(text, voice=TTS_DEFAULT_VOICE, lang=TTS_DEFAULT_LANG):
+    payload = f"{lang}\0{voice}\0{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+def split_sentences(text):
+    """Sentences to synthesize one at a time; fragments like "Hi." ride along with the next one."""
+    sentences = []
+    carry = ""
+    for part in _SENTENCE_END.split(normalize_text(text)):
+        part = f"{carry} {part}".strip() if carry else part
+        if len(part) < _MIN_SENTENCE_CHARS:
+            carry = part
+            continue
+        sentences.append(part)
+        carry = ""
+    if carry:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {carry}"
+        else:
+            sentences.append(carry)
+    return sentences
+
+
+def synthesize_mp3(text, lang, voice, fp):
+    from gtts import gTTS  # imported on the first synthesis; see bench_import_time.py
+    gTTS(text, lang=lang, tld=voice).write_to_fp(fp)
+
+
+class AudioCache:
+    """Content-addressed mp3 store for spoken replies.
+
+    Files are named by ``audio_key(text, voice, lang)``, so the same reply is
+    synthesized once and then served from disk. ``.index.json`` records size
+    and last use per file; when the directory outgrows ``max_bytes`` the least
+    recently used files are deleted. Each worker keeps its own copy of the
+    index and rescans the directory before writing, which picks up files other
+    workers added.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=int(TTS_CACHE_MAX_MB * 1024 * 1024), synthesize=synthesize_mp3,
+                 clock=time.time):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.synthesize = synthesize
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> lock held while that key is synthesized
+        self._entries = None  # key -> {"size", "last_used"}, least recently used first
+        self._dirty = False
+        self._saved_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    # --- index -----------------------------------------------------------------
+
+    def _scan(self):
+        """Merge the index file with what is actually on disk (caller holds the lock)."""
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(os.path.join(self.directory, INDEX_NAME), encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            saved = {}
+        known = self._entries or {}
+        entries = {}
+        with os.scandir(self.directory) as files:
+            for item in files:
+                key, ext = os.path.splitext(item.name)
+                if ext != ".mp3" or not KEY_PATTERN.match(key):
+                    continue
+                stat = item.stat()
+                # Files nobody has indexed yet (e.g. from before the cache) age from their mtime.
+                last_used = max(saved.get(key, {}).get("last_used", 0), known.get(key, {}).get("last_used", 0)) or stat.st_mtime
+                entries[key] = {"size": stat.st_size, "last_used": last_used}
+        self._entries = OrderedDict(sorted(entries.items(), key=lambda item: item[1]["last_used"]))
+
+    def _save(self):
+        index_path = os.path.join(self.directory, INDEX_NAME)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, index_path)
+        self._dirty = False
+        self._saved_at = self._clock()
+
+    def _ensure_loaded(self):
+        if self._entries is None:
+            self._scan()
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            key, entry = self._entries.popitem(last=False)
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+            total -= entry["size"]
+            self.evictions += 1
+
+    # --- public ----------------------------------------------------------------
+
+    def lookup(self, key):
+        """Path of a cached file (marking it recently used), or None."""
+        if not KEY_PATTERN.match(key or ""):
+            return None
+        with self._lock:
+            self._ensure_loaded()
+            path = self.path(key)
+            entry = self._entries.get(key)
+            if not os.path.exists(path):
+                self._entries.pop(key, None)  # evicted by another worker
+                return None
+            if entry is None:  # written by another worker since our last scan
+                entry = self._entries[key] = {"size": os.path.getsize(path), "last_used": 0}
+            entry["last_used"] = self._clock()
+            self._entries.move_to_end(key)
+            self._dirty = True
+            if self._clock() - self._saved_at >= _INDEX_SAVE_INTERVAL:
+                self._save()
+            return path
+
+    def commit(self, key, tmp_path):
+        """Move a fully written ``tmp_path`` into the cache as ``key`` and enforce the size budget."""
+        os.replace(tmp_path, self.path(key))
+        with self._lock:
+            self._scan()
+            self._entries[key] = {"size": os.path.getsize(self.path(key)), "last_used": self._clock()}
+            self._entries.move_to_end(key)
+            self._evict()
+            self._save()
+
+    def temp_path(self, key):
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    @contextmanager
+    def _synthesizing(self, key):
+        """Held while ``key`` is synthesized: concurrent requests for the same reply wait for one synthesis."""
+        with self._lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+    def get_or_create(self, text, voice=TTS_DEFAULT_VOICE, lang=TTS_DEFAULT_LANG):
+        """``(key, created)``: reuse the cached mp3 for this text/voice/lang or synthesize it once."""
+        key = audio_key(text, voice, lang)
+        if self.lookup(key):
+            self.hits += 1
+            return key, False
+        with self._synthesizing(key):
+            if self.lookup(key):
+                self.hits += 1
+                return key, False
+            self.misses += 1
+            tmp_path = self.temp_path(key)
+            try:
+                with open(tmp_path, "wb") as f:
+                    self.synthesize(normalize_text(text), lang, voice, f)
+                self.commit(key, tmp_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            return key, True
+
+    def _synthesize_bytes(self, text, lang, voice):
+        buffer = BytesIO()
+        self.synthesize(text, lang, voice, buffer)
+        return buffer.getvalue()
+
+    def stream(self, text, voice=TTS_DEFAULT_VOICE, lang=TTS_DEFAULT_LANG, lookahead=TTS_STREAM_LOOKAHEAD):
+        """Yield mp3 bytes sentence by sentence, then store the assembled file under the text's key.
+
+        The next ``lookahead`` sentences are synthesized while the current one
+        is sent. MP3 frames concatenate, so the stored file is the chunks back
+        to back. If the consumer stops early nothing is cached. A second
+        request for the same reply waits on the key's in-flight lock like
+        ``get_or_create`` callers do, then reads the file the first one stored.
+        """
+        key = audio_key(text, voice, lang)
+        with self._synthesizing(key):
+            path = self.lookup(key)
+            if path:
+                self.hits += 1
+                with open(path, "rb") as cached:
+                    yield from iter(lambda: cached.read(64 * 1024), b"")
+                return
+            sentences = deque(split_sentences(text))
+            pending = deque()
+            tmp_path = self.temp_path(key)
+            complete = False
+            try:
+                with open(tmp_path, "wb") as out:
+                    while sentences or pending:
+                        while sentences and len(pending) <= lookahead:
+                            pending.append(_tts_executor.submit(self._synthesize_bytes, sentences.popleft(), lang, voice))
+                        chunk = pending.popleft().result()
+                        out.write(chunk)
+                        yield chunk
+                complete = True
+                self.misses += 1
+                self.commit(key, tmp_path)
+            finally:
+                for future in pending:
+                    future.cancel()
+                if not complete and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def stats(self):
+        with self._lock:
+            self._ensure_loaded()
+            return {
+                "files": len(self._entries),
+                "bytes": sum(entry["size"] for entry in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+audio_cache = AudioCache()
+atexit.register(audio_cache.flush)
@@ -0,0 +1,156 @@
+import atexit
+import os
+import threading
+
+from database import AUTO_ID, IS_POSTGRES, get_db
+from queries import Statement
+
+PLACEHOLDER = "%s" if IS_POSTGRES else "?"
+
+COUNTER_FLUSH_INTERVAL = float(os.getenv("COUNTER_FLUSH_INTERVAL", "5"))
+# Columns on ``users`` bumped through the ledger. Only the per-chat coin award is
+# batched; nothing bumps ``streak`` per request, so it stays a plain column.
+COUNTER_FIELDS = ("coins",)
+# Any constant works; it only has to be the same in every worker.
+_FLUSH_LOCK_ID = 720_020
+_FLUSH_BATCH = 5000
+
+# Deltas are appended to this ledger in the caller's transaction instead of
+# updating the user's row, so a chat never waits on another chat's row lock
+# and a crash can lose no increment that was committed.
+CREATE_COUNTER_DELTAS_SQL = f"""
+    CREATE TABLE IF NOT EXISTS counter_deltas (
+        {AUTO_ID},
+        user_id INTEGER NOT NULL,
+        field TEXT NOT NULL,
+        delta INTEGER NOT NULL
+    )
+"""
+
+INSERT_DELTA = Statement(
+    "insert_counter_delta",
+    "INSERT INTO counter_deltas (user_id, field, delta) VALUES (:user_id, :field, :delta)",
+    prepare=True,
+)
+PENDING_DELTAS = Statement(
+    "pending_counter_deltas",
+    "SELECT field, SUM(delta) AS total FROM counter_deltas WHERE user_id = :user_id GROUP BY field",
+    prepare=True,
+)
+
+
+def record_delta(conn, user_id, field, delta):
+    """Queue ``users.<field> += delta`` inside the caller's transaction; applied by the next flush."""
+    if field not in COUNTER_FIELDS:
+        raise ValueError(f"Unknown counter: {field}")
+    INSERT_DELTA.execute(conn, user_id=user_id, field=field, delta=delta)
+
+
+def pending_deltas(conn, user_id):
+    """``{field: total}`` not yet folded into the user's row; add it to what ``users`` says."""
+    rows = PENDING_DELTAS.execute(conn, user_id=user_id).fetchall()
+    return {row["field"]: row["total"] for row in rows}
+
+
+def with_pending(conn, user_id, row):
+    """A ``users`` row as a dict with pending counter deltas applied."""
+    values = dict(row)
+    for field, total in pending_deltas(conn, user_id).items():
+        values[field] = (values.get(field) or 0) + total
+    return values
+
+
+def flush_deltas(conn):
+    """Move every committed ledger row into ``users`` in one transaction; returns the rows applied.
+
+    The rows are claimed with ``DELETE ... RETURNING`` and exactly those rows
+    are added to ``users``, so a delta that commits while the flush runs is
+    either claimed by it or left for the next one, never deleted unapplied.
+    That holds under READ COMMITTED, where each statement takes its own
+    snapshot. On Postgres an advisory lock keeps two workers from flushing
+    at once; SQLite already allows only one writer at a time.
+    """
+    cursor = conn.cursor()
+    if IS_POSTGRES:
+        cursor.execute(f"SELECT pg_advisory_xact_lock({_FLUSH_LOCK_ID})")
+    cursor.execute("DELETE FROM counter_deltas RETURNING user_id, field, delta")
+    moved = cursor.fetchall()
+    if not moved:
+        conn.rollback()
+        return 0
+    totals = {}
+    for row in moved:
+        per_user = totals.setdefault(row["user_id"], dict.fromkeys(COUNTER_FIELDS, 0))
+        per_user[row["field"]] += row["delta"]
+    users = [(user_id, *(fields[field] for field in COUNTER_FIELDS)) for user_id, fields in totals.items()]
+    assignments = ", ".join(f"{field} = COALESCE(users.{field}, 0) + moved.{field}" for field in COUNTER_FIELDS)
+    columns = ", ".join(f"column{index + 2} AS {field}" for index, field in enumerate(COUNTER_FIELDS))
+    row_sql = f"({', '.join([PLACEHOLDER] * (len(COUNTER_FIELDS) + 1))})"
+    # One UPDATE per _FLUSH_BATCH users keeps SQLite under its bound-parameter limit.
+    for start in range(0, len(users), _FLUSH_BATCH):
+        batch = users[start:start + _FLUSH_BATCH]
+        cursor.execute(
+            f"UPDATE users SET {assignments} FROM (SELECT column1 AS user_id, {columns} "
+            f"FROM (VALUES {', '.join([row_sql] * len(batch))}) AS totals) AS moved WHERE users.id = moved.user_id",
+            tuple(value for row in batch for value in row),
+        )
+    conn.commit()
+    return len(moved)
+
+
+class CounterFlusher:
+    """Background thread that runs ``flush_deltas`` every ``interval`` seconds, and once more at exit."""
+
+    def __init__(self, interval=COUNTER_FLUSH_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.flushes = 0
+        self.applied = 0
+        self.failures = 0
+
+    def flush(self):
+        try:
+            with get_db() as conn:
+                applied = flush_deltas(conn)
+        except Exception as e:
+            self.failures += 1
+            print(f"Counter flush error: {e}", flush=True)
+            return 0
+        if applied:
+            self.flushes += 1
+            self.applied += applied
+        return applied
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name="counter-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) AS pending FROM counter_deltas")
+            pending = cursor.fetchone()["pending"]
+        return {"pending_rows": pending, "flushes": self.flushes, "applied": self.applied, "failures": self.failures}
+
+
+counter_flusher = CounterFlusher()
+atexit.register(counter_flusher.stop)
@@ -1,43 +1,9 @@
-import sqlite3
+from database import IS_POSTGRES, get_db
+from migrations import migrate
 
-conn = sqlite3.connect("moodmate.db")
-cur = conn.cursor()
+PLACEHOLDER = "%s" if IS_POSTGRES else "?"
 
-# ✅ Add premium columns (ignore if they already exist)
-try:
-    cur.execute("ALTER TABLE users ADD COLUMN premium_plan TEXT DEFAULT 'free'")
-except sqlite3.OperationalError:
-    print("⚠️ premium_plan column already exists")
-
-try:
-    cur.execute("ALTER TABLE users ADD COLUMN premium_expiry TEXT")
-except sqlite3.OperationalError:
-    print("⚠️ premium_expiry column already exists")
-
-# ✅ Create subscriptions table
-cur.execute("""
-CREATE TABLE IF NOT EXISTS premium_subscriptions (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER NOT NULL,
-    plan TEXT NOT NULL,
-    subscribed_date TEXT NOT NULL,
-    expiry_date TEXT,
-    status TEXT DEFAULT 'active',
-    FOREIGN KEY (user_id) REFERENCES users (id)
-)
-""")
-
-# ✅ Create features table
-cur.execute("""
-CREATE TABLE IF NOT EXISTS premium_features (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL,
-    description TEXT,
-    required_plan TEXT NOT NULL
-)
-""")
-
-# ✅ Insert default features (ignore duplicates)
+# The premium_plan/premium_expiry columns and the premium tables come from migrations.
 features = [
     ('Therapeutic Games', 'Access to all stress-relief games', 'pro'),
     ('Breathing Exercises', 'Guided breathing techniques', 'basic'),
@@ -49,10 +15,15 @@ features = [
     ('Merch Discounts', 'Discounts on MoodMate merchandise', 'elite')
 ]
 
-for f in features:
-    cur.execute("INSERT OR IGNORE INTO premium_features (name, description, required_plan) VALUES (?, ?, ?)", f)
-
-conn.commit()
-conn.close()
+with get_db() as conn:
+    migrate(conn)
+    cur = conn.cursor()
+    # ✅ Insert default features (ignore duplicates)
+    for f in features:
+        cur.execute(
+            f"INSERT INTO premium_features (name, description, required_plan) VALUES ({PLACEHOLDER}, {PLACEHOLDER}, {PLACEHOLDER}) ON CONFLICT(name) DO NOTHING",
+            f,
+        )
+    conn.commit()
 
 print("✅ Premium DB setup complete!")
@@ -0,0 +1,116 @@
+import asyncio
+import importlib
+import sys
+import threading
+import time
+import unittest
+from functools import lru_cache
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def provider(text="", delay=0.0, calls=None, name=None, error=None):
+    async def call(user_message, context, timeout):
+        if calls is not None:
+            calls.append(name)
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return text
+    return call
+
+
+class AsyncHedgedProviderTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.ai = importlib.import_module("services.ai_async")
+        cls.CircuitBreaker = importlib.import_module("services.circuit_breaker").CircuitBreaker
+
+    def run_hedged(self, *args, **kwargs):
+        return asyncio.run(self.ai.run_hedged_async(*args, **kwargs))
+
+    def test_slow_primary_is_hedged_and_cancelled(self):
+        cancelled = []
+
+        async def slow(user_message, context, timeout):
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            return "slow"
+
+        async def race():
+            result = await self.ai.run_hedged_async([("gemini", slow), ("groq", provider("fast"))], "hi", hedge_delay=0.05, budget=2)
+            await asyncio.sleep(0)
+            return result
+
+        started = time.monotonic()
+        self.assertEqual(asyncio.run(race()), ("groq", "fast"))
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(cancelled, [True])
+
+    def test_failure_starts_next_provider_without_waiting_for_hedge(self):
+        calls = []
+        started = time.monotonic()
+        source, text = self.run_hedged(
+            [
+                ("gemini", provider(error=RuntimeError("down"), calls=calls, name="gemini")),
+                ("groq", provider("", calls=calls, name="groq")),
+                ("local", provider("local reply", calls=calls, name="local")),
+            ],
+            "hi", hedge_delay=5, budget=2,
+        )
+        self.assertEqual((source, text), ("local", "local reply"))
+        self.assertEqual(calls, ["gemini", "groq", "local"])
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_overall_budget_caps_latency(self):
+        started = time.monotonic()
+        result = self.run_hedged([("gemini", provider("late", delay=2)), ("groq", provider("late", delay=2))], "hi", hedge_delay=0.05, budget=0.2)
+        self.assertEqual(result, (None, ""))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_outcomes_are_reported_to_breakers(self):
+        breakers = {"gemini": self.CircuitBreaker("gemini"), "groq": self.CircuitBreaker("groq")}
+        self.run_hedged(
+            [("gemini", provider(error=RuntimeError("down"))), ("groq", provider("ok"))],
+            "hi", hedge_delay=5, budget=2, breakers=breakers,
+        )
+        self.assertEqual(breakers["gemini"].snapshot()["failure_streak"], 1)
+        self.assertIsNotNone(breakers["groq"].latency_ewma)
+
+    def test_concurrent_chats_share_one_event_loop(self):
+        async def many():
+            return await asyncio.gather(*(
+                self.ai.run_hedged_async([("gemini", provider("ok", delay=0.2))], "hi", budget=2) for _ in range(200)
+            ))
+
+        started = time.monotonic()
+        results = asyncio.run(many())
+        self.assertEqual(len(results), 200)
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_first_provider_client_is_built_off_the_event_loop(self):
+        built_on = []
+
+        @lru_cache(maxsize=None)
+        def factory():
+            built_on.append(threading.get_ident())
+            return "client"
+
+        async def twice():
+            return [await self.ai._provider_client(factory) for _ in range(2)], threading.get_ident()
+
+        clients, loop_thread = asyncio.run(twice())
+        self.assertEqual(clients, ["client", "client"])
+        self.assertEqual(len(built_on), 1)
+        self.assertNotEqual(built_on[0], loop_thread)
+
+
+if __name__ == "__main__":
+    unittest.main()
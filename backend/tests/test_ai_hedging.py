@@ -0,0 +1,74 @@
+import importlib
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def provider(text="", delay=0.0, calls=None, name=None, error=None):
+    def call(user_message, context, timeout):
+        if calls is not None:
+            calls.append(name)
+        time.sleep(delay)
+        if error:
+            raise error
+        return text
+    return call
+
+
+class HedgedProviderTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.ai = importlib.import_module("services.ai_service")
+
+    def test_slow_primary_is_hedged_by_next_provider(self):
+        started = time.monotonic()
+        source, text = self.ai.run_hedged(
+            [("gemini", provider("slow", delay=1.0)), ("groq", provider("fast"))],
+            "hi", hedge_delay=0.05, budget=2,
+        )
+        self.assertEqual((source, text), ("groq", "fast"))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_failure_starts_next_provider_without_waiting_for_hedge(self):
+        calls = []
+        started = time.monotonic()
+        source, text = self.ai.run_hedged(
+            [
+                ("gemini", provider(error=RuntimeError("down"), calls=calls, name="gemini")),
+                ("groq", provider("", calls=calls, name="groq")),
+                ("local", provider("local reply", calls=calls, name="local")),
+            ],
+            "hi", hedge_delay=5, budget=2,
+        )
+        self.assertEqual((source, text), ("local", "local reply"))
+        self.assertEqual(calls, ["gemini", "groq", "local"])
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_fast_primary_never_starts_backups(self):
+        calls = []
+        source, _ = self.ai.run_hedged(
+            [("gemini", provider("ok", calls=calls, name="gemini")), ("groq", provider("backup", calls=calls, name="groq"))],
+            "hi", hedge_delay=0.5, budget=2,
+        )
+        self.assertEqual(source, "gemini")
+        self.assertEqual(calls, ["gemini"])
+
+    def test_overall_budget_caps_latency(self):
+        release = threading.Event()
+        hung = lambda *args: release.wait(2) and ""  # noqa: E731
+        started = time.monotonic()
+        source, text = self.ai.run_hedged([("gemini", hung), ("groq", hung)], "hi", hedge_delay=0.05, budget=0.2)
+        release.set()
+        self.assertEqual((source, text), (None, ""))
+        self.assertLess(time.monotonic() - started, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
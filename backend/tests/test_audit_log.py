@@ -0,0 +1,137 @@
+import importlib
+import os
+import sqlite3
+import sys
+import threading
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def audit_row(action, actor_id=1):
+    return ("user", actor_id, action, "user", actor_id, "success", "{}", "127.0.0.1", "tests")
+
+
+class AuditLogWriterTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Importing the module loads ``database``; keep it off the real moodmate.db.
+        os.environ.setdefault("MOODMATE_DB_PATH", str(BACKEND_DIR / "tests" / "test_moodmate.db"))
+        cls.audit = importlib.import_module("services.audit_log")
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(
+            """
+            CREATE TABLE audit_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                actor_type TEXT, actor_id INTEGER, action TEXT, entity_type TEXT, entity_id INTEGER,
+                status TEXT, details_json TEXT, ip_address TEXT, user_agent TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        self.db_lock = threading.Lock()
+        self.down = False
+
+        @contextmanager
+        def shared_db():
+            if self.down:
+                raise sqlite3.OperationalError("database is down")
+            with self.db_lock:
+                yield self.conn
+
+        patcher = mock.patch.object(self.audit, "get_db", shared_db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def make_writer(self, **kwargs):
+        kwargs.setdefault("flush_size", 3)
+        kwargs.setdefault("flush_interval", 60)
+        kwargs.setdefault("max_pending", 100)
+        writer = self.audit.AuditLogWriter(**kwargs)
+        self.addCleanup(writer.close, 1)
+        return writer
+
+    def actions(self):
+        with self.db_lock:
+            return [row["action"] for row in self.conn.execute("SELECT action FROM audit_logs ORDER BY id")]
+
+    def test_events_are_buffered_and_written_in_one_batch_in_order(self):
+        writer = self.make_writer(flush_size=100)
+        for index in range(5):
+            writer.record(audit_row(f"event_{index}"))
+
+        self.assertEqual(self.actions(), [])
+        self.assertEqual(writer.stats()["pending"], 5)
+
+        self.assertTrue(writer.flush())
+        self.assertEqual(self.actions(), [f"event_{index}" for index in range(5)])
+        self.assertEqual(writer.stats()["batches"], 1)
+        self.assertEqual(writer.stats()["written"], 5)
+
+    def test_background_thread_flushes_when_batch_size_is_reached(self):
+        writer = self.make_writer(flush_size=3)
+        for index in range(3):
+            writer.record(audit_row(f"event_{index}"))
+
+        for _ in range(200):
+            if writer.stats()["written"] == 3:
+                break
+            threading.Event().wait(0.01)
+        self.assertEqual(len(self.actions()), 3)
+
+    def test_sync_record_is_written_before_returning(self):
+        writer = self.make_writer()
+        writer.record(audit_row("login_completed"), sync=True)
+        self.assertEqual(self.actions(), ["login_completed"])
+
+    def test_close_drains_pending_events(self):
+        writer = self.make_writer(flush_size=100)
+        writer.record(audit_row("logout"))
+        writer.close(1)
+        self.assertEqual(self.actions(), ["logout"])
+
+    def test_failed_flush_keeps_rows_for_the_next_attempt(self):
+        writer = self.make_writer(flush_size=100)
+        writer.record(audit_row("first"))
+        self.down = True
+        self.assertFalse(writer.flush())
+        self.assertEqual(writer.stats()["pending"], 1)
+
+        self.down = False
+        writer.record(audit_row("second"))
+        self.assertTrue(writer.flush())
+        self.assertEqual(self.actions(), ["first", "second"])
+
+    def test_backpressure_flushes_inline_then_sheds_oldest_when_database_is_down(self):
+        writer = self.make_writer(flush_size=100, max_pending=4)
+        for index in range(4):
+            writer.record(audit_row(f"ok_{index}"))
+        self.assertEqual(writer.stats()["inline_flushes"], 1)
+        self.assertEqual(len(self.actions()), 4)
+
+        self.down = True
+        for index in range(6):
+            writer.record(audit_row(f"late_{index}"))
+        stats = writer.stats()
+        self.assertEqual(stats["pending"], 4)
+        self.assertEqual(stats["dropped"], 2)
+
+        self.down = False
+        writer.flush()
+        self.assertEqual(self.actions()[4:], [f"late_{index}" for index in range(2, 6)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,12 @@
+import asyncio
 import importlib
+import json
 import os
 import sqlite3
 import sys
 import unittest
 from pathlib import Path
+from unittest import mock
 
 
 BACKEND_DIR = Path(__file__).resolve().parents[1]
@@ -22,6 +25,8 @@ class MoodMateAuthBookingTests(unittest.TestCase):
 
         cls.app_module = importlib.import_module("app")
         cls.app_module.app.config["TESTING"] = True
+        # Rate-limit counters outlive the process like the database does; start from zero too.
+        cls.app_module.limiter.reset()
 
     @classmethod
     def tearDownClass(cls):
@@ -82,6 +87,66 @@ class MoodMateAuthBookingTests(unittest.TestCase):
         self.assertIn("signup_completed", actions)
         self.assertIn("login_completed", actions)
 
+    def test_chat_context_stays_with_the_user_who_wrote_it(self):
+        self.signup_user()
+        self.signup_user(username="other", email="other@example.com", phone="8888888888")
+        other = self.app_module.app.test_client()
+        anonymous = self.app_module.app.test_client()
+        self.login_user()
+        other.post("/login", json={"loginId": "other@example.com", "password": "Secret123"})
+        contexts = []
+
+        def reply(message, context, mood=None):
+            contexts.append(context)
+            return {"text": "I hear you."}
+
+        chat = {"message": "My private worry is my exam.", "session_id": "web_chat_1700000000000"}
+        with mock.patch.object(self.app_module, "generate_ai_response", reply):
+            self.assertEqual(self.client.post("/api/chat", json=chat).status_code, 200)
+            other.post("/api/chat", json=chat)
+            anonymous.post("/api/chat", json=chat)
+            self.client.post("/api/chat", json=chat)
+
+        self.assertEqual(contexts[1:3], [[], []])
+        self.assertEqual([turn["content"] for turn in contexts[3]], ["My private worry is my exam.", "I hear you."])
+
+        asgi = importlib.import_module("asgi")
+        cookie = self.client.get_cookie("session")
+        scope = {"headers": [(b"cookie", f"session={cookie.value}".encode())]}
+        with sqlite3.connect(self.db_path) as conn:
+            owner_id = conn.execute("SELECT id FROM users WHERE email = 'tester@example.com'").fetchone()[0]
+        self.assertEqual(asgi.session_user_id(scope), owner_id)
+        self.assertIsNone(asgi.session_user_id({"headers": [(b"cookie", b"session=forged")]}))
+
+    def test_chat_failure_is_a_json_error_on_both_servers(self):
+        def broken(*args):
+            raise sqlite3.OperationalError("database is locked")
+
+        with mock.patch.object(self.app_module, "load_chat_context", broken):
+            response = self.client.post("/api/chat", json={"message": "hello", "session_id": "s1"})
+            self.assertEqual(response.status_code, 500)
+            self.assertEqual(response.get_json(), {"success": False, "message": self.app_module.CHAT_ERROR_MESSAGE})
+
+            asgi = importlib.import_module("asgi")
+            origin = self.app_module.CORS_ORIGINS[0]
+            scope = {"type": "http", "method": "POST", "path": "/api/chat", "client": ("10.7.7.7", 1),
+                     "headers": [(b"origin", origin.encode())]}
+            body = json.dumps({"message": "hello", "session_id": "s1"}).encode()
+            sent = []
+
+            async def receive():
+                return {"type": "http.request", "body": body}
+
+            async def send(message):
+                sent.append(message)
+
+            asyncio.run(asgi.app(scope, receive, send))
+
+        start, payload = sent
+        self.assertEqual(start["status"], 500)
+        self.assertIn((b"access-control-allow-origin", origin.encode()), start["headers"])
+        self.assertEqual(json.loads(payload["body"])["message"], self.app_module.CHAT_ERROR_MESSAGE)
+
     def test_doctor_login_uses_seeded_records(self):
         response = self.login_doctor()
         self.assertEqual(response.status_code, 200)
@@ -90,6 +155,21 @@ class MoodMateAuthBookingTests(unittest.TestCase):
         self.assertEqual(payload["doctor"]["email"], "priya@moodmate.in")
         self.assertEqual(payload["doctor"]["id"], 1)
 
+    def test_booking_reply_says_the_confirmation_is_queued(self):
+        self.signup_user(email="booker@example.com")
+        self.login_user(login_id="booker@example.com")
+        with mock.patch.object(self.app_module.email_worker, "notify"):
+            response = self.client.post(
+                "/api/therapy/bookings",
+                json={"doctor_id": 1, "doctor_name": "Dr. Priya", "name": "Booker", "phone": "9999999999",
+                      "reason": "stress", "time": "Mon 10:00"},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["message"], "Booked! A confirmation email is on its way.")
+        with sqlite3.connect(self.db_path) as conn:
+            queued = conn.execute("SELECT COUNT(*) FROM email_outbox WHERE to_email = ?", ("booker@example.com",)).fetchone()[0]
+        self.assertEqual(queued, 1)
+
     def test_bookings_require_session_and_doctor_scope(self):
         unauthorized = self.client.post(
             "/api/therapy/bookings",
@@ -0,0 +1,131 @@
+import importlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, sql, params=()):
+        self.executed.append(sql)
+
+    def copy_expert(self, sql, buffer):
+        self.sql, self.data = sql, buffer.read()
+        self.executed.append(sql)
+
+
+class BulkImportTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("MOODMATE_DB_PATH", str(BACKEND_DIR / "tests" / "test_moodmate.db"))
+        cls.importer = importlib.import_module("bulk_import")
+        cls.security = importlib.import_module("security")
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.row_factory = sqlite3.Row
+        importlib.import_module("migrations").migrate(self.conn)
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = Path(self.tmp.name) / name
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    def test_users_csv_loads_in_chunks_with_defaults(self):
+        lines = ["username,email,phone,password_hash,coins"]
+        lines += [f"user{i},User{i}@Example.com,90000{i:05d},hash{i}," for i in range(25)]
+        path = self.write("users.csv", "\n".join(lines) + "\n")
+        chunks = []
+
+        written = self.importer.import_file(self.conn, "users", path, chunk_size=10, progress=chunks.append)
+
+        self.assertEqual((written, chunks), (25, [10, 20, 25]))
+        row = self.conn.execute("SELECT email, coins, premium_plan FROM users WHERE username = 'user7'").fetchone()
+        self.assertEqual(tuple(row), ("user7@example.com", 100, "free"))
+
+    def test_chat_history_is_encrypted_like_live_messages(self):
+        records = [{"session_id": "s1", "role": "user", "content": "feeling\tlow\nagain", "mood_detected": "sad"}]
+        path = self.write("chat.jsonl", "\n".join(json.dumps(record) for record in records) + "\n\n")
+
+        self.importer.import_file(self.conn, "chat", path)
+        row = self.conn.execute("SELECT content, timestamp FROM chat_history").fetchone()
+        self.assertNotEqual(row["content"], "feeling\tlow\nagain")
+        self.assertEqual(self.security.decrypt_data(row["content"]), "feeling\tlow\nagain")
+        self.assertIsNotNone(row["timestamp"])
+
+    def test_doctor_lists_are_stored_as_json(self):
+        record = {"name": "Dr. Rao", "email": "rao@example.com", "password_hash": "x", "specialization": "CBT",
+                  "languages": ["English", "Hindi"], "price_per_session": "1200"}
+        path = self.write("doctors.jsonl", json.dumps(record) + "\n")
+
+        self.importer.import_file(self.conn, "doctors", path)
+        row = self.conn.execute("SELECT languages_json, modes_json, price_per_session FROM doctors").fetchone()
+        self.assertEqual(tuple(row), ('["English", "Hindi"]', "[]", 1200))
+
+    def test_doctor_chunks_bump_the_directory_cache_generation(self):
+        records = [{"name": f"Dr. {i}", "email": f"dr{i}@example.com", "password_hash": "x", "specialization": "CBT"}
+                   for i in range(5)]
+        path = self.write("doctors.jsonl", "\n".join(json.dumps(record) for record in records) + "\n")
+        read_generation = importlib.import_module("cache").read_generation
+        before = read_generation(self.conn, "doctors")
+
+        self.importer.import_file(self.conn, "doctors", path, chunk_size=2)
+        self.assertEqual(read_generation(self.conn, "doctors"), before + 3)
+
+    def test_users_without_a_password_are_refused(self):
+        path = self.write("users.csv", "username,email,phone\nana,ana@example.com,123\n")
+
+        with self.assertRaisesRegex(ValueError, "row 2"):
+            self.importer.import_file(self.conn, "users", path)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0], 0)
+
+    def test_copy_rows_escape_the_text_format(self):
+        cursor = RecordingCursor()
+        conn = type("Conn", (), {"cursor": lambda self: cursor})()
+        row = {"user_id": 3, "date": "2026-01-02", "mood_tag": "back\\slash\ttab", "created_at": None}
+
+        self.importer.copy_rows(conn, self.importer.TARGETS["checkins"], [row])
+        self.assertEqual(cursor.sql, "COPY daily_checkins (user_id, date, mood_tag, created_at) FROM STDIN")
+        self.assertEqual(cursor.data, "3\t2026-01-02\tback\\\\slash\\ttab\t\\N\n")
+
+    def test_copy_fields_escape_every_special_character(self):
+        field = self.importer._copy_field
+        self.assertEqual(field(None), "\\N")
+        self.assertEqual(field("a\\b\tc\nd\re"), "a\\\\b\\tc\\nd\\re")
+        self.assertEqual(field("\\N"), "\\\\N")  # a literal backslash-N is not NULL
+        self.assertEqual(field(0), "0")
+
+    def test_postgres_import_moves_the_id_sequence_before_copying(self):
+        cursor = RecordingCursor()
+        conn = type("Conn", (), {"cursor": lambda self: cursor, "commit": lambda self: None})()
+        path = self.write("doctors.jsonl", json.dumps(
+            {"name": "Dr. Rao", "email": "rao@example.com", "password_hash": "x", "specialization": "CBT"}) + "\n")
+
+        database = importlib.import_module("database")
+        with mock.patch.object(database, "IS_POSTGRES", True), mock.patch.object(self.importer, "IS_POSTGRES", True), \
+                mock.patch.object(self.importer.doctor_cache, "invalidate"):
+            self.assertEqual(self.importer.import_file(conn, "doctors", path), 1)
+
+        self.assertIn("setval(pg_get_serial_sequence('doctors', 'id')", cursor.executed[0])
+        self.assertTrue(cursor.executed[1].startswith("COPY doctors (name, initials, email"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import importlib
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def streaming(*tokens, delay=0.0, error=None):
+    def stream(user_message, context, timeout):
+        for token in tokens:
+            time.sleep(delay)
+            yield token
+        if error:
+            raise error
+    return stream
+
+
+class StreamAiResponseTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.ai = importlib.import_module("services.ai_service")
+        cls.CircuitBreaker = importlib.import_module("services.circuit_breaker").CircuitBreaker
+
+    def run_stream(self, providers, timeouts=None):
+        breakers = {name: self.CircuitBreaker(name) for name in providers}
+        chain = [(name, None) for name in providers]
+        with mock.patch.object(self.ai, "STREAM_PROVIDERS", providers), \
+                mock.patch.object(self.ai, "PROVIDER_BREAKERS", breakers), \
+                mock.patch.object(self.ai, "PROVIDER_TIMEOUTS", timeouts or {name: 1 for name in providers}), \
+                mock.patch.object(self.ai, "get_provider_chain", return_value=chain):
+            return list(self.ai.stream_ai_response("hi")), breakers
+
+    def test_tokens_are_relayed_in_order(self):
+        events, breakers = self.run_stream({"gemini": streaming("Hel", "lo", "!")})
+        self.assertEqual(events, [("gemini", "Hel"), ("gemini", "lo"), ("gemini", "!")])
+        self.assertEqual(breakers["gemini"].snapshot()["calls_in_window"], 1)
+
+    def test_failure_before_first_token_falls_over(self):
+        events, breakers = self.run_stream({
+            "gemini": streaming(error=RuntimeError("down")),
+            "groq": streaming("ok"),
+        })
+        self.assertEqual(events, [("groq", "ok")])
+        self.assertEqual(breakers["gemini"].snapshot()["failure_streak"], 1)
+
+    def test_mid_stream_failure_ends_reply_without_switching(self):
+        events, _ = self.run_stream({
+            "gemini": streaming("partial", error=RuntimeError("reset")),
+            "groq": streaming("other"),
+        })
+        self.assertEqual(events, [("gemini", "partial")])
+
+    def test_stalled_provider_hits_token_deadline(self):
+        release = threading.Event()
+
+        def hung(user_message, context, timeout):
+            release.wait(2)
+            yield "late"
+
+        started = time.monotonic()
+        events, _ = self.run_stream({"gemini": hung, "groq": streaming("fast")}, timeouts={"gemini": 0.1, "groq": 1})
+        release.set()
+        self.assertEqual(events, [("groq", "fast")])
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_heuristic_reply_when_nothing_streams(self):
+        events, _ = self.run_stream({"gemini": streaming()})
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0][0], "heuristic")
+        self.assertTrue(events[0][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
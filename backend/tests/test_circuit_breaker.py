@@ -0,0 +1,104 @@
+import importlib
+import sys
+import time
+import unittest
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.CircuitBreaker = importlib.import_module("services.circuit_breaker").CircuitBreaker
+        cls.ai = importlib.import_module("services.ai_service")
+
+    def make_breaker(self, **kwargs):
+        self.clock = FakeClock()
+        kwargs.setdefault("cooldown", 30)
+        return self.CircuitBreaker("test", clock=self.clock, **kwargs)
+
+    def test_consecutive_failures_open_the_circuit(self):
+        breaker = self.make_breaker(consecutive_failures=3)
+        for _ in range(3):
+            self.assertTrue(breaker.try_acquire())
+            breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.try_acquire())
+        self.assertFalse(breaker.is_available())
+
+    def test_error_rate_over_window_opens_the_circuit(self):
+        breaker = self.make_breaker(consecutive_failures=100, min_calls=4, error_threshold=0.5)
+        for ok in (True, False, True, False):
+            breaker.record_success(0.2) if ok else breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+    def test_half_open_admits_one_probe_and_closes_on_success(self):
+        breaker = self.make_breaker(consecutive_failures=1)
+        breaker.record_failure()
+        self.clock.now += 31
+        self.assertEqual(breaker.state, "half_open")
+        self.assertTrue(breaker.try_acquire())
+        self.assertFalse(breaker.try_acquire())
+        breaker.record_success(0.5)
+        self.assertEqual(breaker.state, "closed")
+
+    def test_failed_probe_reopens_with_longer_cooldown(self):
+        breaker = self.make_breaker(consecutive_failures=1)
+        breaker.record_failure()
+        self.clock.now += 31
+        self.assertTrue(breaker.try_acquire())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.clock.now += 31
+        self.assertEqual(breaker.state, "open")
+        self.clock.now += 30
+        self.assertEqual(breaker.state, "half_open")
+
+    def test_health_score_tracks_latency_and_errors(self):
+        fast = self.make_breaker()
+        fast.record_success(0.2)
+        slow = self.make_breaker()
+        slow.record_success(3.0)
+        flaky = self.make_breaker(consecutive_failures=10)
+        flaky.record_success(0.2)
+        flaky.record_failure()
+        self.assertLess(fast.health_score(), slow.health_score())
+        self.assertLess(fast.health_score(), flaky.health_score())
+
+    def test_hedged_run_skips_open_circuits_without_waiting(self):
+        gemini = self.make_breaker(consecutive_failures=1)
+        gemini.record_failure()
+        calls = []
+
+        def hung(message, context, timeout):
+            calls.append("gemini")
+            time.sleep(1)
+            return "late"
+
+        def groq(message, context, timeout):
+            calls.append("groq")
+            return "groq reply"
+
+        started = time.monotonic()
+        source, _ = self.ai.run_hedged(
+            [("gemini", hung), ("groq", groq)], "hi", hedge_delay=5, budget=2, breakers={"gemini": gemini},
+        )
+        self.assertEqual(source, "groq")
+        self.assertEqual(calls, ["groq"])
+        self.assertLess(time.monotonic() - started, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import importlib
+import os
+import sqlite3
+import sys
+import unittest
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class CommunityFeedTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("MOODMATE_DB_PATH", str(BACKEND_DIR / "tests" / "test_moodmate.db"))
+        cls.app_module = importlib.import_module("app")
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(
+            "CREATE TABLE community_posts (id INTEGER PRIMARY KEY AUTOINCREMENT, author_user_id INTEGER, mood_tag TEXT, "
+            "content TEXT, visibility_status TEXT DEFAULT 'visible', moderation_note TEXT DEFAULT '', created_at TIMESTAMP)"
+        )
+        self.conn.execute("CREATE TABLE community_reactions (id INTEGER PRIMARY KEY AUTOINCREMENT, post_id INTEGER, reaction_type TEXT, count INTEGER)")
+        for post_id in range(1, 26):
+            # Several posts share a timestamp so the id tie-breaker matters.
+            created_at = f"2026-01-01 10:00:{post_id // 4:02d}"
+            visibility = "hidden" if post_id == 7 else "visible"
+            self.conn.execute(
+                "INSERT INTO community_posts (id, mood_tag, content, visibility_status, created_at) VALUES (?, 'calm', ?, ?, ?)",
+                (post_id, f"post {post_id}", visibility, created_at),
+            )
+        self.conn.executemany(
+            "INSERT INTO community_reactions (post_id, reaction_type, count) VALUES (?, ?, ?)",
+            [(25, "appreciate", 2), (25, "appreciate", 3), (25, "hug", 1), (24, "hug", 4)],
+        )
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_pages_walk_the_feed_without_gaps_or_duplicates(self):
+        seen = []
+        after = None
+        while True:
+            posts, next_cursor = self.app_module.fetch_community_feed(self.conn, limit=10, after=after)
+            seen.extend(post["id"] for post in posts)
+            if not next_cursor:
+                break
+            after = self.app_module.decode_feed_cursor(next_cursor)
+
+        expected = [post_id for post_id in range(25, 0, -1) if post_id != 7]
+        self.assertEqual(seen, expected)
+
+    def test_reactions_are_aggregated_per_post(self):
+        posts, _ = self.app_module.fetch_community_feed(self.conn, limit=3)
+        reactions = {post["id"]: post["reactions"] for post in posts}
+        self.assertEqual(reactions[25], {"appreciate": 5, "hug": 1})
+        self.assertEqual(reactions[24], {"hug": 4})
+        self.assertEqual(reactions[23], {})
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertIsNone(self.app_module.decode_feed_cursor("not-a-cursor"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import importlib
+import os
+import sqlite3
+import sys
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class ConversationContextTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("MOODMATE_DB_PATH", str(BACKEND_DIR / "tests" / "test_moodmate.db"))
+        cls.context = importlib.import_module("services.conversation_context")
+        cls.security = importlib.import_module("security")
+        cls.ai = importlib.import_module("services.ai_service")
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        importlib.import_module("migrations").migrate(self.conn)
+
+        @contextmanager
+        def get_db():
+            yield self.conn
+
+        patcher = mock.patch.object(self.context, "get_db", get_db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add_turns(self, session_id, count, start=0, user_id=1):
+        for turn in range(start, start + count):
+            self.conn.execute("INSERT INTO chat_history (session_id, user_id, role, content) VALUES (?, ?, 'user', ?)", (session_id, user_id, self.security.encrypt_data(f"user message {turn}")))
+            self.conn.execute("INSERT INTO chat_history (session_id, user_id, role, content) VALUES (?, ?, 'ai', ?)", (session_id, user_id, self.security.encrypt_data(f"reply {turn}")))
+        self.conn.commit()
+
+    def test_recent_turns_are_decrypted_in_order_within_budget(self):
+        self.add_turns("s1", 3)
+        history = self.context.load_conversation(self.conn, "s1", 1)
+        self.assertEqual([m["content"] for m in history[:2]], ["user message 0", "reply 0"])
+        self.assertEqual(history[-1], {"role": "ai", "content": "reply 2"})
+
+        tight = self.context.load_conversation(self.conn, "s1", 1, budget=12)
+        self.assertEqual([m["content"] for m in tight], ["user message 2", "reply 2"])
+
+    def test_shared_default_session_never_gets_history(self):
+        self.add_turns("default", 2)
+        self.assertEqual(self.context.load_conversation(self.conn, "default", 1), [])
+
+    def test_another_user_cannot_load_a_session_they_did_not_write(self):
+        every, keep = self.context.SUMMARY_EVERY_TURNS, self.context.KEEP_RECENT_TURNS
+        self.add_turns("web_chat_1700000000000", every + keep, user_id=1)
+        self.assertTrue(self.context.refresh_summary("web_chat_1700000000000", 1, summarize=lambda previous, turns: "private"))
+
+        self.assertEqual(self.context.load_conversation(self.conn, "web_chat_1700000000000", 2), [])
+        self.assertEqual(self.context.load_conversation(self.conn, "web_chat_1700000000000", None), [])
+        self.assertFalse(self.context.refresh_summary("web_chat_1700000000000", 2, summarize=lambda previous, turns: "stolen"))
+        self.assertEqual(self.context.load_conversation(self.conn, "web_chat_1700000000000", 1)[0]["content"], "private")
+
+    def test_two_owners_of_one_session_id_each_keep_a_summary(self):
+        every, keep = self.context.SUMMARY_EVERY_TURNS, self.context.KEEP_RECENT_TURNS
+        calls = []
+
+        def summarize(previous, turns):
+            calls.append(previous)
+            return f"{previous}+{len(turns)}"
+
+        for user_id in (1, 2):
+            self.add_turns("web_chat_1", every + keep, user_id=user_id)
+            self.assertTrue(self.context.refresh_summary("web_chat_1", user_id, summarize=summarize))
+        for user_id in (1, 2):
+            self.assertEqual(self.context.load_conversation(self.conn, "web_chat_1", user_id)[0]["content"], f"+{2 * every}")
+
+        # The second owner's summary was stored, so the next fold builds on it instead of starting over.
+        self.add_turns("web_chat_1", every, start=every + keep, user_id=2)
+        self.assertTrue(self.context.refresh_summary("web_chat_1", 2, summarize=summarize))
+        self.assertEqual(calls, ["", "", f"+{2 * every}"])
+
+    def test_older_turns_fold_into_summary_incrementally(self):
+        every, keep = self.context.SUMMARY_EVERY_TURNS, self.context.KEEP_RECENT_TURNS
+        calls = []
+
+        def summarize(previous, turns):
+            calls.append((previous, len(turns)))
+            return f"{previous}+{len(turns)}"
+
+        self.add_turns("s1", every + keep - 1)
+        self.assertFalse(self.context.refresh_summary("s1", 1, summarize=summarize))
+        self.add_turns("s1", 1, start=every + keep - 1)
+        self.assertTrue(self.context.refresh_summary("s1", 1, summarize=summarize))
+        self.assertEqual(calls, [("", 2 * every)])
+
+        history = self.context.load_conversation(self.conn, "s1", 1)
+        self.assertEqual(history[0], {"role": "summary", "content": f"+{2 * every}"})
+        self.assertEqual(len(history), 1 + 2 * keep)
+        self.assertTrue(self.ai.build_context(history).startswith("Earlier in this conversation: "))
+
+        self.add_turns("s1", every, start=every + keep)
+        self.assertTrue(self.context.refresh_summary("s1", 1, summarize=summarize))
+        self.assertEqual(calls[-1], (f"+{2 * every}", 2 * every))
+
+    def test_extractive_summary_respects_token_limit(self):
+        turns = [{"role": "user", "content": "x" * 400}] * 20
+        summary = self.context.extractive_summary("", turns)
+        self.assertLessEqual(self.context.estimate_tokens(summary), self.context.SUMMARY_TOKEN_LIMIT)
+
+
+if __name__ == "__main__":
+    unittest.main()
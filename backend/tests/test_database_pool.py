@@ -0,0 +1,175 @@
+import importlib
+import sqlite3
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def connect_memory():
+    return sqlite3.connect(":memory:", check_same_thread=False)
+
+
+class ConnectionPoolTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        database = importlib.import_module("database")
+        cls.ConnectionPool = database.ConnectionPool
+        cls.PoolTimeout = database.PoolTimeout
+
+    def test_connections_are_reused(self):
+        pool = self.ConnectionPool(connect_memory, min_size=1, max_size=2)
+        first = pool.getconn()
+        pool.putconn(first)
+        second = pool.getconn()
+        pool.putconn(second)
+
+        self.assertIs(first, second)
+        stats = pool.stats()
+        self.assertEqual(stats["connections_created"], 1)
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["in_use"], 0)
+
+    def test_exhausted_pool_times_out(self):
+        pool = self.ConnectionPool(connect_memory, min_size=0, max_size=1, timeout=0.05)
+        held = pool.getconn()
+        with self.assertRaises(self.PoolTimeout):
+            pool.getconn()
+        pool.putconn(held)
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_waiter_receives_released_connection(self):
+        pool = self.ConnectionPool(connect_memory, min_size=0, max_size=1, timeout=2)
+        held = pool.getconn()
+        threading.Timer(0.05, pool.putconn, args=(held,)).start()
+
+        conn = pool.getconn()
+        pool.putconn(conn)
+
+        self.assertIs(conn, held)
+        self.assertGreater(pool.stats()["wait_max_ms"], 10)
+
+    def test_warmup_connects_without_holding_the_pool_lock(self):
+        pool = None
+        lock_free = []
+
+        def probe():
+            # The pool's lock is re-entrant, so it has to be tried from another thread.
+            acquired = pool._cond.acquire(blocking=False)
+            if acquired:
+                pool._cond.release()
+            lock_free.append(acquired)
+
+        def connect_checking_lock():
+            prober = threading.Thread(target=probe)
+            prober.start()
+            prober.join()
+            return connect_memory()
+
+        pool = self.ConnectionPool(connect_checking_lock, min_size=3, max_size=3)
+        pool.putconn(pool.getconn())
+
+        self.assertEqual(lock_free, [True, True, True])
+        stats = pool.stats()
+        self.assertEqual((stats["size"], stats["idle"], stats["connections_created"]), (3, 3, 3))
+
+    def test_broken_connection_is_replaced_on_checkout(self):
+        pool = self.ConnectionPool(connect_memory, min_size=0, max_size=1, healthcheck_interval=0)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.close()
+
+        replacement = pool.getconn()
+        replacement.execute("SELECT 1")
+        pool.putconn(replacement)
+
+        self.assertIsNot(replacement, conn)
+        self.assertEqual(pool.stats()["healthcheck_failures"], 1)
+
+    def test_uncommitted_work_is_rolled_back_on_return(self):
+        pool = self.ConnectionPool(connect_memory, min_size=0, max_size=1)
+        conn = pool.getconn()
+        conn.execute("CREATE TABLE items (id INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO items VALUES (1)")
+        pool.putconn(conn)
+
+        conn = pool.getconn()
+        count = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        pool.putconn(conn)
+        self.assertEqual(count, 0)
+
+
+class SqliteProfileTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.database = importlib.import_module("database")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = mock.patch.object(self.database, "DB_PATH", str(Path(self.tmp.name) / "profile.db"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_every_connection_gets_the_profile(self):
+        conn = self.database.connect_sqlite()
+        self.addCleanup(conn.close)
+        pragma = lambda name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+        self.assertEqual(pragma("journal_mode"), "wal")
+        self.assertEqual(pragma("synchronous"), 1)  # NORMAL
+        self.assertEqual(pragma("busy_timeout"), self.database.SQLITE_PRAGMAS["busy_timeout"])
+        self.assertEqual(pragma("temp_store"), 2)  # MEMORY
+        self.assertEqual(pragma("cache_size"), self.database.SQLITE_PRAGMAS["cache_size"])
+        self.assertEqual(conn.isolation_level, "IMMEDIATE")
+
+    def test_write_waits_for_the_lock_instead_of_failing(self):
+        setup = self.database.connect_sqlite()
+        setup.execute("CREATE TABLE items (id INTEGER)")
+        setup.commit()
+        holder, waiter = self.database.connect_sqlite(), self.database.connect_sqlite()
+        self.addCleanup(setup.close)
+        self.addCleanup(holder.close)
+        self.addCleanup(waiter.close)
+
+        holder.execute("INSERT INTO items VALUES (1)")
+        threading.Timer(0.1, holder.commit).start()
+        waiter.execute("INSERT INTO items VALUES (2)")
+        waiter.commit()
+        self.assertEqual(setup.execute("SELECT COUNT(*) FROM items").fetchone()[0], 2)
+
+    def test_maintenance_checkpoints_every_run_and_optimizes_on_its_interval(self):
+        conn = self.database.connect_sqlite()
+        self.addCleanup(conn.close)
+        conn.execute("CREATE TABLE items (id INTEGER)")
+        conn.executemany("INSERT INTO items VALUES (?)", [(i,) for i in range(100)])
+        conn.commit()
+
+        @contextmanager
+        def connect():
+            yield conn
+
+        now = [0.0]
+        maintenance = self.database.SqliteMaintenance(optimize_interval=60, connect=connect, clock=lambda: now[0])
+        maintenance.run_once()
+        now[0] += 30
+        maintenance.run_once()
+        now[0] += 30
+        maintenance.run_once()
+
+        stats = maintenance.stats()
+        self.assertEqual((stats["checkpoints"], stats["optimizes"], stats["failures"]), (3, 2, 0))
+        self.assertGreater(stats["frames_checkpointed"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import importlib
+import json
+import sys
+import unittest
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def doctor_row(doctor_id, **overrides):
+    row = {
+        "id": doctor_id,
+        "name": f"Dr. {doctor_id}",
+        "initials": "DR",
+        "email": f"doctor{doctor_id}@moodmate.in",
+        "password_hash": "secret-hash",
+        "specialization": "Clinical Psychology",
+        "experience_years": 5,
+        "languages_json": json.dumps(["English"]),
+        "modes_json": json.dumps(["Video"]),
+        "price_per_session": 1000,
+        "rating": 4.5,
+        "reviews_count": 10,
+        "badge": "",
+        "bio": "",
+        "license_info": "",
+        "qualifications_json": "[]",
+        "approaches_json": "[]",
+        "focus_areas_json": json.dumps(["Anxiety"]),
+        "best_for": "",
+        "first_session": "",
+        "cancellation_policy": "",
+        "review_summary": "",
+        "availability_json": "not json",
+        "photo_url": "",
+        "is_verified": 1,
+        "profile_source": "sample",
+        "profile_status": "active",
+    }
+    row.update(overrides)
+    return row
+
+
+class DoctorDirectoryTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = importlib.import_module("services.doctor_directory")
+
+    def test_records_decode_json_columns_once(self):
+        record = self.directory.DoctorRecord.from_row(doctor_row(1))
+        self.assertEqual(record.languages, ("English",))
+        self.assertEqual(record.focus_areas, ("Anxiety",))
+        self.assertEqual(record.availability, ())
+        self.assertIs(record.is_verified, True)
+
+    def test_serialized_directory_omits_password_hashes(self):
+        snapshot = self.directory.DoctorDirectory([self.directory.DoctorRecord.from_row(doctor_row(1))])
+        payload = json.loads(self.directory.serialize_directory(snapshot))
+        doctor = payload["doctors"][0]
+        self.assertNotIn("password_hash", doctor)
+        self.assertEqual(doctor["languages"], ["English"])
+        self.assertEqual(snapshot.by_id[1].email, "doctor1@moodmate.in")
+
+    def make_directory(self):
+        rows = [
+            doctor_row(1, rating=4.9, price_per_session=1999, languages_json=json.dumps(["Hindi", "English"]), focus_areas_json=json.dumps(["Anxiety"])),
+            doctor_row(2, rating=4.7, price_per_session=599, languages_json=json.dumps(["Hindi"]), modes_json=json.dumps(["Chat"])),
+            doctor_row(3, rating=4.6, price_per_session=899, languages_json=json.dumps(["Tamil"]), focus_areas_json=json.dumps(["Trauma", "anxiety"])),
+            doctor_row(4, rating=4.2, price_per_session=499, experience_years=12),
+        ]
+        return self.directory.DoctorDirectory(self.directory.DoctorRecord.from_row(row) for row in rows)
+
+    def ids(self, records):
+        return [record.id for record in records]
+
+    def test_search_filters_combine_facets_and_ranges(self):
+        directory = self.make_directory()
+        self.assertEqual(self.ids(directory.search()), [1, 2, 3, 4])
+        self.assertEqual(self.ids(directory.search(languages=["hindi", "Tamil"])), [1, 2, 3])
+        self.assertEqual(self.ids(directory.search(focus_areas=["TRAUMA", "anxiety"], max_price=1000)), [2, 3, 4])
+        self.assertEqual(self.ids(directory.search(focus_areas=["trauma"])), [3])
+        self.assertEqual(self.ids(directory.search(min_price=500, max_price=900)), [2, 3])
+        self.assertEqual(self.ids(directory.search(min_rating=4.6)), [1, 2, 3])
+        self.assertEqual(self.ids(directory.search(languages=["French"])), [])
+
+    def test_search_sorts_use_precomputed_ranks(self):
+        directory = self.make_directory()
+        self.assertEqual(self.ids(directory.search(sort="price_asc")), [4, 2, 3, 1])
+        self.assertEqual(self.ids(directory.search(sort="experience", languages=["English"])), [4, 1])
+        with self.assertRaises(ValueError):
+            directory.search(sort="name")
+
+    def test_search_page_reports_total_and_slices_in_sort_order(self):
+        directory = self.make_directory()
+        total, page = directory.search_page(sort="price_desc", offset=1, limit=2)
+        self.assertEqual(total, 4)
+        self.assertEqual(self.ids(page), [3, 2])
+        total, page = directory.search_page(languages=["Hindi"], offset=1, limit=5)
+        self.assertEqual((total, self.ids(page)), (2, [2]))
+        self.assertEqual(directory.search_page(offset=10, limit=5), (4, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import importlib
+import sqlite3
+import sys
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class EmailOutboxTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.outbox = importlib.import_module("services.email_outbox")
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(self.outbox.CREATE_EMAIL_OUTBOX_SQL)
+
+        @contextmanager
+        def shared_db():
+            yield self.conn
+
+        patchers = [
+            mock.patch.object(self.outbox, "get_db", shared_db),
+            mock.patch.object(self.outbox.time, "time", lambda: self.clock.now),
+            mock.patch.object(self.outbox.random, "uniform", lambda low, high: 1.0),
+        ]
+        self.clock = FakeClock()
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.batches = []
+        self.fail = False
+
+    def tearDown(self):
+        self.conn.close()
+
+    def send_batch(self, messages):
+        self.batches.append([message["to"] for message in messages])
+        if self.fail:
+            return [{"success": False, "error": "resend down"}] * len(messages)
+        return [{"success": True, "id": f"re_{index}"} for index, _ in enumerate(messages)]
+
+    def make_worker(self, **kwargs):
+        kwargs.setdefault("batch_size", 2)
+        kwargs.setdefault("max_attempts", 3)
+        return self.outbox.EmailOutboxWorker(self.send_batch, clock=self.clock, **kwargs)
+
+    def enqueue(self, *emails):
+        for email in emails:
+            self.outbox.enqueue_email(self.conn, email, "Subject", "<p>hi</p>")
+        self.conn.commit()
+
+    def statuses(self):
+        return [(row["to_email"], row["status"], row["attempts"]) for row in self.conn.execute("SELECT * FROM email_outbox ORDER BY id")]
+
+    def test_queued_messages_are_sent_in_batches(self):
+        self.enqueue("a@x.io", "b@x.io", "c@x.io")
+        worker = self.make_worker()
+        self.assertEqual(worker.run_once(), 2)
+        self.assertEqual(worker.run_once(), 1)
+        self.assertEqual(worker.run_once(), 0)
+        self.assertEqual(self.batches, [["a@x.io", "b@x.io"], ["c@x.io"]])
+        self.assertEqual({status for _, status, _ in self.statuses()}, {"sent"})
+
+    def test_rolled_back_enqueue_is_never_sent(self):
+        self.outbox.enqueue_email(self.conn, "a@x.io", "Subject", "<p>hi</p>")
+        self.conn.rollback()
+        self.assertEqual(self.make_worker().run_once(), 0)
+
+    def test_failures_back_off_then_dead_letter(self):
+        self.enqueue("a@x.io")
+        worker = self.make_worker(max_attempts=2)
+        self.fail = True
+        self.assertEqual(worker.run_once(), 1)
+        self.assertEqual(self.statuses(), [("a@x.io", "pending", 1)])
+        self.assertEqual(worker.run_once(), 0)  # waiting out the backoff
+        self.clock.now += self.outbox.EMAIL_BACKOFF_BASE
+        self.assertEqual(worker.run_once(), 1)
+        self.assertEqual(self.statuses(), [("a@x.io", "dead", 2)])
+        self.assertEqual(worker.dead_lettered, 1)
+
+    def test_expired_lease_is_reclaimed(self):
+        self.enqueue("a@x.io")
+        worker = self.make_worker(lease_seconds=60)
+        with self.outbox.get_db() as conn:
+            worker.claim(conn)  # a worker that dies before recording the outcome
+        self.assertEqual(worker.run_once(), 0)
+        self.clock.now += 61
+        self.assertEqual(worker.run_once(), 1)
+        self.assertEqual(self.statuses(), [("a@x.io", "sent", 2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import importlib
+import os
+import sqlite3
+import sys
+import unittest
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class MigrationTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Importing the module loads ``database``; keep it off the real moodmate.db.
+        os.environ.setdefault("MOODMATE_DB_PATH", str(BACKEND_DIR / "tests" / "test_moodmate.db"))
+        cls.migrations = importlib.import_module("migrations")
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.row_factory = sqlite3.Row
+
+    def tearDown(self):
+        self.conn.close()
+
+    def names(self, kind):
+        rows = self.conn.execute("SELECT name FROM sqlite_master WHERE type = ?", (kind,)).fetchall()
+        return {row["name"] for row in rows}
+
+    def test_fresh_database_gets_every_table_and_index_once(self):
+        ran = self.migrations.migrate(self.conn)
+
+        self.assertEqual(ran, [migration.name for migration in self.migrations.MIGRATIONS])
+        self.assertTrue({"users", "password_reset_otps", "counter_deltas", "schema_migrations"} <= self.names("table"))
+        self.assertTrue({"idx_bookings_doctor", "idx_reset_otps_user", "idx_chat_session_id"} <= self.names("index"))
+        self.assertEqual(self.migrations.migrate(self.conn), [])
+
+    def test_only_new_migrations_run(self):
+        Migration, Index = self.migrations.Migration, self.migrations.Index
+        first = Migration(1, "items", ["CREATE TABLE IF NOT EXISTS items (id INTEGER PRIMARY KEY, sku TEXT)"])
+        self.migrations.migrate(self.conn, [first])
+        second = Migration(2, "items_sku", [Index("idx_items_sku", "items", "sku", unique=True)])
+
+        self.assertEqual(self.migrations.migrate(self.conn, [first, second]), ["items_sku"])
+        self.assertIn("idx_items_sku", self.names("index"))
+        self.assertEqual(self.migrations.read_applied(self.conn), {1: first.checksum, 2: second.checksum})
+
+    def test_tables_from_before_a_column_existed_get_it_added(self):
+        self.conn.execute("CREATE TABLE community_posts (id INTEGER PRIMARY KEY, mood_tag TEXT, content TEXT, created_at TIMESTAMP)")
+        self.conn.execute("INSERT INTO community_posts (mood_tag, content) VALUES ('calm', 'old post')")
+        self.conn.commit()
+
+        self.migrations.migrate(self.conn)
+        row = self.conn.execute("SELECT visibility_status, moderation_note FROM community_posts").fetchone()
+        self.assertEqual(tuple(row), ("visible", ""))
+        self.assertIn("idx_posts_feed", self.names("index"))
+
+    def test_chat_summaries_are_rekeyed_on_session_and_owner(self):
+        before = [migration for migration in self.migrations.MIGRATIONS if migration.version < 6]
+        self.migrations.migrate(self.conn, before)
+        self.conn.executemany(
+            "INSERT INTO chat_summaries (session_id, user_id, summary, covered_until) VALUES (?, ?, ?, ?)",
+            [("s1", 1, "kept", 8), ("s2", None, "orphan", 4)],
+        )
+        self.conn.commit()
+
+        self.assertEqual(self.migrations.migrate(self.conn), ["chat_summaries_owner_key"])
+        self.conn.execute("INSERT INTO chat_summaries (session_id, user_id, summary) VALUES ('s1', 2, 'second owner')")
+        rows = self.conn.execute("SELECT session_id, user_id, summary FROM chat_summaries ORDER BY user_id").fetchall()
+        self.assertEqual([tuple(row) for row in rows], [("s1", 1, "kept"), ("s1", 2, "second owner")])
+
+    def test_editing_an_applied_migration_is_refused(self):
+        Migration = self.migrations.Migration
+        self.migrations.migrate(self.conn, [Migration(1, "items", ["CREATE TABLE items (id INTEGER)"])])
+        edited = Migration(1, "items", ["CREATE TABLE items (id INTEGER, sku TEXT)"])
+
+        with self.assertRaises(self.migrations.MigrationError):
+            self.migrations.migrate(self.conn, [edited])
+
+    def test_whitespace_does_not_change_the_checksum(self):
+        Migration = self.migrations.Migration
+        self.assertEqual(
+            Migration(1, "items", ["CREATE TABLE items (id INTEGER)"]).checksum,
+            Migration(1, "items", ["\n    CREATE TABLE items\n        (id   INTEGER)\n"]).checksum,
+        )
+
+    def test_failed_migration_leaves_nothing_behind(self):
+        Migration = self.migrations.Migration
+        broken = Migration(1, "broken", ["CREATE TABLE items (id INTEGER)", "CREATE INDEX idx_missing ON nowhere (id)"])
+
+        with self.assertRaises(sqlite3.OperationalError):
+            self.migrations.migrate(self.conn, [broken])
+        self.assertNotIn("items", self.names("table"))
+        self.assertEqual(self.migrations.read_applied(self.conn), {})
+
+    def test_postgres_indexes_are_built_concurrently(self):
+        index = self.migrations.Index("idx_bookings_doctor", "therapy_bookings", "doctor_id")
+        self.assertEqual(
+            index.sql(concurrently=True),
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bookings_doctor ON therapy_bookings (doctor_id)",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import importlib
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class PasswordHasherTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.hashing = importlib.import_module("services.password_hashing")
+
+    def make_hasher(self, **kwargs):
+        kwargs.setdefault("workers", 1)
+        kwargs.setdefault("max_pending", 2)
+        kwargs.setdefault("rounds", 4)
+        kwargs.setdefault("mode", "inline")
+        hasher = self.hashing.PasswordHasher(**kwargs)
+        self.addCleanup(hasher.shutdown)
+        return hasher
+
+    def test_hash_and_verify_in_worker_process(self):
+        hasher = self.make_hasher(mode="process")
+        hasher.start()
+        stored = hasher.hash("s3cret")
+        self.assertTrue(stored.startswith("$2b$04$"))
+        self.assertTrue(hasher.verify("s3cret", stored))
+        self.assertFalse(hasher.verify("wrong", stored))
+        stats = hasher.stats()
+        self.assertEqual((stats["hashes"], stats["verifies"]), (1, 2))
+        self.assertGreater(stats["verify_p50_ms"], 0)
+
+    def test_verify_accepts_legacy_bytes_repr_and_flags_it_for_rehash(self):
+        hasher = self.make_hasher()
+        modern = self.hashing.hash_password("s3cret", rounds=4)
+        legacy = f"b'{modern}'"
+        self.assertTrue(hasher.verify("s3cret", legacy))
+        self.assertTrue(hasher.needs_rehash(legacy))
+        self.assertFalse(hasher.needs_rehash(modern))
+
+    def test_cost_change_triggers_rehash(self):
+        hasher = self.make_hasher(rounds=5)
+        old = self.hashing.hash_password("s3cret", rounds=4)
+        self.assertEqual(self.hashing.hash_cost(old), 4)
+        self.assertTrue(hasher.needs_rehash(old))
+        self.assertEqual(self.hashing.hash_cost(hasher.rehash("s3cret")), 5)
+
+    def test_garbage_hash_fails_verification(self):
+        hasher = self.make_hasher()
+        self.assertFalse(hasher.verify("s3cret", "not-a-bcrypt-hash"))
+        self.assertIsNone(self.hashing.hash_cost("not-a-bcrypt-hash"))
+
+    def test_saturated_pool_rejects_immediately(self):
+        hasher = self.make_hasher(max_pending=1)
+        release = threading.Event()
+        entered = threading.Event()
+
+        def slow_hash(password, rounds):
+            entered.set()
+            release.wait(5)
+            return "done"
+
+        original = self.hashing.hash_password
+        self.hashing.hash_password = slow_hash
+        self.addCleanup(setattr, self.hashing, "hash_password", original)
+        worker = threading.Thread(target=hasher.hash, args=("first",))
+        worker.start()
+        entered.wait(5)
+
+        with self.assertRaises(self.hashing.PasswordHasherBusy):
+            hasher.verify("second", "$2b$04$" + "a" * 53)
+        self.assertEqual(hasher.stats()["rejected"], 1)
+
+        release.set()
+        worker.join(5)
+        self.assertFalse(hasher.verify("third", "$2b$04$" + "a" * 53))
+
+    def test_timed_out_job_keeps_its_slot_until_it_finishes(self):
+        hasher = self.make_hasher(mode="process", max_pending=1, rounds=13, timeout=0.01)
+        hasher.start()
+        with self.assertRaisesRegex(self.hashing.PasswordHasherBusy, "timed out"):
+            hasher.hash("slow")
+        with self.assertRaisesRegex(self.hashing.PasswordHasherBusy, "capacity"):
+            hasher.verify("next", "$2b$04$" + "a" * 53)
+
+        deadline = time.monotonic() + 10
+        while not hasher._slots.acquire(timeout=0.05):
+            self.assertLess(time.monotonic(), deadline)
+        hasher._slots.release()
+        self.assertFalse(hasher.verify("next", "$2b$04$" + "a" * 53))
+
+    def test_only_the_boot_pool_forks(self):
+        self.assertEqual(self.hashing.PasswordHasher._context(boot=True).get_start_method(), "fork")
+        self.assertIn(self.hashing.PasswordHasher._context().get_start_method(), ("forkserver", "spawn"))
+
+    def test_start_builds_the_pool_by_forking(self):
+        hasher = self.make_hasher(mode="process")
+        hasher.start()
+        self.assertEqual(hasher._executor._mp_context.get_start_method(), "fork")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import importlib
+import os
+import sqlite3
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class RecordingCursor:
+    def __init__(self, log):
+        self.log = log
+
+    def execute(self, sql, params=None):
+        self.log.append((sql, params))
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.log = []
+
+    def cursor(self):
+        return RecordingCursor(self.log)
+
+
+class StatementTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("MOODMATE_DB_PATH", str(BACKEND_DIR / "tests" / "test_moodmate.db"))
+        cls.queries = importlib.import_module("queries")
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT, phone TEXT)")
+        self.conn.execute("INSERT INTO users (email, phone) VALUES ('a@example.com', '555')")
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_named_parameters_compile_to_driver_placeholders(self):
+        statement = self.queries.Statement("by_login", "SELECT id FROM users\n    WHERE email = :login OR phone = :login")
+
+        self.assertEqual(statement.sql, "SELECT id FROM users WHERE email = ? OR phone = ?")
+        self.assertEqual(statement.params, ["login", "login"])
+        self.assertEqual(statement.fetchone(self.conn, login="555")["id"], 1)
+
+    def test_casts_are_not_parameters(self):
+        statement = self.queries.Statement("cast", "SELECT :value::text")
+        self.assertEqual(statement.params, ["value"])
+
+    def test_executemany_binds_each_mapping(self):
+        statement = self.queries.Statement("insert_user", "INSERT INTO users (email, phone) VALUES (:email, :phone)")
+        statement.executemany(self.conn, [{"email": f"u{i}@example.com", "phone": str(i), "extra": True} for i in range(3)])
+
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0], 4)
+
+    def test_postgres_prepares_once_per_connection(self):
+        with mock.patch.object(self.queries, "IS_POSTGRES", True), mock.patch.object(self.queries, "PLACEHOLDER", "%s"):
+            statement = self.queries.Statement("by_login", "SELECT id FROM users WHERE email = :login OR phone = :login", prepare=True)
+        first, second = RecordingConnection(), RecordingConnection()
+
+        statement.execute(first, login="555")
+        statement.execute(first, login="556")
+        statement.execute(second, login="557")
+
+        self.assertEqual(first.log, [
+            ("PREPARE by_login AS SELECT id FROM users WHERE email = $1 OR phone = $1", None),
+            ("EXECUTE by_login (%s)", ("555",)),
+            ("EXECUTE by_login (%s)", ("556",)),
+        ])
+        self.assertEqual(second.log[0][0], "PREPARE by_login AS SELECT id FROM users WHERE email = $1 OR phone = $1")
+
+    def test_prepared_statement_names_are_unique(self):
+        modules = [self.queries] + [importlib.import_module(name) for name in (
+            "services.audit_log", "services.conversation_context", "services.user_counters",
+        )]
+        names = [value.name for module in modules for value in vars(module).values() if isinstance(value, self.queries.Statement)]
+        self.assertEqual(len(names), len(set(names)))
+
+
+if __name__ == "__main__":
+    unittest.main()
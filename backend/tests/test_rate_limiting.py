@@ -0,0 +1,90 @@
+import importlib
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class SQLiteRateLimitStorageTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("MOODMATE_DB_PATH", str(BACKEND_DIR / "tests" / "test_moodmate.db"))
+        cls.rate_limiting = importlib.import_module("services.rate_limiting")
+        cls.limits = importlib.import_module("limits")
+        cls.strategies = importlib.import_module("limits.strategies")
+        cls.storage_module = importlib.import_module("limits.storage")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.uri = f"moodmate+sqlite://{os.path.join(self.tmp.name, 'ratelimit.db')}"
+        self.storage = self.storage_module.storage_from_string(self.uri)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_uri_scheme_selects_the_sqlite_storage(self):
+        self.assertIsInstance(self.storage, self.rate_limiting.SQLiteRateLimitStorage)
+        self.assertTrue(self.storage.check())
+
+    def test_fixed_window_counter_restarts_after_expiry(self):
+        self.assertEqual(self.storage.incr("k", 60), 1)
+        self.assertEqual(self.storage.incr("k", 60, amount=2), 3)
+        self.assertEqual(self.storage.get("k"), 3)
+
+        with mock.patch.object(self.rate_limiting.time, "time", return_value=time.time() + 61):
+            self.assertEqual(self.storage.get("k"), 0)
+            self.assertEqual(self.storage.incr("k", 60), 1)
+
+    def test_sliding_window_refuses_past_the_limit(self):
+        limiter = self.strategies.SlidingWindowCounterRateLimiter(self.storage)
+        item = self.limits.parse("3 per minute")
+
+        self.assertEqual([limiter.hit(item, "10.0.0.1", "login") for _ in range(5)], [True, True, True, False, False])
+        self.assertTrue(limiter.hit(item, "10.0.0.2", "login"))
+        self.assertEqual(limiter.get_window_stats(item, "10.0.0.1", "login").remaining, 0)
+
+    def test_previous_window_is_weighted_by_its_overlap(self):
+        expiry = 60
+        start = (int(time.time()) // expiry + 1) * expiry  # the start of a fresh window
+        with mock.patch.object(self.rate_limiting.time, "time", return_value=start + 1):
+            for _ in range(10):
+                self.assertTrue(self.storage.acquire_sliding_window_entry("k", 10, expiry))
+        # A quarter into the next window, 75% of the previous 10 hits still count.
+        with mock.patch.object(self.rate_limiting.time, "time", return_value=start + expiry + 15):
+            self.assertEqual(sum(self.storage.acquire_sliding_window_entry("k", 10, expiry) for _ in range(5)), 3)
+
+    def test_workers_share_one_budget(self):
+        other_worker = self.rate_limiting.SQLiteRateLimitStorage(self.uri)
+        item = self.limits.parse("4 per minute")
+        first = self.strategies.SlidingWindowCounterRateLimiter(self.storage)
+        second = self.strategies.SlidingWindowCounterRateLimiter(other_worker)
+
+        allowed = [limiter.hit(item, "10.0.0.1", "chat") for limiter in (first, second) * 3]
+        self.assertEqual(allowed, [True, True, True, True, False, False])
+
+    def test_chat_check_counts_in_memory_when_the_store_is_locked(self):
+        def locked(*args):
+            raise sqlite3.OperationalError("database is locked")
+
+        store = SimpleNamespace(hit=locked, get_window_stats=locked, storage=SimpleNamespace(base_exceptions=sqlite3.Error))
+        with mock.patch.object(self.rate_limiting, "limiter", SimpleNamespace(enabled=True, limiter=store)):
+            budget = min(item.amount for item in self.rate_limiting._chat_limits)
+            allowed = [self.rate_limiting.hit_chat_limit("10.9.9.9") for _ in range(budget + 1)]
+            wait = self.rate_limiting.retry_after("10.9.9.9")
+
+        self.assertEqual(allowed, [True] * budget + [False])
+        self.assertGreaterEqual(wait, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
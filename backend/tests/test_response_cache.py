@@ -0,0 +1,82 @@
+import importlib
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ResponseCacheTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.module = importlib.import_module("services.response_cache")
+        cls.ai = importlib.import_module("services.ai_service")
+
+    def make_cache(self, **kwargs):
+        self.clock = FakeClock()
+        kwargs.setdefault("enabled", True)
+        return self.module.ResponseCache(clock=self.clock, **kwargs)
+
+    def test_normalization_makes_trivial_variants_exact_hits(self):
+        cache = self.make_cache()
+        cache.put("I can't sleep", "neutral", "Try a breathing exercise.", "gemini")
+        self.assertEqual(cache.get("  i CANT sleep!! ", "neutral").text, "Try a breathing exercise.")
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_near_duplicates_hit_within_the_same_mood_only(self):
+        cache = self.make_cache(threshold=0.8)
+        cache.put("I'm stressed about exams", "anxious", "Exams are tough.", "groq")
+        self.assertEqual(cache.get("im stressed about my exams", "anxious").text, "Exams are tough.")
+        self.assertIsNone(cache.get("im stressed about my exams", "sad"))
+        self.assertIsNone(cache.get("stressed about work", "anxious"))
+        stats = cache.stats()
+        self.assertEqual((stats["near_hits"], stats["misses"]), (1, 2))
+
+    def test_crisis_personalized_and_long_messages_bypass(self):
+        cache = self.make_cache()
+        cache.put("i want to die", "crisis", "reply", "gemini")
+        cache.put("hello", "neutral", "reply", "gemini", personalized=True)
+        cache.put("x" * 500, "neutral", "reply", "gemini")
+        self.assertEqual(cache.stats()["entries"], 0)
+        self.assertIsNone(cache.get("hello", "neutral", personalized=True))
+        self.assertEqual(cache.stats()["bypassed"], 1)
+
+    def test_entries_expire_and_lru_evicts_oldest(self):
+        cache = self.make_cache(max_entries=2, ttl=60)
+        cache.put("first message", "neutral", "one", "gemini")
+        cache.put("second message", "neutral", "two", "gemini")
+        cache.get("first message", "neutral")
+        cache.put("third message", "neutral", "three", "gemini")
+        self.assertIsNone(cache.get("second message", "neutral"))
+        self.assertEqual(cache.get("first message", "neutral").text, "one")
+        self.clock.now += 61
+        self.assertIsNone(cache.get("first message", "neutral"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_generate_ai_response_serves_cached_reply_without_providers(self):
+        cache = self.make_cache()
+        with mock.patch.object(self.ai, "response_cache", cache), \
+                mock.patch.object(self.ai, "run_hedged", return_value=("groq", "fresh reply")) as run_hedged:
+            first = self.ai.generate_ai_response("I can't sleep", [], mood="neutral")
+            second = self.ai.generate_ai_response("i cant sleep", [], mood="neutral")
+            uncached = self.ai.generate_ai_response("i cant sleep", [])
+        self.assertEqual(first["text"], "fresh reply")
+        self.assertEqual(second, {"text": "fresh reply", "source": "groq", "fallback_used": True, "cached": True})
+        self.assertEqual(uncached["text"], "fresh reply")
+        self.assertEqual(run_hedged.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import importlib
+import os
+import sqlite3
+import sys
+import unittest
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class SchemaStateTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Importing the module loads ``database``; keep it off the real moodmate.db.
+        os.environ.setdefault("MOODMATE_DB_PATH", str(BACKEND_DIR / "tests" / "test_moodmate.db"))
+        cls.state = importlib.import_module("services.schema_state")
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.row_factory = sqlite3.Row
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_missing_table_reads_as_nothing_applied(self):
+        self.assertEqual(self.state.read_state(self.conn), {})
+
+    def test_recorded_fingerprints_are_read_back_and_overwritten(self):
+        self.conn.execute(self.state.CREATE_SCHEMA_STATE_SQL)
+        self.state.record_state(self.conn, "schema", "1")
+        self.state.record_state(self.conn, "seed:doctors", "abc")
+        self.state.record_state(self.conn, "schema", "2")
+        self.assertEqual(self.state.read_state(self.conn), {"schema": "2", "seed:doctors": "abc"})
+
+    def test_fingerprint_tracks_content_not_key_order(self):
+        fingerprint = self.state.fingerprint
+        self.assertEqual(fingerprint([{"id": 1, "name": "A"}]), fingerprint([{"name": "A", "id": 1}]))
+        self.assertNotEqual(fingerprint([{"id": 1, "name": "A"}]), fingerprint([{"id": 1, "name": "B"}]))
+
+    def test_keyed_fingerprint_depends_on_the_key(self):
+        fingerprint = self.state.fingerprint
+        credentials = ("admin@moodmate.in", "secret")
+        self.assertNotEqual(fingerprint(credentials), fingerprint(credentials, key="k1"))
+        self.assertNotEqual(fingerprint(credentials, key="k1"), fingerprint(credentials, key="k2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
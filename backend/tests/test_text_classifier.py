@@ -0,0 +1,52 @@
+import importlib
+import sys
+import unittest
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class TextClassifierTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.classify = staticmethod(importlib.import_module("services.text_classifier").classify)
+        cls.ai = importlib.import_module("services.ai_service")
+
+    def test_crisis_phrases_survive_spacing_and_punctuation(self):
+        self.assertTrue(self.classify("I want to kill myself").crisis)
+        self.assertTrue(self.classify("i want to   KILL... myself").crisis)
+        self.assertTrue(self.classify("Having suicidal thoughts").crisis)
+        self.assertTrue(self.classify("mujhe marna chahta hoon").crisis)
+        self.assertFalse(self.classify("myself, I kill time reading").crisis)
+
+    def test_mood_uses_whole_words_and_first_matching_mood(self):
+        self.assertEqual(self.classify("I'm unhappy").mood, "sad")
+        self.assertEqual(self.classify("I made dinner").mood, "neutral")
+        self.assertEqual(self.classify("great day but so worried").mood, "happy")
+        self.assertEqual(self.classify("Feeling STRESSED").mood, "anxious")
+        self.assertEqual(self.classify("").mood, "neutral")
+
+    def test_toxicity_ignores_words_that_merely_contain_keywords(self):
+        self.assertTrue(self.classify("you idiots").toxic)
+        self.assertTrue(self.classify("I hated that").toxic)
+        self.assertFalse(self.classify("whatever, nice skills").toxic)
+
+    def test_one_pass_reports_every_signal(self):
+        signals = self.classify("I hate that I worried all night")
+        self.assertEqual((signals.crisis, signals.toxic, signals.mood, signals.topic), (False, True, "angry", "anxiety"))
+        self.assertEqual(signals.topics, {"anxiety", "sleep", "anger"})
+
+    def test_heuristic_fallback_replies_by_topic(self):
+        reply = self.ai.generate_heuristic_fallback("can't sleep, awake every night")
+        self.assertIn(reply, [
+            "Sleep can be tricky when there's a lot on your mind. Have you tried a quick breathing exercise to settle in?",
+            "I'm sorry you're struggling to rest. Try to focus on the weight of your blanket and the softness of your pillow. What's keeping you awake?",
+            "Rest is so important for your heart. Maybe we can try a short guided meditation together later?",
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,221 @@
+import importlib
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class AudioCacheTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("MOODMATE_DB_PATH", str(BACKEND_DIR / "tests" / "test_moodmate.db"))
+        cls.tts = importlib.import_module("services.tts_cache")
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.clock = FakeClock()
+        self.synthesized = []
+
+    def synthesize(self, text, lang, voice, fp):
+        self.synthesized.append((text, lang, voice))
+        fp.write(b"ID3" + text.encode("utf-8").ljust(97, b"."))  # 100 bytes per file
+
+    def make_cache(self, max_bytes=10_000):
+        return self.tts.AudioCache(self.tmp.name, max_bytes=max_bytes, synthesize=self.synthesize, clock=self.clock)
+
+    def test_same_text_is_synthesized_once(self):
+        cache = self.make_cache()
+        key, created = cache.get_or_create("Take a slow breath.", voice="com", lang="en")
+        again, created_again = cache.get_or_create("  Take a slow   breath. ", voice="com", lang="en")
+
+        self.assertEqual((key, created, created_again), (again, True, False))
+        self.assertEqual(len(self.synthesized), 1)
+        self.assertTrue(os.path.exists(cache.path(key)))
+
+    def test_voice_and_language_are_part_of_the_key(self):
+        keys = {
+            self.tts.audio_key("hello", "com", "en"),
+            self.tts.audio_key("hello", "co.in", "en"),
+            self.tts.audio_key("hello", "com", "hi"),
+        }
+        self.assertEqual(len(keys), 3)
+
+    def test_least_recently_used_files_are_evicted_over_budget(self):
+        cache = self.make_cache(max_bytes=250)
+        first, _ = cache.get_or_create("first")
+        self.clock.now += 1
+        second, _ = cache.get_or_create("second")
+        self.clock.now += 1
+        cache.lookup(first)  # first is now the most recently used
+        self.clock.now += 1
+        third, _ = cache.get_or_create("third")
+
+        self.assertTrue(os.path.exists(cache.path(first)))
+        self.assertFalse(os.path.exists(cache.path(second)))
+        self.assertTrue(os.path.exists(cache.path(third)))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_index_survives_restart_and_adopts_existing_files(self):
+        legacy = "0053c29985ba43d7b0f2aa4239d6e0dc"
+        Path(self.tmp.name, f"{legacy}.mp3").write_bytes(b"x" * 100)
+        cache = self.make_cache()
+        key, _ = cache.get_or_create("hello")
+
+        restarted = self.make_cache()
+        self.assertEqual(restarted.stats()["files"], 2)
+        self.assertIsNotNone(restarted.lookup(legacy))
+        self.assertEqual(restarted.get_or_create("hello"), (key, False))
+        self.assertEqual(len(self.synthesized), 1)
+
+    def test_failed_synthesis_leaves_no_file(self):
+        cache = self.make_cache()
+
+        def broken(text, lang, voice, fp):
+            fp.write(b"partial")
+            raise RuntimeError("tts down")
+
+        cache.synthesize = broken
+        with self.assertRaises(RuntimeError):
+            cache.get_or_create("hello")
+        self.assertEqual([name for name in os.listdir(self.tmp.name) if not name.startswith(".")], [])
+
+    def test_stream_yields_per_sentence_and_caches_the_assembled_file(self):
+        cache = self.make_cache()
+        text = "I hear you, that sounds heavy. Let's slow down together. What would help right now?"
+        chunks = list(cache.stream(text, voice="com", lang="en"))
+
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual([call[0] for call in self.synthesized], self.tts.split_sentences(text))
+        key = self.tts.audio_key(text, "com", "en")
+        self.assertEqual(Path(cache.path(key)).read_bytes(), b"".join(chunks))
+        self.assertEqual(cache.get_or_create(text, voice="com", lang="en"), (key, False))
+
+    def test_concurrent_streams_of_one_reply_synthesize_it_once(self):
+        cache = self.make_cache()
+        text = "I hear you, that sounds heavy. Let's slow down together. What would help right now?"
+        first = cache.stream(text)
+        streamed = [next(first)]
+        second = []
+        waiter = threading.Thread(target=lambda: second.extend(cache.stream(text)))
+        waiter.start()
+        waiter.join(0.1)
+        self.assertTrue(waiter.is_alive())  # parked on the key's in-flight lock
+
+        streamed.extend(first)
+        waiter.join(5)
+        self.assertEqual(b"".join(second), b"".join(streamed))
+        self.assertEqual(len(self.synthesized), len(self.tts.split_sentences(text)))
+
+    def test_abandoned_stream_is_not_cached(self):
+        cache = self.make_cache()
+        text = "First sentence is here. Second sentence is here. Third sentence is here."
+        chunks = cache.stream(text)
+        next(chunks)
+        chunks.close()
+
+        self.assertIsNone(cache.lookup(self.tts.audio_key(text)))
+        self.assertEqual([name for name in os.listdir(self.tmp.name) if not name.startswith(".")], [])
+
+    def test_short_fragments_are_merged_into_neighbouring_sentences(self):
+        self.assertEqual(self.tts.split_sentences("Hi. I hear you. Ok."), ["Hi. I hear you. Ok."])
+        self.assertEqual(
+            self.tts.split_sentences("Okay. That sounds really hard! Want to talk?"),
+            ["Okay. That sounds really hard!", "Want to talk?"],
+        )
+
+    def test_lookup_rejects_names_outside_the_key_space(self):
+        cache = self.make_cache()
+        self.assertIsNone(cache.lookup("../../app"))
+        self.assertIsNone(cache.lookup("0" * 32))
+
+
+class AudioRouteTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("MOODMATE_DB_PATH", str(BACKEND_DIR / "tests" / "test_moodmate.db"))
+        cls.app_module = importlib.import_module("app")
+
+    def setUp(self):
+        self.app_module.limiter.reset()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        def synthesize(text, lang, voice, fp):
+            fp.write(bytes(range(256)) * 4)
+
+        cache = self.app_module.audio_cache.__class__(self.tmp.name, synthesize=synthesize)
+        patcher = mock.patch.object(self.app_module, "audio_cache", cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = self.app_module.app.test_client()
+        with self.client.session_transaction() as session:
+            session["user_id"] = 1
+
+    def test_tts_returns_cached_url_and_serves_ranges_with_long_cache_headers(self):
+        first = self.client.post("/api/tts", json={"text": "You are doing well."}).get_json()
+        second = self.client.post("/api/tts", json={"text": "You are doing well."}).get_json()
+        self.assertEqual(first["audioUrl"], second["audioUrl"])
+        self.assertEqual((first["cached"], second["cached"]), (False, True))
+
+        response = self.client.get(first["audioUrl"], headers={"Range": "bytes=0-99"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(len(response.data), 100)
+        self.assertEqual(response.headers["Content-Type"], "audio/mpeg")
+        self.assertIn("immutable", response.headers["Cache-Control"])
+        response.close()
+
+    def test_stream_endpoint_sends_chunked_audio_then_serves_it_from_cache(self):
+        body = {"text": "One sentence to start with. And another one to finish."}
+        response = self.client.post("/api/tts/stream", json=body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Type"], "audio/mpeg")
+        self.assertEqual(response.headers["Cache-Control"], "no-store")
+        streamed = response.get_data()
+        audio_url = response.headers["X-Audio-Url"]
+
+        replay = self.client.get(audio_url)
+        self.assertEqual(replay.data, streamed)
+        replay.close()
+        cached = self.client.post("/api/tts/stream", json=body)
+        self.assertIn("immutable", cached.headers["Cache-Control"])
+        self.assertEqual(cached.get_data(), streamed)
+        cached.close()
+
+    def test_tts_rejects_unknown_voice(self):
+        response = self.client.post("/api/tts", json={"text": "hi", "voice": "evil.example"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_tts_requires_sign_in_and_shares_one_rate_limit(self):
+        anonymous = self.app_module.app.test_client()
+        self.assertEqual(anonymous.post("/api/tts", json={"text": "hi"}).status_code, 401)
+        self.assertEqual(anonymous.post("/api/tts/stream", json={"text": "hi"}).status_code, 401)
+
+        limits = importlib.import_module("limits").parse_many(importlib.import_module("services.rate_limiting").RATELIMIT_TTS)
+        budget = min(item.amount for item in limits)
+        statuses = [self.client.post("/api/tts", json={"text": f"Line {i}."}).status_code for i in range(budget - 1)]
+        streamed = self.client.post("/api/tts/stream", json={"text": "Last one."})
+        statuses.append(streamed.status_code)
+        streamed.close()
+        statuses.append(self.client.post("/api/tts", json={"text": "One too many."}).status_code)
+        self.assertEqual(statuses, [200] * budget + [429])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import importlib
+import os
+import sqlite3
+import sys
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class UserCounterTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("MOODMATE_DB_PATH", str(BACKEND_DIR / "tests" / "test_moodmate.db"))
+        cls.counters = importlib.import_module("services.user_counters")
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, coins INTEGER DEFAULT 100, streak INTEGER DEFAULT 0)")
+        self.conn.execute(self.counters.CREATE_COUNTER_DELTAS_SQL)
+        self.conn.executemany("INSERT INTO users (id) VALUES (?)", [(1,), (2,), (3,)])
+        self.conn.commit()
+
+        @contextmanager
+        def shared_db():
+            try:
+                yield self.conn
+            finally:
+                self.conn.rollback()  # like DatabasePool.putconn
+
+        patcher = mock.patch.object(self.counters, "get_db", shared_db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def user(self, user_id):
+        return dict(self.conn.execute("SELECT coins, streak FROM users WHERE id = ?", (user_id,)).fetchone())
+
+    def test_pending_deltas_are_visible_before_the_flush(self):
+        for _ in range(3):
+            self.counters.record_delta(self.conn, 1, "coins", 5)
+        self.conn.commit()
+
+        self.assertEqual(self.user(1), {"coins": 100, "streak": 0})
+        row = self.conn.execute("SELECT * FROM users WHERE id = 1").fetchone()
+        self.assertEqual(self.counters.with_pending(self.conn, 1, row), {"id": 1, "coins": 115, "streak": 0})
+
+    def test_flush_applies_every_user_in_one_pass_and_clears_the_ledger(self):
+        self.counters.record_delta(self.conn, 1, "coins", 5)
+        self.counters.record_delta(self.conn, 2, "coins", 5)
+        self.counters.record_delta(self.conn, 2, "coins", 5)
+        self.conn.commit()
+
+        statements = []
+        self.conn.set_trace_callback(statements.append)
+        flusher = self.counters.CounterFlusher(interval=60)
+        self.assertEqual(flusher.flush(), 3)
+        self.conn.set_trace_callback(None)
+
+        self.assertEqual([self.user(1), self.user(2), self.user(3)],
+                         [{"coins": 105, "streak": 0}, {"coins": 110, "streak": 0}, {"coins": 100, "streak": 0}])
+        self.assertEqual(sum(sql.lstrip().startswith("UPDATE users") for sql in statements), 1)
+        self.assertEqual(self.counters.pending_deltas(self.conn, 2), {})
+        self.assertEqual(flusher.flush(), 0)
+
+    def test_delta_committed_mid_flush_is_kept_for_the_next_one(self):
+        self.conn.execute("INSERT INTO counter_deltas (id, user_id, field, delta) VALUES (2, 1, 'coins', 5)")
+        self.conn.commit()
+        conn = self.conn
+
+        class LateWriter:
+            """Commits another chat's delta right after the flush's first write, as READ COMMITTED allows."""
+
+            injected = False
+
+            def execute(self, sql, params=()):
+                cursor = conn.execute(sql, params)
+                self.rows = cursor.fetchall() if cursor.description else []
+                if not LateWriter.injected and sql.lstrip().startswith(("DELETE", "UPDATE")):
+                    LateWriter.injected = True
+                    # An id from before the flush began: its chat's transaction was just slow to commit.
+                    conn.execute("INSERT INTO counter_deltas (id, user_id, field, delta) VALUES (1, 1, 'coins', 7)")
+                return self
+
+            def fetchall(self):
+                return self.rows
+
+            def fetchone(self):
+                return self.rows[0] if self.rows else None
+
+        proxy = type("Conn", (), {"cursor": lambda self: LateWriter(), "commit": conn.commit, "rollback": conn.rollback})()
+
+        self.assertEqual(self.counters.flush_deltas(proxy), 1)
+        self.assertEqual(self.user(1)["coins"], 105)
+        self.assertEqual(self.counters.pending_deltas(self.conn, 1), {"coins": 7})
+        self.assertEqual(self.counters.flush_deltas(self.conn), 1)
+        self.assertEqual(self.user(1)["coins"], 112)
+
+    def test_only_coins_go_through_the_ledger(self):
+        with self.assertRaisesRegex(ValueError, "streak"):
+            self.counters.record_delta(self.conn, 1, "streak", 1)
+
+    def test_uncommitted_delta_is_lost_with_its_transaction(self):
+        self.counters.record_delta(self.conn, 1, "coins", 5)
+        self.conn.rollback()  # e.g. the chat insert failed or the worker died mid-request
+        self.counters.CounterFlusher(interval=60).flush()
+        self.assertEqual(self.user(1)["coins"], 100)
+
+    def test_failed_flush_keeps_the_ledger_for_the_next_attempt(self):
+        self.counters.record_delta(self.conn, 1, "coins", 5)
+        self.conn.commit()
+        flusher = self.counters.CounterFlusher(interval=60)
+
+        def crash_after_update(conn):
+            conn.execute("UPDATE users SET coins = coins + 5 WHERE id = 1")
+            raise sqlite3.OperationalError("disk I/O error")
+
+        with mock.patch.object(self.counters, "flush_deltas", crash_after_update):
+            self.assertEqual(flusher.flush(), 0)
+        self.assertEqual(flusher.failures, 1)
+        self.assertEqual(self.user(1)["coins"], 100)
+
+        self.assertEqual(flusher.flush(), 1)
+        self.assertEqual(self.user(1)["coins"], 105)
+
+    def test_unknown_counter_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.counters.record_delta(self.conn, 1, "premium_plan", 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
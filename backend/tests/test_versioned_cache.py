@@ -0,0 +1,78 @@
+import importlib
+import json
+import sqlite3
+import sys
+import unittest
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+class VersionedCacheTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_module = importlib.import_module("cache")
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(self.cache_module.CREATE_CACHE_VERSIONS_SQL)
+        self.conn.execute("CREATE TABLE doctors (id INTEGER PRIMARY KEY, name TEXT)")
+        self.conn.execute("INSERT INTO doctors (id, name) VALUES (1, 'Dr. A')")
+        self.conn.commit()
+
+        @contextmanager
+        def shared_db():
+            yield self.conn
+
+        patcher = mock.patch.object(self.cache_module, "get_db", shared_db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.loads = 0
+
+    def tearDown(self):
+        self.conn.close()
+
+    def make_worker_cache(self):
+        def loader(conn):
+            self.loads += 1
+            return [dict(row) for row in conn.execute("SELECT * FROM doctors ORDER BY id")]
+
+        return self.cache_module.VersionedCache(
+            "doctors",
+            loader=loader,
+            serializer=lambda doctors: json.dumps(doctors).encode("utf-8"),
+            check_interval=0,
+        )
+
+    def test_hits_reuse_serialized_body(self):
+        cache = self.make_worker_cache()
+        first = cache.get()
+        second = cache.get()
+        self.assertIs(first, second)
+        self.assertEqual(json.loads(first.body), [{"id": 1, "name": "Dr. A"}])
+        self.assertEqual(self.loads, 1)
+
+    def test_invalidation_in_one_worker_reaches_the_others(self):
+        worker_a = self.make_worker_cache()
+        worker_b = self.make_worker_cache()
+        stale = worker_b.get()
+        self.assertEqual(len(stale.value), 1)
+
+        self.conn.execute("INSERT INTO doctors (id, name) VALUES (2, 'Dr. B')")
+        worker_a.invalidate(self.conn)
+        self.conn.commit()
+
+        fresh = worker_b.get()
+        self.assertEqual([doctor["id"] for doctor in fresh.value], [1, 2])
+        self.assertEqual(fresh.generation, 1)
+        self.assertNotEqual(fresh.etag, stale.etag)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -273,6 +273,7 @@ function Chat({ user }) {
     try {
       const response = await fetch(`${API_BASE_URL}/api/chat`, {
         method: 'POST',
+        credentials: 'include',
         headers: {
           'Content-Type': 'application/json',
           Accept: 'application/json',
@@ -264,6 +264,20 @@ const SUPPORT_REACTIONS = [
   { type: 'support', label: 'Support' },
 ];
 
+// created_at arrives as "2026-10-18 21:53:07" (SQLite, UTC) or as an RFC 822
+// date (PostgreSQL via jsonify), so compare parsed times, never the strings.
+const postTime = (post) => {
+  const value = String(post.created_at || '');
+  return Date.parse(/^\d{4}-\d{2}-\d{2} /.test(value) ? `${value.replace(' ', 'T')}Z` : value) || 0;
+};
+
+// Same order as the API's feed: newest created_at first, then highest id.
+const isOlderPost = (post, than) => {
+  const postAt = postTime(post);
+  const thanAt = postTime(than);
+  return postAt < thanAt || (postAt === thanAt && post.id < than.id);
+};
+
 function Community({ user }) {
   const isAdmin = user?.role === 'admin';
   const [communityPosts, setCommunityPosts] = useState([]);
@@ -283,6 +297,9 @@ function Community({ user }) {
   const [reportDetails, setReportDetails] = useState('');
   const [moderationQueue, setModerationQueue] = useState([]);
   const [moderationLoading, setModerationLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMorePosts, setLoadingMorePosts] = useState(false);
+  const olderPagesLoadedRef = useRef(false);
   const messagesEndRef = useRef(null);
   const joinedGroupsCount = groups.filter((group) => group.isMember).length;
   const totalMembers = groups.reduce((sum, group) => sum + group.members, 0);
@@ -301,18 +318,54 @@ function Community({ user }) {
     [groups]
   );
 
+  // Refreshes the newest page. Posts from older pages the user already loaded stay below it.
   const fetchPosts = async () => {
     try {
       const response = await fetch(`${API_BASE_URL}/api/community/posts`, { credentials: 'include' });
       const data = await response.json();
-      if (data.status === 'success') {
-        setCommunityPosts(data.posts);
+      if (data.success) {
+        const firstPage = data.posts || [];
+        if (!olderPagesLoadedRef.current) {
+          setCommunityPosts(firstPage);
+          setNextCursor(data.next_cursor || null);
+          return;
+        }
+        const oldest = firstPage[firstPage.length - 1];
+        const seen = new Set(firstPage.map((post) => post.id));
+        setCommunityPosts((current) => [
+          ...firstPage,
+          ...current.filter((post) => !seen.has(post.id) && (!oldest || isOlderPost(post, oldest))),
+        ]);
       }
     } catch (err) {
       console.error('Failed to fetch community posts', err);
     }
   };
 
+  const loadMorePosts = async () => {
+    if (!nextCursor || loadingMorePosts) return;
+    setLoadingMorePosts(true);
+    try {
+      const response = await fetch(
+        `${API_BASE_URL}/api/community/posts?cursor=${encodeURIComponent(nextCursor)}`,
+        { credentials: 'include' }
+      );
+      const data = await response.json();
+      if (data.success) {
+        olderPagesLoadedRef.current = true;
+        setCommunityPosts((current) => {
+          const seen = new Set(current.map((post) => post.id));
+          return [...current, ...(data.posts || []).filter((post) => !seen.has(post.id))];
+        });
+        setNextCursor(data.next_cursor || null);
+      }
+    } catch (err) {
+      console.error('Failed to load more community posts', err);
+    } finally {
+      setLoadingMorePosts(false);
+    }
+  };
+
   const fetchModerationQueue = async () => {
     if (!isAdmin) return;
     setModerationLoading(true);
@@ -864,6 +917,11 @@ function Community({ user }) {
                   );
                 })}
               </div>
+              {communityPosts.length > 0 && nextCursor && (
+                <button className="share-btn" onClick={loadMorePosts} disabled={loadingMorePosts}>
+                  {loadingMorePosts ? 'Loading...' : 'Load more reflections'}
+                </button>
+              )}
             </>
           )}
 